@@ -0,0 +1,110 @@
+# Nome do arquivo: analise_blocos.py
+"""
+Análise de documentos longos em blocos.
+
+Em vez de entregar o PDF inteiro ao AnalyzerEngine (um único Doc do spaCy, que
+esbarra em nlp.max_length e ocupa vários GB em sentenças extensas), o texto é
+dividido em blocos de até `tamanho_bloco` caracteres, cortados de preferência
+em quebras de página/parágrafo, com `sobreposicao` caracteres repetidos entre
+blocos vizinhos. Cada bloco é analisado separadamente e os offsets são
+deslocados de volta para o texto completo; o pico de memória passa a depender
+do tamanho do bloco, e não do documento.
+
+Na sobreposição, cada bloco é "dono" da metade mais próxima dele: um resultado
+só é mantido pelo bloco dono da sua posição inicial, o que elimina as
+entidades detectadas duas vezes. Entidades mais longas que metade da
+sobreposição podem ser truncadas no corte, por isso a sobreposição deve ser
+bem maior que a maior entidade esperada (o padrão, 1.000 caracteres, cobre
+com folga nomes, endereços e identificadores).
+"""
+
+import os
+from typing import Iterable, List, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+from reconhecedores import remover_resultados_contidos
+
+TAMANHO_BLOCO_PADRAO = int(os.environ.get("ANONIMIZADOR_TAMANHO_BLOCO", "100000"))
+SOBREPOSICAO_PADRAO = int(os.environ.get("ANONIMIZADOR_SOBREPOSICAO_BLOCO", "1000"))
+
+# Separadores preferidos para o corte, do mais forte (quebra de página) ao mais fraco
+_SEPARADORES_CORTE = ("\f", "\n\n", "\n", " ")
+_SEPARADORES_INICIO = ("\n", " ")
+
+
+def _posicao_corte(texto: str, inicio: int, fim: int) -> int:
+    """Último separador em texto[inicio:fim] (posição logo após ele), ou `fim` se não houver."""
+    for separador in _SEPARADORES_CORTE:
+        posicao = texto.rfind(separador, inicio, fim)
+        if posicao != -1:
+            return posicao + len(separador)
+    return fim
+
+
+def _posicao_inicio(texto: str, inicio: int, fim: int) -> int:
+    """Primeiro separador em texto[inicio:fim] (posição logo após ele), ou `inicio` se não houver."""
+    for separador in _SEPARADORES_INICIO:
+        posicao = texto.find(separador, inicio, fim - len(separador))
+        if posicao != -1:
+            return posicao + len(separador)
+    return inicio
+
+
+def dividir_em_blocos(texto: str,
+                      tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                      sobreposicao: int = SOBREPOSICAO_PADRAO) -> List[Tuple[int, int]]:
+    """Retorna os intervalos (início, fim) dos blocos, vizinhos compartilhando ~`sobreposicao` caracteres."""
+    if sobreposicao < 0 or 2 * sobreposicao >= tamanho_bloco:
+        raise ValueError("A sobreposição deve ser não negativa e menor que metade do tamanho do bloco.")
+    blocos = []
+    inicio = 0
+    while True:
+        if len(texto) - inicio <= tamanho_bloco:
+            blocos.append((inicio, len(texto)))
+            return blocos
+        # Corta na segunda metade do bloco, no separador mais forte disponível
+        fim = _posicao_corte(texto, inicio + tamanho_bloco // 2, inicio + tamanho_bloco)
+        blocos.append((inicio, fim))
+        # O próximo bloco começa ~`sobreposicao` antes do corte, no início de uma linha ou palavra
+        inicio = _posicao_inicio(texto, fim - sobreposicao, fim) if sobreposicao else fim
+
+
+def analisar_em_blocos(analyzer,
+                       text: str,
+                       tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                       sobreposicao: int = SOBREPOSICAO_PADRAO,
+                       **kwargs) -> List[RecognizerResult]:
+    """
+    Equivalente a analyzer.analyze(text=text, **kwargs), analisando o texto bloco a bloco.
+
+    Textos que cabem em um bloco são analisados diretamente.
+    """
+    if len(text) <= tamanho_bloco:
+        return analyzer.analyze(text=text, **kwargs)
+
+    blocos = dividir_em_blocos(text, tamanho_bloco, sobreposicao)
+    resultados_por_bloco = (analyzer.analyze(text=text[inicio:fim], **kwargs) for inicio, fim in blocos)
+    return mesclar_resultados_blocos(blocos, resultados_por_bloco, len(text))
+
+
+def mesclar_resultados_blocos(blocos: List[Tuple[int, int]],
+                              resultados_por_bloco: Iterable[List[RecognizerResult]],
+                              tamanho_texto: int) -> List[RecognizerResult]:
+    """
+    Desloca os resultados de cada bloco (na ordem de `blocos`) para o texto completo
+    e descarta os detectados fora da região de posse do bloco.
+    """
+    resultados = []
+    for indice, resultados_bloco in enumerate(resultados_por_bloco):
+        inicio, fim = blocos[indice]
+        # Região cuja posse é deste bloco: do meio da sobreposição anterior ao meio da seguinte
+        posse_inicio = (inicio + blocos[indice - 1][1]) // 2 if indice > 0 else 0
+        posse_fim = (blocos[indice + 1][0] + fim) // 2 if indice + 1 < len(blocos) else tamanho_texto
+        for resultado in resultados_bloco:
+            resultado.start += inicio
+            resultado.end += inicio
+            if posse_inicio <= resultado.start < posse_fim:
+                resultados.append(resultado)
+    # Uma entidade que cruza o meio da sobreposição pode conter outra vinda do bloco vizinho
+    return remover_resultados_contidos(resultados)
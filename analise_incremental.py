@@ -0,0 +1,166 @@
+# Nome do arquivo: analise_incremental.py
+"""
+Reanálise incremental de um texto editado, parágrafo a parágrafo.
+
+Na aba de texto, corrigir uma letra numa petição longa e anonimizar de novo
+reanalisava o texto inteiro. AnalisadorIncremental divide o texto em
+parágrafos (trechos separados por linha em branco; as linhas em branco ficam
+no fim do parágrafo) e guarda, por impressão digital da configuração e hash
+do parágrafo, os resultados da análise com offsets relativos ao parágrafo.
+Numa nova análise só os parágrafos novos ou alterados vão ao analyzer (os
+consecutivos num só trecho); os demais vêm do cache com os offsets
+deslocados para a posição atual no texto.
+
+O modelo de NER olha as palavras vizinhas, então cada trecho vai ao analyzer
+com até `contexto` caracteres dos parágrafos ao redor (como a sobreposição de
+analise_blocos.py), e só ficam os resultados que começam no trecho. As bordas
+de um parágrafo guardado refletem os vizinhos que ele tinha quando foi
+analisado; com um modelo treinado, isso não muda o resultado na prática (ver
+benchmarks/benchmark_analise_incremental.py).
+
+Os resultados são os da análise crua: filtro de termos comuns, resolução de
+conflitos e anonimização continuam sendo feitos sobre o texto completo. Um
+resultado que atravessa a linha em branco entre dois parágrafos é usado, mas
+esses parágrafos não vão para o cache (voltam a ser analisados juntos).
+ANONIMIZADOR_ANALISE_INCREMENTAL=0 desativa; ANONIMIZADOR_CACHE_PARAGRAFOS
+limita o número de parágrafos guardados (padrão 20.000) e
+ANONIMIZADOR_CONTEXTO_PARAGRAFOS o contexto (padrão 300 caracteres).
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+ANALISE_INCREMENTAL_PADRAO = os.environ.get("ANONIMIZADOR_ANALISE_INCREMENTAL", "1") == "1"
+LIMITE_PARAGRAFOS_PADRAO = int(os.environ.get("ANONIMIZADOR_CACHE_PARAGRAFOS", "20000"))
+CONTEXTO_PADRAO = int(os.environ.get("ANONIMIZADOR_CONTEXTO_PARAGRAFOS", "300"))
+# Fim de parágrafo: uma linha em branco (só espaços) e as seguintes
+_FIM_PARAGRAFO = re.compile(r"\n[ \t\r\f\v]*\n\s*")
+_ESPACO = re.compile(r"\s")
+
+ResultadoRelativo = Tuple[str, int, int, float]
+
+
+def dividir_paragrafos(texto: str) -> List[Tuple[int, int]]:
+    """(início, fim) de cada parágrafo; os intervalos cobrem o texto inteiro, na ordem."""
+    paragrafos, inicio = [], 0
+    for separador in _FIM_PARAGRAFO.finditer(texto):
+        paragrafos.append((inicio, separador.end()))
+        inicio = separador.end()
+    if inicio < len(texto):
+        paragrafos.append((inicio, len(texto)))
+    return paragrafos
+
+
+def _janela_contexto(texto: str, inicio: int, fim: int, contexto: int) -> Tuple[int, int]:
+    """texto[inicio:fim] com até `contexto` caracteres de cada lado, cortados em espaço ou quebra de linha."""
+    inicio_janela, fim_janela = max(0, inicio - contexto), min(len(texto), fim + contexto)
+    if inicio_janela > 0:
+        separador = _ESPACO.search(texto, inicio_janela, inicio)
+        inicio_janela = separador.end() if separador else inicio
+    if fim_janela < len(texto):
+        fim_janela = max(texto.rfind(" ", fim, fim_janela), texto.rfind("\n", fim, fim_janela), fim)
+    return inicio_janela, fim_janela
+
+
+def _hash_paragrafo(paragrafo: str) -> bytes:
+    return hashlib.blake2b(paragrafo.encode("utf-8"), digest_size=16).digest()
+
+
+class AnalisadorIncremental:
+    """LRU dos resultados por parágrafo, compartilhado entre sessões (os resultados só dependem do texto e da configuração)."""
+
+    def __init__(self, limite_paragrafos: int = LIMITE_PARAGRAFOS_PADRAO, contexto: int = CONTEXTO_PADRAO):
+        self.limite_paragrafos = limite_paragrafos
+        self.contexto = contexto
+        self._itens: "OrderedDict[Hashable, Tuple[ResultadoRelativo, ...]]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _obter(self, chave: Hashable) -> Optional[Tuple[ResultadoRelativo, ...]]:
+        with self._trava:
+            resultados = self._itens.get(chave)
+            if resultados is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return resultados
+
+    def _guardar(self, chave: Hashable, resultados: Tuple[ResultadoRelativo, ...]) -> None:
+        if self.limite_paragrafos <= 0:
+            return
+        with self._trava:
+            self._itens[chave] = resultados
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.limite_paragrafos:
+                self._itens.popitem(last=False)
+
+    def analisar(self,
+                 texto: str,
+                 impressao: str,
+                 analisar: Callable[[str], List[RecognizerResult]]) -> Tuple[List[RecognizerResult], Dict]:
+        """
+        Resultados de `analisar` para `texto` (offsets no texto completo), analisando só os
+        parágrafos sem resultado guardado para `impressao` (impressao_digital_configuracao).
+
+        Retorna (resultados, {"paragrafos", "reanalisados", "caracteres_reanalisados"}).
+        """
+        paragrafos = dividir_paragrafos(texto)
+        chaves = [(impressao, _hash_paragrafo(texto[inicio:fim])) for inicio, fim in paragrafos]
+        guardados = [self._obter(chave) for chave in chaves]
+        resultados: List[RecognizerResult] = []
+        estatisticas = {"paragrafos": len(paragrafos), "reanalisados": 0, "caracteres_reanalisados": 0}
+
+        indice = 0
+        while indice < len(paragrafos):
+            inicio_paragrafo = paragrafos[indice][0]
+            if guardados[indice] is not None:
+                resultados.extend(RecognizerResult(entidade, inicio_paragrafo + inicio, inicio_paragrafo + fim, score)
+                                  for entidade, inicio, fim, score in guardados[indice])
+                indice += 1
+                continue
+            # Parágrafos alterados consecutivos formam um só trecho para o analyzer
+            fim_trecho = indice
+            while fim_trecho < len(paragrafos) and guardados[fim_trecho] is None:
+                fim_trecho += 1
+            inicio_trecho, fim_texto_trecho = inicio_paragrafo, paragrafos[fim_trecho - 1][1]
+            inicio_janela, fim_janela = _janela_contexto(texto, inicio_trecho, fim_texto_trecho, self.contexto)
+            resultados_janela = analisar(texto[inicio_janela:fim_janela])
+            estatisticas["reanalisados"] += fim_trecho - indice
+            estatisticas["caracteres_reanalisados"] += fim_janela - inicio_janela
+
+            por_paragrafo: Dict[int, List[ResultadoRelativo]] = {posicao: [] for posicao in range(indice, fim_trecho)}
+            sem_cache = set()
+            posicao = indice
+            for resultado in sorted(resultados_janela, key=lambda r: r.start):
+                inicio, fim = resultado.start + inicio_janela, resultado.end + inicio_janela
+                if not inicio_trecho <= inicio < fim_texto_trecho:
+                    continue  # começa no contexto: vale o que está guardado para o vizinho
+                while posicao + 1 < fim_trecho and paragrafos[posicao + 1][0] <= inicio:
+                    posicao += 1
+                if fim > paragrafos[posicao][1]:
+                    # Atravessa a linha em branco: vale agora, mas não como resultado de um parágrafo só
+                    seguinte = posicao
+                    while seguinte < fim_trecho and paragrafos[seguinte][0] < fim:
+                        sem_cache.add(seguinte)
+                        seguinte += 1
+                por_paragrafo[posicao].append((resultado.entity_type, inicio - paragrafos[posicao][0],
+                                               fim - paragrafos[posicao][0], resultado.score))
+                resultados.append(RecognizerResult(resultado.entity_type, inicio, fim, resultado.score,
+                                                   resultado.analysis_explanation, resultado.recognition_metadata))
+            for posicao in range(indice, fim_trecho):
+                if posicao not in sem_cache:
+                    self._guardar(chaves[posicao], tuple(por_paragrafo[posicao]))
+            indice = fim_trecho
+        return resultados, estatisticas
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._itens)}
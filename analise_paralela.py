@@ -0,0 +1,96 @@
+# Nome do arquivo: analise_paralela.py
+"""
+Análise de um único documento grande em vários núcleos.
+
+O texto é dividido em blocos (ver analise_blocos.py) e cada bloco é enviado a
+um pool de processos. Cada processo carrega, uma única vez na inicialização,
+o seu próprio AnalyzerEngine (modelo spaCy + pacote de reconhecedores do
+disco); os resultados voltam na ordem dos blocos e são mesclados como na
+análise sequencial, antes do anonymizer_engine.anonymize.
+
+Cada processo mantém uma cópia do modelo spaCy em memória (~500 MB para o
+pt_core_news_lg): dimensione ANONIMIZADOR_TRABALHADORES de acordo com a RAM
+disponível. Com ANONIMIZADOR_TRABALHADORES 0 (padrão) ou 1, o aplicativo não
+cria o pool e usa a análise sequencial; AnalisadorParalelo em si exige ao
+menos um trabalhador.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from presidio_analyzer import AnalyzerEngine, RecognizerResult
+
+from analise_blocos import SOBREPOSICAO_PADRAO, dividir_em_blocos, mesclar_resultados_blocos
+from motor_nlp import MODELO_SPACY_PADRAO, PERFIL_PIPELINE_PADRAO, criar_motor_nlp
+from pacote_reconhecedores import carregar_pacote_reconhecedores
+
+NUM_TRABALHADORES_PADRAO = int(os.environ.get("ANONIMIZADOR_TRABALHADORES", "0"))
+# Blocos menores que na análise sequencial, para que um documento grande ocupe todos os processos
+TAMANHO_BLOCO_PARALELO_PADRAO = int(os.environ.get("ANONIMIZADOR_TAMANHO_BLOCO_PARALELO", "20000"))
+
+# AnalyzerEngine do processo trabalhador (criado por _inicializar_trabalhador)
+_analyzer_trabalhador: Optional[AnalyzerEngine] = None
+
+
+def _inicializar_trabalhador(listas_reconhecedores, modelo, perfil, limiar_score):
+    global _analyzer_trabalhador
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(modelo, perfil), supported_languages=["pt"],
+                              default_score_threshold=limiar_score)
+    for reconhecedor in carregar_pacote_reconhecedores(*listas_reconhecedores)["reconhecedores"]:
+        analyzer.registry.add_recognizer(reconhecedor)
+    _analyzer_trabalhador = analyzer
+
+
+def _analisar_bloco(argumentos) -> List[RecognizerResult]:
+    texto_bloco, kwargs = argumentos
+    return _analyzer_trabalhador.analyze(text=texto_bloco, **kwargs)
+
+
+class AnalisadorParalelo:
+    """Pool de processos, cada um com seu AnalyzerEngine pré-carregado."""
+
+    def __init__(self,
+                 listas_reconhecedores: Sequence,
+                 num_trabalhadores: int,
+                 modelo: str = MODELO_SPACY_PADRAO,
+                 perfil: str = PERFIL_PIPELINE_PADRAO,
+                 limiar_score: float = 0.4):
+        """
+        `listas_reconhecedores` são as listas na ordem de carregar_pacote_reconhecedores
+        (locais seguros, cabeçalhos legais, sobrenomes, estado civil, organizações).
+        `num_trabalhadores` é o número de processos (ao menos 1).
+        """
+        if num_trabalhadores < 1:
+            raise ValueError(f"num_trabalhadores deve ser ao menos 1 (recebido: {num_trabalhadores}).")
+        self.num_trabalhadores = num_trabalhadores
+        # "spawn": não herda threads do Streamlit nem o estado do spaCy do processo principal
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_trabalhadores,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_trabalhador,
+            initargs=(tuple(listas_reconhecedores), modelo, perfil, limiar_score),
+        )
+
+    def analisar(self,
+                 text: str,
+                 tamanho_bloco: int = TAMANHO_BLOCO_PARALELO_PADRAO,
+                 sobreposicao: int = SOBREPOSICAO_PADRAO,
+                 **kwargs) -> List[RecognizerResult]:
+        """
+        Equivalente a analise_blocos.analisar_em_blocos, com os blocos analisados em paralelo.
+
+        O bloco é reduzido para que o texto renda ao menos um bloco por processo (um lote
+        de páginas do fluxo de PDF tem poucas dezenas de milhares de caracteres), mas não
+        abaixo de 4x a sobreposição, para que a repetição entre blocos não domine.
+        """
+        tamanho_bloco = min(tamanho_bloco, max(-(-len(text) // self.num_trabalhadores), 4 * sobreposicao))
+        blocos = dividir_em_blocos(text, tamanho_bloco, sobreposicao)
+        tarefas = ((text[inicio:fim], kwargs) for inicio, fim in blocos)
+        # executor.map devolve os resultados na ordem dos blocos
+        resultados_por_bloco = self._executor.map(_analisar_bloco, tarefas)
+        return mesclar_resultados_blocos(blocos, resultados_por_bloco, len(text))
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
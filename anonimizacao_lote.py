@@ -0,0 +1,88 @@
+# Nome do arquivo: anonimizacao_lote.py
+"""
+Anonimização em lote de muitos documentos (ex.: o acervo de decisões do
+processamento noturno).
+
+A etapa de NLP é feita em fluxo pelo nlp.pipe do spaCy (batch_size e n_process
+configuráveis) através de SpacyNlpEnginePerfilado.process_batch; para cada
+documento, os reconhecedores de padrões rodam sobre os NlpArtifacts já
+calculados (analyzer.analyze com nlp_artifacts), seguidos do filtro de termos
+comuns, da resolução de conflitos e da anonimização
+(anonimizacao_rapida.anonimizar_texto). Os resultados são gerados sob demanda,
+na ordem de entrada, sem manter o lote inteiro em memória.
+
+Documentos maiores que `tamanho_bloco` (padrão ANONIMIZADOR_TAMANHO_BLOCO) não
+viram um único Doc do spaCy, que esbarraria em nlp.max_length (erro E088):
+são analisados em blocos (analise_blocos.analisar_em_blocos) no processo
+principal. Um erro em um documento gera uma entrada com "erro" preenchido e o
+lote continua.
+"""
+
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from analise_blocos import TAMANHO_BLOCO_PADRAO, analisar_em_blocos
+from anonimizacao_rapida import anonimizar_texto
+from pos_analise import filtrar_termos_comuns, resolver_conflitos
+
+logger = logging.getLogger("anonimizador")
+
+TAMANHO_LOTE_PADRAO = 32
+
+
+def anonimizar_em_lote(documentos: Iterable[str],
+                       analyzer,
+                       anonymizer,
+                       operadores: Dict,
+                       entidades: Optional[List[str]] = None,
+                       termos_comuns: Optional[frozenset] = None,
+                       batch_size: int = TAMANHO_LOTE_PADRAO,
+                       n_process: int = 1,
+                       language: str = "pt",
+                       tamanho_bloco: int = TAMANHO_BLOCO_PADRAO) -> Iterator[Dict]:
+    """
+    Anonimiza cada documento de `documentos`, gerando um dicionário por documento com
+    "indice", "texto_anonimizado", "resultados" (RecognizerResult após o filtro e a
+    resolução de conflitos), "conflitos" (contagem de pos_analise.resolver_conflitos) e
+    "erro" (None, ou a mensagem do erro; nesse caso "texto_anonimizado" e "conflitos" são None).
+
+    O `analyzer` precisa de um motor de NLP com process_batch(..., as_tuples, batch_size,
+    n_process), como o criado por motor_nlp.criar_motor_nlp.
+    """
+    # Os documentos longos ficam aqui; pelo nlp.pipe passa só um texto vazio no lugar deles
+    documentos_longos: Dict[int, str] = {}
+
+    def documentos_indexados():
+        for indice, texto in enumerate(documentos):
+            if len(texto) > tamanho_bloco:
+                documentos_longos[indice] = texto
+                yield "", indice
+            else:
+                yield texto, indice
+
+    lotes = analyzer.nlp_engine.process_batch(documentos_indexados(), language, as_tuples=True,
+                                              batch_size=batch_size, n_process=n_process)
+    for texto, artefatos, indice in lotes:
+        texto = documentos_longos.pop(indice, texto)
+        if not texto.strip():
+            yield {"indice": indice, "texto_anonimizado": texto, "resultados": [],
+                   "conflitos": {"removidos": 0, "unidos": 0, "recortados": 0}, "erro": None}
+            continue
+        try:
+            if len(texto) > tamanho_bloco:
+                resultados = analisar_em_blocos(analyzer, text=texto, tamanho_bloco=tamanho_bloco, language=language,
+                                                entities=entidades, return_decision_process=False)
+            else:
+                resultados = analyzer.analyze(text=texto, language=language, entities=entidades,
+                                              nlp_artifacts=artefatos, return_decision_process=False)
+            if termos_comuns is not None:
+                resultados = filtrar_termos_comuns(texto, resultados, termos_comuns)
+            resultados, conflitos = resolver_conflitos(texto, resultados)
+            texto_anonimizado = anonimizar_texto(anonymizer, texto, resultados, operadores)
+        except Exception as e:
+            logger.warning("Documento %d do lote não anonimizado: %s", indice, e)
+            yield {"indice": indice, "texto_anonimizado": None, "resultados": [], "conflitos": None,
+                   "erro": str(e)}
+            continue
+        yield {"indice": indice, "texto_anonimizado": texto_anonimizado, "resultados": resultados,
+               "conflitos": conflitos, "erro": None}
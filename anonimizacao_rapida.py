@@ -0,0 +1,155 @@
+# Nome do arquivo: anonimizacao_rapida.py
+"""
+Anonimização direta do texto para os operadores keep, replace e mask.
+
+O AnonymizerEngine do Presidio resolve os conflitos comparando cada resultado
+com todos os outros (custo quadrático) e monta o texto por concatenações
+sucessivas, do fim para o começo. Com milhares de resultados num lote de PDF,
+isso domina o tempo da anonimização. anonimizar_texto reproduz as mesmas
+regras com uma ordenação e uma varredura:
+
+1. Resultados com os mesmos índices: fica o de maior score (no empate, o
+   último da lista). Resultados contidos em outro são descartados.
+2. Resultados consecutivos na lista, do mesmo tipo e separados só por
+   espaços, são unidos, e o início do segundo é ajustado no próprio objeto,
+   como no AnonymizerEngine.
+3. Cada resultado é substituído pela saída do operador aplicada ao texto
+   original do intervalo. Quando há sobreposição parcial, o resultado que
+   começa depois tem precedência no trecho em comum.
+
+A saída é idêntica à de AnonymizerEngine.anonymize(...).text (ver
+benchmarks/benchmark_anonimizacao_rapida.py). Quando algum operador não é
+keep/replace/mask, quando há resultados do mesmo tipo sobrepostos (que o
+Presidio une em uma ordem que depende da lista) ou com offsets fora do texto,
+o AnonymizerEngine é usado. ANONIMIZADOR_ANONIMIZACAO_RAPIDA=0 desativa.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+from presidio_analyzer import RecognizerResult
+
+ANONIMIZACAO_RAPIDA_PADRAO = os.environ.get("ANONIMIZADOR_ANONIMIZACAO_RAPIDA", "1") == "1"
+OPERADORES_SUPORTADOS = ("keep", "replace", "mask")
+# Mesmo teste do AnonymizerEngine._merge_entities_with_whitespace_between
+_SO_ESPACOS = re.compile(r"^( )+$")
+
+
+def _parametros_validos(operador) -> bool:
+    nome, params = operador.operator_name, operador.params or {}
+    if nome == "keep":
+        return True
+    if nome == "replace":
+        return params.get("new_value") is None or isinstance(params.get("new_value"), str)
+    if nome == "mask":
+        return (isinstance(params.get("masking_char"), str) and len(params["masking_char"]) == 1
+                and type(params.get("chars_to_mask")) is int and type(params.get("from_end")) is bool)
+    return False
+
+
+def operadores_suportados(operadores: Optional[Dict]) -> bool:
+    """True se todos os operadores são keep, replace ou mask, com parâmetros que o Presidio aceitaria."""
+    return all(operador.operator_name in OPERADORES_SUPORTADOS and _parametros_validos(operador)
+               for operador in (operadores or {}).values())
+
+
+def _substituicao(operador, entidade: str, trecho: str) -> str:
+    """Saída do operador do Presidio para o texto original `trecho`."""
+    if operador is None:  # sem DEFAULT, o Presidio usa replace sem new_value
+        return f"<{entidade}>"
+    nome, params = operador.operator_name, operador.params or {}
+    if nome == "keep":
+        return trecho
+    if nome == "replace":
+        return params.get("new_value") or f"<{entidade}>"
+    caracteres = min(len(trecho), params["chars_to_mask"]) if params["chars_to_mask"] > 0 else 0
+    if params["from_end"]:
+        return trecho[:len(trecho) - caracteres] + params["masking_char"] * caracteres
+    return params["masking_char"] * caracteres + trecho[caracteres:]
+
+
+def _resultados_mantidos(texto: str, resultados: List[RecognizerResult]) -> Optional[List[RecognizerResult]]:
+    """
+    Resultados que sobrevivem às regras 1 e 2, na ordem da lista, ou None quando o
+    AnonymizerEngine precisa ser usado (mesmo tipo sobreposto, offsets inválidos).
+    """
+    tamanho_texto = len(texto)
+    ordem = sorted(range(len(resultados)), key=lambda i: (resultados[i].start, -resultados[i].end))
+    maior_fim_por_tipo: Dict[str, int] = {}
+    maior_fim = -1
+    mantidos = [False] * len(resultados)
+    posicao = 0
+    while posicao < len(ordem):
+        # Grupo de resultados com os mesmos índices
+        primeiro = resultados[ordem[posicao]]
+        inicio, fim = primeiro.start, primeiro.end
+        if type(inicio) is not int or type(fim) is not int or inicio < 0 or fim > tamanho_texto or inicio > fim:
+            return None
+        grupo_fim = posicao
+        while (grupo_fim < len(ordem) and resultados[ordem[grupo_fim]].start == inicio
+               and resultados[ordem[grupo_fim]].end == fim):
+            grupo_fim += 1
+        grupo = ordem[posicao:grupo_fim]
+        for indice in grupo:
+            entidade = resultados[indice].entity_type
+            # O Presidio une resultados do mesmo tipo com interseção de ao menos um caractere
+            if fim > inicio and maior_fim_por_tipo.get(entidade, -1) > inicio:
+                return None
+            maior_fim_por_tipo[entidade] = max(maior_fim_por_tipo.get(entidade, -1), fim)
+        if maior_fim < fim:  # não está contido em nenhum resultado anterior na ordenação
+            # Maior score; no empate, o último da lista
+            mantidos[max(grupo, key=lambda i: (resultados[i].score, i))] = True
+        maior_fim = max(maior_fim, fim)
+        posicao = grupo_fim
+
+    unidos: List[RecognizerResult] = []
+    for indice, resultado in enumerate(resultados):
+        if not mantidos[indice]:
+            continue
+        if unidos:
+            anterior = unidos[-1]
+            if (anterior.entity_type == resultado.entity_type
+                    and _SO_ESPACOS.search(texto[anterior.end:resultado.start])):
+                unidos.pop()
+                resultado.start = anterior.start
+        unidos.append(resultado)
+    return unidos
+
+
+def anonimizar_rapido(texto: str, resultados: List[RecognizerResult], operadores: Dict) -> Optional[str]:
+    """
+    Texto anonimizado idêntico ao do AnonymizerEngine, ou None quando este precisa ser usado.
+
+    `operadores` deve passar em operadores_suportados.
+    """
+    mantidos = _resultados_mantidos(texto, resultados)
+    if mantidos is None:
+        return None
+    padrao = operadores.get("DEFAULT") if operadores else None
+    # Mesma ordem de aplicação do AnonymizerEngine (ordenação estável, do fim para o começo)
+    ordenados = sorted(mantidos, key=lambda resultado: (resultado.start, resultado.end), reverse=True)
+    ordenados.reverse()
+    partes, posicao = [], 0
+    for indice, resultado in enumerate(ordenados):
+        inicio, fim = resultado.start, resultado.end
+        proximo_inicio = ordenados[indice + 1].start if indice + 1 < len(ordenados) else len(texto)
+        operador = (operadores.get(resultado.entity_type) if operadores else None) or padrao
+        partes.append(texto[posicao:inicio])
+        partes.append(_substituicao(operador, resultado.entity_type, texto[inicio:fim]))
+        posicao = min(fim, proximo_inicio)
+    partes.append(texto[posicao:])
+    return "".join(partes)
+
+
+def anonimizar_texto(anonymizer,
+                     texto: str,
+                     resultados: List[RecognizerResult],
+                     operadores: Dict,
+                     rapido: bool = ANONIMIZACAO_RAPIDA_PADRAO) -> str:
+    """Mesmo que anonymizer.anonymize(text=..., analyzer_results=..., operators=...).text."""
+    if rapido and operadores_suportados(operadores):
+        texto_anonimizado = anonimizar_rapido(texto, resultados, operadores)
+        if texto_anonimizado is not None:
+            return texto_anonimizado
+    return anonymizer.anonymize(text=texto, analyzer_results=resultados, operators=operadores).text
@@ -2,18 +2,15 @@
 # Versão 0.91 (Beta)
 
 import streamlit as st
-import spacy
-from presidio_analyzer import AnalyzerEngine, PatternRecognizer
-from presidio_analyzer.nlp_engine import SpacyNlpEngine
-from presidio_analyzer.pattern import Pattern
+from presidio_analyzer import AnalyzerEngine
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 import pandas as pd
 from st_copy_to_clipboard import st_copy_to_clipboard
 import io
-import fitz  # PyMuPDF
+import tempfile
+import time
 from docx import Document
-import re
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -24,6 +21,29 @@ import requests
 import json # Embora não usado diretamente no exemplo Ollama, pode ser útil para JSON payloads
 import tiktoken 
 import httpx
+from pacote_reconhecedores import calcular_assinatura_pacote, carregar_pacote_reconhecedores
+from motor_nlp import (
+    MODELO_SPACY_PADRAO,
+    PERFIL_PIPELINE_PADRAO,
+    cache_artefatos_nlp,
+    carregar_modelo_spacy,
+    criar_motor_nlp,
+    informacoes_modelos_carregados,
+    niveis_modelo_instalados,
+    resolver_modelo_spacy,
+)
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns, resolver_conflitos, resumo_conflitos
+from analise_blocos import analisar_em_blocos
+from anonimizacao_rapida import anonimizar_texto
+from tabela_intervalos import TabelaIntervalos
+from extracao_pdf import PAGINAS_POR_LOTE_PADRAO, CacheLeiturasPdf, gravar_upload_pdf, iterar_lotes_paginas, remover_upload_pdf, resumo_extracao
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from ocr_pdf import tesseract_disponivel
+from redacao_pdf import TabelaRedacoes, distribuir_resultados_por_pagina, gerar_pdf_redigido
+from cache_resultados import CacheResultados, impressao_digital_configuracao
+from analise_paralela import NUM_TRABALHADORES_PADRAO, AnalisadorParalelo
+from analise_incremental import ANALISE_INCREMENTAL_PADRAO, AnalisadorIncremental
+from perfilamento import PERFILAMENTO_ATIVO, analisar_com_perfil, instrumentar_analyzer, registrar_perfil_json
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -70,8 +90,18 @@ KEY_LLM_OUTPUT_AREA_STATE = f"llm_output_area_state{VERSION_SUFFIX}"
 KEY_COPY_LLM_PDF = f"copy_llm_pdf{VERSION_SUFFIX}"
 KEY_COPY_LLM_AREA = f"copy_llm_area{VERSION_SUFFIX}"
 KEY_CUSTOM_USER_PROMPT_LLM_INPUT = f"custom_user_prompt_llm_input{VERSION_SUFFIX}" # NOVA CHAVE
-KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM = f"texto_extraido_pdf_contagem{VERSION_SUFFIX}"
+KEY_PREVIA_TEXTO_PDF = f"previa_texto_pdf{VERSION_SUFFIX}" # Início do texto extraído (o PDF inteiro não fica na sessão)
+KEY_PDF_TEM_TEXTO = f"pdf_tem_texto{VERSION_SUFFIX}"
+KEY_ID_UPLOAD_PDF = f"id_upload_pdf{VERSION_SUFFIX}"
+KEY_HASH_PDF = f"hash_pdf{VERSION_SUFFIX}" # SHA-256 dos bytes do PDF carregado
+KEY_CAMINHO_PDF = f"caminho_pdf{VERSION_SUFFIX}" # Cópia do upload em disco (ver extracao_pdf.gravar_upload_pdf)
+KEY_HASH_PDF_LIDO = f"hash_pdf_lido{VERSION_SUFFIX}" # PDF cuja leitura (tokens, prévia) está na sessão
+KEY_REDACOES_PDF = f"redacoes_pdf{VERSION_SUFFIX}" # Intervalos a tarjar por página, da última anonimização
+KEY_PDF_REDIGIDO = f"pdf_redigido{VERSION_SUFFIX}"
+KEY_BOTAO_GERAR_PDF = f"botao_gerar_pdf{VERSION_SUFFIX}"
 KEY_NUM_TOKENS_PDF_EXTRAIDO = f"num_tokens_pdf_extraido{VERSION_SUFFIX}"
+KEY_NIVEL_MODELO_AREA = f"nivel_modelo_area{VERSION_SUFFIX}"
+KEY_TEMPOS_EXTRACAO_PDF = f"tempos_extracao_pdf{VERSION_SUFFIX}"
 
 # --- Funções de Callback e Utilitárias ---
 def callback_apagar_textos_area():
@@ -102,10 +132,14 @@ def callback_apagar_textos_area():
         st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY] = ""
     if KEY_LLM_OUTPUT_PDF_STATE in st.session_state:
         st.session_state[KEY_LLM_OUTPUT_PDF_STATE] = None
-    if KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM in st.session_state:
-        st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM] = ""
+    if KEY_PREVIA_TEXTO_PDF in st.session_state:
+        st.session_state[KEY_PREVIA_TEXTO_PDF] = ""
+    if KEY_PDF_TEM_TEXTO in st.session_state:
+        st.session_state[KEY_PDF_TEM_TEXTO] = False
     if KEY_NUM_TOKENS_PDF_EXTRAIDO in st.session_state:
         st.session_state[KEY_NUM_TOKENS_PDF_EXTRAIDO] = 0
+    if KEY_HASH_PDF_LIDO in st.session_state:
+        st.session_state[KEY_HASH_PDF_LIDO] = None
    
 
 def carregar_lista_de_arquivo(nome_arquivo):
@@ -302,205 +336,36 @@ def carregar_analyzer_engine(termos_safe_location,
                              termos_legal_header, 
                              lista_sobrenomes,
                              termos_estado_civil, 
-                             termos_organizacoes_conhecidas, 
-                             termos_comuns_a_manter):
+                             termos_organizacoes_conhecidas,
+                             modelo_spacy=MODELO_SPACY_PADRAO):
     try:
         try:
-            spacy.load('pt_core_news_lg')
+            # Carrega o modelo uma única vez (registro compartilhado); o AnalyzerEngine reutiliza a mesma instância
+            carregar_modelo_spacy(modelo_spacy, PERFIL_PIPELINE_PADRAO)
         except OSError:
-            st.error("Modelo spaCy 'pt_core_news_lg' não encontrado. Instale com: python -m spacy download pt_core_news_lg")
+            st.error(f"Modelo spaCy '{modelo_spacy}' não encontrado. Instale com: python -m spacy download {modelo_spacy}")
             return None
         
-        spacy_engine_obj = SpacyNlpEngine(models=[{'lang_code': 'pt', 'model_name': 'pt_core_news_lg'}])
+        # Perfil do pipeline spaCy (ANONIMIZADOR_PERFIL_SPACY): completo, ner_lema ou ner
+        spacy_engine_obj = criar_motor_nlp(modelo_spacy, PERFIL_PIPELINE_PADRAO)
         analyzer = AnalyzerEngine(nlp_engine=spacy_engine_obj, supported_languages=["pt"], default_score_threshold=0.4)
         
-        # Reconhecedor para Locais Seguros (Estados e Capitais)
-        if termos_safe_location: # Adicionado check para lista não vazia
-            recognizer_safe_location = PatternRecognizer(
-                supported_entity="SAFE_LOCATION", 
-                name="SafeLocationRecognizer", 
-                deny_list=termos_safe_location, 
-                supported_language="pt", 
-                deny_list_score=0.99
-            )
-            analyzer.registry.add_recognizer(recognizer_safe_location)
-        
-        # Reconhecedor para Cabeçalhos Legais
-        if termos_legal_header: # Adicionado check para lista não vazia
-            recognizer_legal_header = PatternRecognizer(
-                supported_entity="LEGAL_HEADER", 
-                name="LegalHeaderRecognizer", 
-                deny_list=termos_legal_header, 
-                supported_language="pt", 
-                deny_list_score=0.99
-            )
-            analyzer.registry.add_recognizer(recognizer_legal_header)
-        
-        # Reconhecedor para CPF
-        cpf_pattern = Pattern(name="CpfRegexPattern", regex=r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b", score=0.85)
-        cpf_recognizer = PatternRecognizer(
-            supported_entity="CPF", 
-            name="CustomCpfRecognizer", 
-            patterns=[cpf_pattern], 
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(cpf_recognizer)
-        
-        # Reconhecedor para OAB_NUMBER
-        oab_pattern = Pattern(name="OabRegexPattern", regex=r"\b(?:OAB\s+)?\d{1,6}(?:\.\d{3})?\s*\/\s*[A-Z]{2}\b", score=0.85)
-        oab_recognizer = PatternRecognizer(
-            supported_entity="OAB_NUMBER", 
-            name="CustomOabRecognizer", 
-            patterns=[oab_pattern], 
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(oab_recognizer)
-
-        # Reconhecedor para CEP_NUMBER
-        cep_pattern = Pattern(name="CepPattern", regex=r"\b(\d{5}-?\d{3}|\d{2}\.\d{3}-?\d{3})\b", score=0.80) 
-        cep_recognizer = PatternRecognizer(
-            supported_entity="CEP_NUMBER", 
-            name="CustomCepRecognizer", 
-            patterns=[cep_pattern], 
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(cep_recognizer)
-
-        # Reconhecedor para ESTADO_CIVIL
-        if termos_estado_civil:
-            estado_civil_patterns = [Pattern(name=f"estado_civil_{t.lower()}", regex=rf"(?i)\b{re.escape(t)}\b", score=0.99) for t in termos_estado_civil]
-            ec_recognizer = PatternRecognizer(
-                supported_entity="ESTADO_CIVIL", 
-                name="EstadoCivilRecognizer", 
-                patterns=estado_civil_patterns, 
-                supported_language="pt"
-            )
-            analyzer.registry.add_recognizer(ec_recognizer)
-
-        # Reconhecedor para ORGANIZACOES_CONHECIDAS
-        if termos_organizacoes_conhecidas:
-            org_patterns = [Pattern(name=f"org_{t.lower()}", regex=rf"(?i)\b{re.escape(t)}\b", score=0.99) for t in termos_organizacoes_conhecidas]
-            org_recognizer = PatternRecognizer(
-                supported_entity="ORGANIZACAO_CONHECIDA", 
-                name="OrganizacaoConhecidaRecognizer", 
-                patterns=org_patterns, 
-                supported_language="pt"
-            )
-            analyzer.registry.add_recognizer(org_recognizer)
-        
-        # Reconhecedor para Sobrenomes Frequentes (da lista externa)
-        if lista_sobrenomes:
-            surnames_patterns = [Pattern(name=f"surname_{s.lower().replace(' ', '_')}", regex=rf"(?i)\b{re.escape(s)}\b", score=0.97) for s in lista_sobrenomes]
-            surnames_recognizer = PatternRecognizer(
-                supported_entity="PERSON", 
-                name="BrazilianCommonSurnamesRecognizer", 
-                patterns=surnames_patterns, 
-                supported_language="pt"
-            )
-            analyzer.registry.add_recognizer(surnames_recognizer)
-        
-        # --- Reconhecedores Específicos para Documentos de Identificação ---
-        
-        # Reconhecedor para CNH (Carteira Nacional de Habilitação)
-        cnh_patterns = [
-            # CNH com formatação: CNH 12345678901 ou CNH nº 12345678901
-            Pattern(name="cnh_formatado", regex=r"\bCNH\s*(?:nº|n\.)?\s*\d{11}\b", score=0.98),
-            # CNH sem formatação: apenas os 11 dígitos (mais específico para evitar falsos positivos)
-            Pattern(name="cnh_apenas_numeros", regex=r"\b(?<![\w])\d{11}(?![\w])\b", score=0.85)
-        ]
-        cnh_recognizer = PatternRecognizer(
-            supported_entity="CNH",
-            name="CNHRecognizer",
-            patterns=cnh_patterns,
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(cnh_recognizer)
-        
-        # Reconhecedor para SIAPE (Sistema Integrado de Administração de Recursos Humanos)
-        siape_patterns = [
-            # SIAPE com formatação: SIAPE 1234567 ou SIAPE nº 1234567
-            Pattern(name="siape_formatado", regex=r"\bSIAPE\s*(?:nº|n\.)?\s*\d{7}\b", score=0.98),
-            # SIAPE sem formatação: apenas os 7 dígitos (mais específico)
-            Pattern(name="siape_apenas_numeros", regex=r"\b(?<![\w])\d{7}(?![\w])\b", score=0.85)
-        ]
-        siape_recognizer = PatternRecognizer(
-            supported_entity="SIAPE",
-            name="SIAPERecognizer",
-            patterns=siape_patterns,
-            supported_language="pt"
+        # Reconhecedores customizados (SafeLocation, LegalHeader, identificadores numéricos,
+        # estado civil/organizações, sobrenomes, matrícula/SIAPE) vêm de um pacote
+        # pré-compilado em disco, reconstruído automaticamente quando as listas mudam.
+        pacote = carregar_pacote_reconhecedores(
+            termos_safe_location,
+            termos_legal_header,
+            lista_sobrenomes,
+            termos_estado_civil,
+            termos_organizacoes_conhecidas
         )
-        analyzer.registry.add_recognizer(siape_recognizer)
-        
-        # Reconhecedor para CI (Cédula de Identidade)
-        ci_patterns = [
-            # CI com formatação: CI 12345678-9 ou CI nº 12345678-9
-            Pattern(name="ci_formatado", regex=r"\bCI\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", score=0.98),
-            # CI sem formatação: formato padrão brasileiro
-            Pattern(name="ci_padrao", regex=r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", score=0.90)
-        ]
-        ci_recognizer = PatternRecognizer(
-            supported_entity="CI",
-            name="CIRecognizer",
-            patterns=ci_patterns,
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(ci_recognizer)
-        
-        # Reconhecedor para CIN (Cédula de Identidade Nacional)
-        cin_patterns = [
-            # CIN com formatação: CIN 12345678-9 ou CIN nº 12345678-9
-            Pattern(name="cin_formatado", regex=r"\bCIN\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", score=0.98),
-            # CIN sem formatação: formato padrão brasileiro
-            Pattern(name="cin_padrao", regex=r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", score=0.90)
-        ]
-        cin_recognizer = PatternRecognizer(
-            supported_entity="CIN",
-            name="CINRecognizer",
-            patterns=cin_patterns,
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(cin_recognizer)
-        
-        # Reconhecedor para termos "matrícula" e "siape" (substituir por ***)
-        matricula_siape_patterns = [
-            Pattern(name="matricula_siape", regex=r"(?i)\b(matr[íi]cula|siape)\b", score=0.95)
-        ]
-        matricula_siape_recognizer = PatternRecognizer(
-            supported_entity="MATRICULA_SIAPE",
-            name="MatriculaSiapeRecognizer",
-            patterns=matricula_siape_patterns,
-            supported_language="pt"
-        )
-        analyzer.registry.add_recognizer(matricula_siape_recognizer)
-        
-        # --- Reconhecedor para IDs de Documento/Processo/Benefício (REFINADO) ---
-        id_documento_patterns = [
-            # Para NB XXXXXXXXX-X ou XXX.XXX.XXX-X
-            Pattern(name="numero_beneficio_nb_formatado", regex=r"\bNB\s*\d{1,3}(\.?\d{3}){2}-[\dX]\b", score=0.98),
-            # Para IDs PJe longos e puramente numéricos (ex: ID do Documento, Número do Documento)
-            # Este regex pega sequências de 10 a 25 dígitos. Ajuste os limites se necessário.
-            Pattern(name="id_numerico_longo_pje", regex=r"\b\d{10,25}\b", score=0.97), 
-            # Para IDs que começam com "ID " seguido de números (como no seu exemplo ID 2028869157 do teste anterior)
-            Pattern(name="id_prefixo_numerico", regex=r"\bID\s*\d{8,12}\b", score=0.97),
-            # Para RG no formato XXXXXXX-X ou X.XXX.XXX-X, com variações de "ª VIA" e órgão emissor
-            Pattern(name="numero_rg_completo", regex=r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+(?:-\dª\s*VIA)?\s*-\s*[A-Z]{2,3}\/[A-Z]{2}\b", score=0.98),
-            Pattern(name="numero_rg_simples", regex=r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+\b", score=0.97), # RG mais simples sem órgão emissor
-            # Número de processo CNJ (manter score alto para proteção)
-            Pattern(name="numero_processo_cnj", regex=r"\b\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}\b", score=0.95),
-            # Para RNM (Registro Nacional Migratório)
-            Pattern(name="numero_rnm", regex=r"\bRNM\s*(?:nº|n\.)?\s*[A-Z0-9]{7,15}\b", score=0.98), # Ex: RNM nº F5725832
-            # Para CRM (Conselho Regional de Medicina)
-            Pattern(name="numero_crm", regex=r"\bCRM\s*[A-Z]{2}\s*-\s*\d{1,6}\b", score=0.98) # Ex: CRM RR-2498
-        ]
-        id_documento_recognizer = PatternRecognizer(
-            supported_entity="ID_DOCUMENTO", 
-            name="IdDocumentoRecognizer",
-            patterns=id_documento_patterns,
-            supported_language="pt"
-            # context = ["NB", "ID", "CRM", "RNM", "RG", "Processo"] # Contexto pode ajudar a aumentar a precisão
-        )
-        analyzer.registry.add_recognizer(id_documento_recognizer)
-        # --- FIM DO NOVO RECONHECEDOR ---
+        for reconhecedor in pacote["reconhecedores"]:
+            analyzer.registry.add_recognizer(reconhecedor)
+
+        # Perfilamento opcional (ANONIMIZADOR_PERFILAMENTO=1): tempo e contagens por reconhecedor e NLP
+        if PERFILAMENTO_ATIVO:
+            instrumentar_analyzer(analyzer)
         
         return analyzer
     except Exception as e:
@@ -516,6 +381,57 @@ def carregar_anonymizer_engine():
         st.error(f"Erro crítico ao carregar o AnonymizerEngine: {e}.")
         return None
 
+@st.cache_resource
+def carregar_termos_comuns_a_manter(termos_comuns):
+    # Conjunto normalizado (casefold, sem acentos) usado para descartar PERSON/LOCATION
+    # que são apenas termos comuns; uma consulta em hash por resultado.
+    return construir_conjunto_termos_comuns(termos_comuns)
+
+@st.cache_resource
+def carregar_analisador_paralelo(num_trabalhadores,
+                                 termos_safe_location,
+                                 termos_legal_header,
+                                 lista_sobrenomes,
+                                 termos_estado_civil,
+                                 termos_organizacoes_conhecidas):
+    # Modo paralelo para PDFs grandes (ANONIMIZADOR_TRABALHADORES > 1): cada processo
+    # carrega seu próprio AnalyzerEngine e analisa uma parte dos blocos do documento.
+    if num_trabalhadores <= 1:
+        return None
+    try:
+        return AnalisadorParalelo(
+            (termos_safe_location, termos_legal_header, lista_sobrenomes,
+             termos_estado_civil, termos_organizacoes_conhecidas),
+            num_trabalhadores=num_trabalhadores,
+            perfil=PERFIL_PIPELINE_PADRAO
+        )
+    except Exception as e:
+        st.warning(f"Modo de análise paralela indisponível ({e}); usando a análise sequencial.")
+        return None
+
+@st.cache_resource
+def carregar_cache_resultados():
+    # Resultados completos (texto anonimizado + entidades) por hash do texto e da configuração, em
+    # memória; em SQLite no diretório de cache só com ANONIMIZADOR_CACHE_RESULTADOS_DISCO > 0.
+    return CacheResultados()
+
+@st.cache_resource
+def carregar_cache_leituras_pdf():
+    # Leituras de PDF (tokens, prévia, tempos) por SHA-256 dos bytes, compartilhadas entre sessões
+    return CacheLeiturasPdf()
+
+@st.cache_resource
+def carregar_analisador_incremental():
+    # Resultados da análise por parágrafo do texto da área, compartilhados entre sessões
+    return AnalisadorIncremental()
+
+@st.cache_resource
+def carregar_impressao_configuracao(_analyzer, modelo_spacy, entidades):
+    # Impressão digital da configuração para o cache de resultados, uma vez por modelo e conjunto de
+    # entidades: lê o código dos reconhecedores e serializa as listas, o que não cabe a cada clique
+    return impressao_digital_configuracao(_analyzer, calcular_assinatura_pacote(*LISTAS_RECONHECEDORES),
+                                          LISTA_TERMOS_COMUNS, operadores, entidades)
+
 def obter_operadores_anonimizacao():
     return {
         "DEFAULT": OperatorConfig("keep"),
@@ -545,20 +461,59 @@ analyzer_engine = carregar_analyzer_engine(
     TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR,  # para termos_legal_header
     LISTA_SOBRENOMES_FREQUENTES_BR,         # para lista_sobrenomes
     LISTA_ESTADO_CIVIL,                     # para termos_estado_civil (ESTAVA FALTANDO)
-    LISTA_ORGANIZACOES_CONHECIDAS,           # para termos_organizacoes_conhecidas (ESTAVA FALTANDO)
-    LISTA_TERMOS_COMUNS
+    LISTA_ORGANIZACOES_CONHECIDAS            # para termos_organizacoes_conhecidas (ESTAVA FALTANDO)
 )
 anonymizer_engine = carregar_anonymizer_engine()
+analisador_paralelo = carregar_analisador_paralelo(
+    NUM_TRABALHADORES_PADRAO,
+    LISTA_ESTADOS_CAPITAIS_BR,
+    TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR,
+    LISTA_SOBRENOMES_FREQUENTES_BR,
+    LISTA_ESTADO_CIVIL,
+    LISTA_ORGANIZACOES_CONHECIDAS
+)
+termos_comuns_a_manter = carregar_termos_comuns_a_manter(LISTA_TERMOS_COMUNS)
+cache_resultados = carregar_cache_resultados()
+cache_leituras_pdf = carregar_cache_leituras_pdf()
+analisador_incremental = carregar_analisador_incremental()
+LISTAS_RECONHECEDORES = (LISTA_ESTADOS_CAPITAIS_BR, TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR, LISTA_SOBRENOMES_FREQUENTES_BR,
+                         LISTA_ESTADO_CIVIL, LISTA_ORGANIZACOES_CONHECIDAS)
 operadores = obter_operadores_anonimizacao()
 
-def extrair_texto_de_pdf(arquivo_pdf_bytes_io):
-    texto_completo = ""
+LIMITE_PREVIA_TEXTO_PDF = 100_000 # caracteres do texto original exibidos no expander
+
+def ler_pdf_para_contagem(caminho_pdf, llm_provider):
+    # Percorre o PDF em lotes de páginas (extraídos em vários processos em PDFs grandes, ver
+    # extracao_pdf.py): soma os tokens e guarda só uma prévia do texto e os tempos por página.
+    inicio = time.perf_counter()
+    leitura = {"num_tokens": 0, "tem_texto": False, "previa": "", "tempos_s": [], "trabalhadores": 1,
+               "paginas_ocr": [], "paginas_sem_texto": []}
+    barra_progresso = st.progress(0.0, text="Lendo o PDF...")
     try:
-        documento_pdf = fitz.open(stream=arquivo_pdf_bytes_io, filetype="pdf")
-        for pagina in documento_pdf: texto_completo += pagina.get_text()
-        documento_pdf.close()
+        for lote in iterar_lotes_paginas(caminho_pdf):
+            texto_lote = "".join(lote["paginas"])
+            leitura["num_tokens"] += contar_tokens_para_estimativa(texto_lote, llm_provider=llm_provider)
+            leitura["tem_texto"] = leitura["tem_texto"] or bool(texto_lote.strip())
+            if len(leitura["previa"]) < LIMITE_PREVIA_TEXTO_PDF:
+                leitura["previa"] += texto_lote[:LIMITE_PREVIA_TEXTO_PDF - len(leitura["previa"])]
+            leitura["tempos_s"].extend(lote["tempos_s"])
+            leitura["trabalhadores"] = lote["trabalhadores"]
+            leitura["paginas_ocr"].extend(lote["paginas_ocr"]) # Páginas digitalizadas lidas por OCR (ver ocr_pdf.py)
+            leitura["paginas_sem_texto"].extend(lote["paginas_sem_texto"])
+            paginas_lidas = lote["pagina_inicial"] + len(lote["paginas"])
+            barra_progresso.progress(paginas_lidas / lote["total_paginas"], text=f"Lendo o PDF: página {paginas_lidas} de {lote['total_paginas']}")
     except Exception as e: st.error(f"Erro ao extrair texto do PDF: {e}"); return None
-    return texto_completo
+    finally: barra_progresso.empty()
+    leitura["tempo_total_s"] = time.perf_counter() - inicio
+    return leitura
+
+def criar_pdf_redigido_bytes(caminho_pdf, redacoes):
+    # Tarjas aplicadas no próprio PDF, com o layout preservado; páginas em paralelo em PDFs grandes
+    with tempfile.TemporaryDirectory() as dir_temporario:
+        caminho_saida = os.path.join(dir_temporario, "anonimizado.pdf")
+        gerar_pdf_redigido(caminho_pdf, redacoes, caminho_saida)
+        with open(caminho_saida, "rb") as arquivo_saida:
+            return arquivo_saida.read()
 
 def criar_docx_bytes(texto_anonimizado):
     documento = Document(); documento.add_paragraph(texto_anonimizado)
@@ -1029,10 +984,14 @@ st.session_state.setdefault(KEY_LLM_OUTPUT_AREA_STATE, None)
 st.session_state.setdefault('texto_anonimizado_arquivo'+VERSION_SUFFIX, None)
 st.session_state.setdefault(KEY_TEXTO_ANONIMIZADO_OUTPUT_AREA_STATE, "O resultado da anonimização aparecerá aqui...")
 st.session_state.setdefault(KEY_TEXTO_ORIGINAL_PDF_DISPLAY, "")
-st.session_state.setdefault(KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM, "")
+st.session_state.setdefault(KEY_PREVIA_TEXTO_PDF, "")
+st.session_state.setdefault(KEY_PDF_TEM_TEXTO, False)
+st.session_state.setdefault(KEY_REDACOES_PDF, None)
+st.session_state.setdefault(KEY_PDF_REDIGIDO, None)
 st.session_state.setdefault(KEY_NUM_TOKENS_PDF_EXTRAIDO, 0)
 st.session_state.setdefault('nome_arquivo_carregado'+VERSION_SUFFIX, None)
 st.session_state.setdefault('resultados_df_area'+VERSION_SUFFIX, pd.DataFrame()) # Chave específica para df da área de texto
+st.session_state.setdefault('perfil_df_area'+VERSION_SUFFIX, pd.DataFrame()) # Perfil da análise (só com ANONIMIZADOR_PERFILAMENTO=1)
 st.session_state.setdefault(KEY_TEXTO_ORIGINAL_AREA, (
     "EXMO. SR. DR. JUIZ FEDERAL DA ____ª VARA DA SEÇÃO JUDICIÁRIA DE SÃO LUÍS – MA – JUIZADO ESPECIAL FEDERAL.\n\n"  # Linha em branco adicionada
     "TRAMITAÇÃO PRIORITÁRIA – AUTOR IDOSO – ART.1.048, I DO CPC\n\n"  # Linha em branco adicionada
@@ -1144,30 +1103,61 @@ with tab_pdf:
 
     st.caption("Limite de 200MB por arquivo.")
 
+    if arquivo_pdf_carregado is None and st.session_state.get(KEY_CAMINHO_PDF):
+        # Upload retirado: a cópia em disco (ainda não anonimizada) é apagada na hora
+        remover_upload_pdf(st.session_state[KEY_CAMINHO_PDF])
+        st.session_state[KEY_CAMINHO_PDF] = None
+        st.session_state[KEY_ID_UPLOAD_PDF] = None
+
     if arquivo_pdf_carregado is not None:
-        # Verifica se o arquivo mudou para reprocessar a contagem de tokens
-        # Usando .get() para nome_arquivo_carregado para evitar KeyError na primeira execução
-        if st.session_state.get('nome_arquivo_carregado'+VERSION_SUFFIX) != arquivo_pdf_carregado.name:
-            st.session_state['nome_arquivo_carregado'+VERSION_SUFFIX] = arquivo_pdf_carregado.name
+        # O upload é gravado uma vez em disco (com o SHA-256 calculado na mesma passada) e, daí em diante,
+        # contagem, anonimização e tarjas abrem o arquivo pelo caminho, sem cópias dos bytes na sessão.
+        # O PDF é identificado pelo SHA-256 do conteúdo, não pelo nome.
+        if (st.session_state.get(KEY_ID_UPLOAD_PDF) != arquivo_pdf_carregado.file_id
+                or not os.path.exists(st.session_state.get(KEY_CAMINHO_PDF) or "")):
+            remover_upload_pdf(st.session_state.get(KEY_CAMINHO_PDF)) # A cópia do upload anterior desta sessão
+            st.session_state[KEY_ID_UPLOAD_PDF] = arquivo_pdf_carregado.file_id
+            st.session_state[KEY_CAMINHO_PDF], st.session_state[KEY_HASH_PDF] = gravar_upload_pdf(arquivo_pdf_carregado)
+        else:
+            os.utime(st.session_state[KEY_CAMINHO_PDF]) # Em uso: não é apagado como órfão por outra sessão
+        st.session_state['nome_arquivo_carregado'+VERSION_SUFFIX] = arquivo_pdf_carregado.name
+        # Verifica se o conteúdo mudou para reprocessar a contagem de tokens
+        if st.session_state.get(KEY_HASH_PDF_LIDO) != st.session_state[KEY_HASH_PDF]:
+            st.session_state[KEY_HASH_PDF_LIDO] = st.session_state[KEY_HASH_PDF]
             st.session_state['texto_anonimizado_arquivo'+VERSION_SUFFIX] = None 
             st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY] = "" 
             st.session_state[KEY_LLM_OUTPUT_PDF_STATE] = None
-            st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM] = ""
+            st.session_state[KEY_PREVIA_TEXTO_PDF] = ""
+            st.session_state[KEY_PDF_TEM_TEXTO] = False
             st.session_state[KEY_NUM_TOKENS_PDF_EXTRAIDO] = 0
+            st.session_state[KEY_TEMPOS_EXTRACAO_PDF] = None
+            st.session_state[KEY_REDACOES_PDF] = None
+            st.session_state[KEY_PDF_REDIGIDO] = None
             
-            with st.spinner(f"Lendo o arquivo '{arquivo_pdf_carregado.name}' para calcular tokens..."):
-                bytes_do_pdf = arquivo_pdf_carregado.getvalue()
-                # Garante que passamos um objeto BytesIO para extrair_texto_de_pdf
-                texto_extraido_contagem = extrair_texto_de_pdf(io.BytesIO(bytes_do_pdf))
-                st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM] = texto_extraido_contagem if texto_extraido_contagem else ""
-                
-                if st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM].strip():
-                    # Determina qual LLM está selecionada para estimar tokens (default para OpenAI se nada selecionado ainda)
-                    llm_selecionada_para_token = LLM_CONFIGS.get(st.session_state.get(f"{KEY_LLM_CHOICE_PDF}_pdf", list(LLM_CONFIGS.keys())[0]), {}).get("token_estimator_model", "openai")
-                    st.session_state[KEY_NUM_TOKENS_PDF_EXTRAIDO] = contar_tokens_para_estimativa(st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM], llm_provider=llm_selecionada_para_token)
+            # Determina qual LLM está selecionada para estimar tokens (default para OpenAI se nada selecionado ainda)
+            llm_selecionada_para_token = LLM_CONFIGS.get(st.session_state.get(f"{KEY_LLM_CHOICE_PDF}_pdf", list(LLM_CONFIGS.keys())[0]), {}).get("token_estimator_model", "openai")
+            # Reenvios e cópias renomeadas do mesmo arquivo (em qualquer sessão) reaproveitam a leitura anterior
+            chave_leitura_pdf = (st.session_state[KEY_HASH_PDF], llm_selecionada_para_token)
+            leitura_pdf = cache_leituras_pdf.obter(chave_leitura_pdf)
+            if leitura_pdf is None:
+                leitura_pdf = ler_pdf_para_contagem(st.session_state[KEY_CAMINHO_PDF], llm_selecionada_para_token)
+                if leitura_pdf is not None:
+                    cache_leituras_pdf.guardar(chave_leitura_pdf, leitura_pdf)
+            if leitura_pdf is not None: # Se a extração falhou, o erro já foi exibido
+                st.session_state[KEY_PDF_TEM_TEXTO] = leitura_pdf["tem_texto"]
+                st.session_state[KEY_PREVIA_TEXTO_PDF] = leitura_pdf["previa"]
+                st.session_state[KEY_TEMPOS_EXTRACAO_PDF] = {"resumo": resumo_extracao(leitura_pdf),
+                                                             "tempos_ms": [tempo * 1000 for tempo in leitura_pdf["tempos_s"]]}
+                if leitura_pdf["tem_texto"]:
+                    st.session_state[KEY_NUM_TOKENS_PDF_EXTRAIDO] = leitura_pdf["num_tokens"]
                 else:
-                    if st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM] is not None: # Evita warning se extração falhou e já deu erro
-                        st.warning("O PDF carregado parece não conter texto útil para contagem de tokens.")
+                    st.warning("O PDF carregado parece não conter texto útil para contagem de tokens.")
+                if leitura_pdf["paginas_sem_texto"]:
+                    paginas_sem_texto = ", ".join(str(numero + 1) for numero in leitura_pdf["paginas_sem_texto"][:20])
+                    st.warning(f"Página(s) sem texto, provavelmente digitalizada(s): {paginas_sem_texto}"
+                               f"{'...' if len(leitura_pdf['paginas_sem_texto']) > 20 else ''}. "
+                               + ("O OCR não conseguiu ler essas páginas." if tesseract_disponivel() else
+                                  "Instale o Tesseract com o idioma português (tesseract-ocr-por) para lê-las por OCR."))
             arquivo_pdf_carregado.seek(0) # Reseta para releitura
 
         # Exibe a contagem de tokens se disponível
@@ -1187,41 +1177,75 @@ with tab_pdf:
             with col_info2:
                 st.markdown(f"<strong>Tokens Estimados ({token_provider_display}):</strong>", unsafe_allow_html=True)
                 st.markdown(f"<p style='font-size: 1em; font-weight: normal; margin-top: -10px;'>{st.session_state.get(KEY_NUM_TOKENS_PDF_EXTRAIDO, 0)}</p>", unsafe_allow_html=True)
+        tempos_extracao = st.session_state.get(KEY_TEMPOS_EXTRACAO_PDF)
+        if tempos_extracao:
+            st.caption(f"Extração: {tempos_extracao['resumo']}")
+            if len(tempos_extracao["tempos_ms"]) > 1:
+                with st.expander("⏱️ Ver tempo de extração por página", expanded=False):
+                    st.bar_chart(pd.DataFrame({"Tempo (ms)": tempos_extracao["tempos_ms"]},
+                                              index=pd.RangeIndex(1, len(tempos_extracao["tempos_ms"]) + 1, name="Página")))
         st.divider()
 
         st.subheader("Passo 2: Anonimize o conteúdo do PDF")
         if st.button("🔍 Anonimizar PDF Carregado", key=KEY_BOTAO_ANONIMIZAR_PDF, type="primary", 
-                      disabled=(not analyzer_engine or not anonymizer_engine or not st.session_state.get(KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM,"").strip())):
+                      disabled=(not analyzer_engine or not anonymizer_engine or not st.session_state.get(KEY_PDF_TEM_TEXTO))):
             if analyzer_engine and anonymizer_engine:
-                texto_para_anonimizar = st.session_state.get(KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM)
-                # Tenta re-extrair se o texto não estiver no estado da sessão (ex: após refresh ou erro)
-                if not texto_para_anonimizar or not texto_para_anonimizar.strip():
-                    if arquivo_pdf_carregado: # Checa se o uploader ainda tem o arquivo
-                        arquivo_pdf_carregado.seek(0) 
-                        bytes_pdf = arquivo_pdf_carregado.getvalue()
-                        texto_para_anonimizar = extrair_texto_de_pdf(io.BytesIO(bytes_pdf))
-                        st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM] = texto_para_anonimizar if texto_para_anonimizar else ""
-                    else:
-                        st.warning("Por favor, carregue um arquivo PDF novamente.")
-                        st.stop() # Interrompe a execução se não há arquivo para processar
-                
-                st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY] = st.session_state[KEY_TEXTO_EXTRAIDO_PDF_CONTAGEM]
+                nome_arquivo_pdf = st.session_state.get('nome_arquivo_carregado'+VERSION_SUFFIX)
+                st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY] = st.session_state[KEY_PREVIA_TEXTO_PDF]
                 st.session_state[KEY_LLM_OUTPUT_PDF_STATE] = None # Limpa resumo anterior
 
-                if texto_para_anonimizar and texto_para_anonimizar.strip():
-                    with st.spinner(f"Anonimizando '{st.session_state.get('nome_arquivo_carregado'+VERSION_SUFFIX)}'..."):
-                        entidades_para_analise = list(operadores.keys()) + ["SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA", "ID_DOCUMENTO", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"]
-                        entidades_para_analise = list(set(entidades_para_analise)); 
-                        if "DEFAULT" in entidades_para_analise: entidades_para_analise.remove("DEFAULT")
-                        resultados_analise_pdf = analyzer_engine.analyze(text=texto_para_anonimizar, language='pt', entities=entidades_para_analise, return_decision_process=False)
-                        resultado_anonimizado_pdf_obj = anonymizer_engine.anonymize(text=texto_para_anonimizar, analyzer_results=resultados_analise_pdf, operators=operadores)
-                        st.session_state['texto_anonimizado_arquivo'+VERSION_SUFFIX] = resultado_anonimizado_pdf_obj.text
-                        st.success(f"Arquivo '{st.session_state.get('nome_arquivo_carregado'+VERSION_SUFFIX)}' anonimizado com sucesso!")
-                elif texto_para_anonimizar is not None: 
-                    st.warning("O PDF carregado parece não conter texto útil para anonimização.")
+                entidades_para_analise = list(operadores.keys()) + ["SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA", "ID_DOCUMENTO", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"]
+                entidades_para_analise = list(set(entidades_para_analise)); 
+                if "DEFAULT" in entidades_para_analise: entidades_para_analise.remove("DEFAULT")
+                impressao_pdf = carregar_impressao_configuracao(analyzer_engine, MODELO_SPACY_PADRAO, tuple(sorted(entidades_para_analise)))
+                conflitos_pdf = {"removidos": 0, "unidos": 0, "recortados": 0} # Somados nos lotes analisados (ver pos_analise.resolver_conflitos)
+
+                def anonimizar_lote_pdf(texto_lote):
+                    # Com o perfilamento ativo a análise sempre roda, para que o tempo medido seja real
+                    resultado_cache_pdf = None if PERFILAMENTO_ATIVO else cache_resultados.obter(texto_lote, impressao_pdf)
+                    if resultado_cache_pdf:
+                        return resultado_cache_pdf
+                    if PERFILAMENTO_ATIVO:
+                        resultados_analise_pdf, perfil_pdf = analisar_com_perfil(analyzer_engine, analisar=analisar_em_blocos, text=texto_lote, language='pt', entities=entidades_para_analise, return_decision_process=False)
+                        registrar_perfil_json(perfil_pdf, aba="pdf", arquivo=nome_arquivo_pdf, caracteres=len(texto_lote))
+                    elif analisador_paralelo:
+                        resultados_analise_pdf = analisador_paralelo.analisar(text=texto_lote, language='pt', entities=entidades_para_analise, return_decision_process=False)
+                    else:
+                        resultados_analise_pdf = analisar_em_blocos(analyzer_engine, text=texto_lote, language='pt', entities=entidades_para_analise, return_decision_process=False)
+                    resultados_analise_pdf = filtrar_termos_comuns(texto_lote, resultados_analise_pdf, termos_comuns_a_manter)
+                    resultados_analise_pdf, conflitos_lote = resolver_conflitos(texto_lote, resultados_analise_pdf)
+                    for chave, quantidade in conflitos_lote.items(): conflitos_pdf[chave] += quantidade
+                    texto_anonimizado_lote = anonimizar_texto(anonymizer_engine, texto_lote, resultados_analise_pdf, operadores)
+                    cache_resultados.guardar(texto_lote, impressao_pdf, texto_anonimizado_lote, resultados_analise_pdf)
+                    return texto_anonimizado_lote, resultados_analise_pdf
+
+                # Extração → análise → anonimização por lote de páginas (ver fluxo_pdf.py), com progresso real
+                saida_anonimizada = io.StringIO()
+                redacoes_pdf = [] # Só os intervalos detectados, em colunas por lote (ver redacao_pdf.TabelaRedacoes), para gerar o PDF com tarjas sob demanda
+                caracteres_reaproveitados_pdf = 0 # Cabeçalhos/rodapés repetidos analisados uma só vez (ver repeticoes_pdf.py)
+                st.session_state[KEY_PDF_REDIGIDO] = None
+                barra_progresso_pdf = st.progress(0.0, text=f"Anonimizando '{nome_arquivo_pdf}'...")
+                # No modo paralelo, lotes maiores (um lote padrão por processo) para que cada lote ocupe todo o pool
+                paginas_por_lote_pdf = PAGINAS_POR_LOTE_PADRAO * (analisador_paralelo.num_trabalhadores if analisador_paralelo and not PERFILAMENTO_ATIVO else 1)
+                try:
+                    for etapa in anonimizar_pdf_em_fluxo(st.session_state[KEY_CAMINHO_PDF], anonimizar_lote_pdf, saida_anonimizada, paginas_por_lote=paginas_por_lote_pdf):
+                        redacoes_pdf.append(distribuir_resultados_por_pagina(etapa["paginas"], etapa["resultados"], operadores, etapa["pagina_inicial"]))
+                        caracteres_reaproveitados_pdf = etapa["caracteres_reaproveitados"]
+                        barra_progresso_pdf.progress(etapa["paginas_processadas"] / etapa["total_paginas"],
+                                                     text=f"Anonimizando '{nome_arquivo_pdf}': página {etapa['paginas_processadas']} de {etapa['total_paginas']}")
+                    st.session_state['texto_anonimizado_arquivo'+VERSION_SUFFIX] = saida_anonimizada.getvalue()
+                    st.session_state[KEY_REDACOES_PDF] = TabelaRedacoes.concatenar(redacoes_pdf)
+                    st.success(f"Arquivo '{nome_arquivo_pdf}' anonimizado com sucesso!")
+                    if caracteres_reaproveitados_pdf:
+                        st.caption(f"{caracteres_reaproveitados_pdf:,} caracteres de cabeçalhos e rodapés repetidos reaproveitados sem nova análise.".replace(",", "."))
+                    if any(conflitos_pdf.values()):
+                        st.caption(resumo_conflitos(conflitos_pdf))
+                except Exception as e:
+                    st.error(f"Ocorreu um erro durante a anonimização do PDF: {e}")
                     st.session_state['texto_anonimizado_arquivo'+VERSION_SUFFIX] = None
-                else: # Falha na extração
-                    st.session_state['texto_anonimizado_arquivo'+VERSION_SUFFIX] = None 
+                    st.session_state[KEY_REDACOES_PDF] = None
+                finally:
+                    barra_progresso_pdf.empty()
             else: 
                 st.error("Motores de anonimização não estão prontos.")
         
@@ -1229,6 +1253,8 @@ with tab_pdf:
         if st.session_state.get(KEY_TEXTO_ORIGINAL_PDF_DISPLAY, "").strip():
             with st.expander("📄 Ver Texto Extraído do PDF (Original)", expanded=False):
                 st.text_area("Texto Original:", value=st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY], height=200, disabled=True)
+                if len(st.session_state[KEY_TEXTO_ORIGINAL_PDF_DISPLAY]) >= LIMITE_PREVIA_TEXTO_PDF:
+                    st.caption(f"Exibindo os primeiros {LIMITE_PREVIA_TEXTO_PDF:,} caracteres.".replace(",", "."))
 
     # Exibir resultados da anonimização do PDF e opção de LLM
     texto_anonimizado_pdf_atual = st.session_state.get('texto_anonimizado_arquivo'+VERSION_SUFFIX)
@@ -1237,7 +1263,7 @@ with tab_pdf:
         st.subheader("Resultado da Anonimização (Camada 1)")
         st.text_area("Texto Anonimizado (com tags):", value=texto_anonimizado_pdf_atual, height=300, disabled=True) # key removida
         
-        col_dl_docx, col_copy_text_file = st.columns([1,1]) 
+        col_dl_docx, col_dl_pdf, col_copy_text_file = st.columns([1,1,1]) 
         with col_dl_docx:
             try:
                 docx_bytes = criar_docx_bytes(texto_anonimizado_pdf_atual)
@@ -1246,6 +1272,20 @@ with tab_pdf:
                                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document", type="secondary")
             except Exception as e: 
                 st.error(f"Erro ao gerar DOCX: {e}")
+        with col_dl_pdf:
+            if st.session_state.get(KEY_PDF_REDIGIDO):
+                st.download_button(label="📥 Baixar PDF anonimizado", data=st.session_state[KEY_PDF_REDIGIDO],
+                                   file_name=f"anonimizado_{st.session_state.get('nome_arquivo_carregado'+VERSION_SUFFIX, 'arquivo.pdf')}",
+                                   mime="application/pdf", type="secondary")
+            elif st.session_state.get(KEY_REDACOES_PDF) is not None and arquivo_pdf_carregado is not None:
+                if st.button("🖍️ Gerar PDF anonimizado", key=KEY_BOTAO_GERAR_PDF,
+                             help="Aplica tarjas com os rótulos (<NOME>, <CPF>...) no próprio PDF, preservando o layout."):
+                    try:
+                        with st.spinner("Aplicando as tarjas no PDF..."):
+                            st.session_state[KEY_PDF_REDIGIDO] = criar_pdf_redigido_bytes(st.session_state[KEY_CAMINHO_PDF], st.session_state[KEY_REDACOES_PDF])
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erro ao gerar o PDF anonimizado: {e}")
         with col_copy_text_file:
             st_copy_to_clipboard(texto_anonimizado_pdf_atual, "📋 Copiar Texto Anonimizado", key=KEY_COPY_BTN_FILE_ANON)
         
@@ -1279,55 +1319,97 @@ with tab_texto:
     
     st.divider()
     st.subheader("Passo 2: Anonimize o texto da área")
+    # Com mais de um modelo spaCy instalado, o texto colado pode usar um modelo menor (mais rápido)
+    analyzer_engine_area = analyzer_engine
+    modelo_area = MODELO_SPACY_PADRAO
+    niveis_instalados = niveis_modelo_instalados()
+    if len(niveis_instalados) > 1:
+        nivel_padrao = next((nivel for nivel in niveis_instalados if resolver_modelo_spacy(nivel) == MODELO_SPACY_PADRAO), niveis_instalados[-1])
+        nivel_area = st.selectbox("Modelo de linguagem (spaCy):", niveis_instalados, index=niveis_instalados.index(nivel_padrao),
+                                  key=KEY_NIVEL_MODELO_AREA,
+                                  help="Modelos menores (sm/md) respondem mais rápido; os reconhecedores de padrões (CPF, OAB, CEP, sobrenomes...) são os mesmos em todos.")
+        if resolver_modelo_spacy(nivel_area) != MODELO_SPACY_PADRAO:
+            modelo_area = resolver_modelo_spacy(nivel_area)
+            analyzer_engine_area = carregar_analyzer_engine(
+                LISTA_ESTADOS_CAPITAIS_BR,
+                TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR,
+                LISTA_SOBRENOMES_FREQUENTES_BR,
+                LISTA_ESTADO_CIVIL,
+                LISTA_ORGANIZACOES_CONHECIDAS,
+                resolver_modelo_spacy(nivel_area)
+            )
     if st.button("🔍 Anonimizar Texto da Área", type="primary", key=KEY_BOTAO_ANONIMIZAR_AREA, 
-                  disabled=(not analyzer_engine or not anonymizer_engine)):
+                  disabled=(not analyzer_engine_area or not anonymizer_engine)):
         texto_para_processar = st.session_state.get(KEY_TEXTO_ORIGINAL_AREA, "")
         st.session_state[KEY_LLM_OUTPUT_AREA_STATE] = None # Limpa resumo anterior
         
         if not texto_para_processar.strip():
             st.warning("Por favor, insira um texto na área para anonimizar.")
-        elif analyzer_engine and anonymizer_engine:
+        elif analyzer_engine_area and anonymizer_engine:
             try:
                 with st.spinner("Analisando e anonimizando o texto da área..."):
                     entidades_para_analise = list(operadores.keys()) + ["SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"]
                     entidades_para_analise = list(set(entidades_para_analise))
                     if "DEFAULT" in entidades_para_analise: entidades_para_analise.remove("DEFAULT")
                     
-                    resultados_analise = analyzer_engine.analyze(text=texto_para_processar, language='pt', entities=entidades_para_analise, return_decision_process=False)
-                    resultado_anonimizado_obj = anonymizer_engine.anonymize(text=texto_para_processar, analyzer_results=resultados_analise, operators=operadores)
+                    perfil_area = None
+                    conflitos_area = None
+                    incremental_area = None
+                    impressao_area = carregar_impressao_configuracao(analyzer_engine_area, modelo_area, tuple(sorted(entidades_para_analise)))
+                    resultado_cache_area = None if PERFILAMENTO_ATIVO else cache_resultados.obter(texto_para_processar, impressao_area)
+                    if resultado_cache_area:
+                        texto_anonimizado_area, resultados_analise = resultado_cache_area
+                    else:
+                        if PERFILAMENTO_ATIVO:
+                            resultados_analise, perfil_area = analisar_com_perfil(analyzer_engine_area, analisar=analisar_em_blocos, text=texto_para_processar, language='pt', entities=entidades_para_analise, return_decision_process=False)
+                        elif ANALISE_INCREMENTAL_PADRAO:
+                            # Só os parágrafos novos ou alterados vão ao analyzer (ver analise_incremental.py)
+                            resultados_analise, incremental_area = analisador_incremental.analisar(
+                                texto_para_processar, impressao_area,
+                                lambda trecho: analisar_em_blocos(analyzer_engine_area, text=trecho, language='pt', entities=entidades_para_analise, return_decision_process=False))
+                        else:
+                            resultados_analise = analisar_em_blocos(analyzer_engine_area, text=texto_para_processar, language='pt', entities=entidades_para_analise, return_decision_process=False)
+                        resultados_analise = filtrar_termos_comuns(texto_para_processar, resultados_analise, termos_comuns_a_manter)
+                        resultados_analise, conflitos_area = resolver_conflitos(texto_para_processar, resultados_analise)
+                        texto_anonimizado_area = anonimizar_texto(anonymizer_engine, texto_para_processar, resultados_analise, operadores)
+                        cache_resultados.guardar(texto_para_processar, impressao_area, texto_anonimizado_area, resultados_analise)
                 
-                st.session_state[KEY_TEXTO_ANONIMIZADO_OUTPUT_AREA_STATE] = resultado_anonimizado_obj.text
+                st.session_state[KEY_TEXTO_ANONIMIZADO_OUTPUT_AREA_STATE] = texto_anonimizado_area
                 
-                dados_resultados = []
-                if resultados_analise:
-                    for res in sorted(resultados_analise, key=lambda x: x.start):
-                        dados_resultados.append({
-                            "Entidade": res.entity_type, 
-                            "Texto Detectado": texto_para_processar[res.start:res.end], 
-                            "Início": res.start, 
-                            "Fim": res.end, 
-                            "Score": f"{res.score:.2f}"
-                        })
-                st.session_state['resultados_df_area'+VERSION_SUFFIX] = pd.DataFrame(dados_resultados)
+                # Intervalos em colunas (ver tabela_intervalos.py): o DataFrame não copia objeto por objeto e o score fica numérico
+                tabela_area = TabelaIntervalos.de_resultados(resultados_analise).ordenar()
+                st.session_state['resultados_df_area'+VERSION_SUFFIX] = tabela_area.para_pandas(texto_para_processar)
+                st.session_state['perfil_df_area'+VERSION_SUFFIX] = pd.DataFrame(perfil_area.como_linhas()) if perfil_area else pd.DataFrame()
                 
-                if dados_resultados: 
+                if len(tabela_area): 
                     st.success("Texto da área anonimizado e entidades detectadas!")
+                    if conflitos_area and any(conflitos_area.values()):
+                        st.caption(resumo_conflitos(conflitos_area))
+                    if incremental_area and incremental_area["reanalisados"] < incremental_area["paragrafos"]:
+                        st.caption(f"{incremental_area['reanalisados']} de {incremental_area['paragrafos']} parágrafos reanalisados; os demais vieram do cache.")
                 else: 
                     st.info("Nenhuma PII detectada no texto da área.")
             except Exception as e:
                 st.error(f"Ocorreu um erro durante a anonimização da área de texto: {e}")
                 st.session_state[KEY_TEXTO_ANONIMIZADO_OUTPUT_AREA_STATE] = "Erro ao processar o texto da área."
                 st.session_state['resultados_df_area'+VERSION_SUFFIX] = pd.DataFrame()
+                st.session_state['perfil_df_area'+VERSION_SUFFIX] = pd.DataFrame()
         else: 
             st.error("Motores de anonimização não estão prontos.")
 
     # Exibir tabela de entidades detectadas
     # Usando .get() para segurança, e a chave correta para o dataframe
     df_resultados_atual = st.session_state.get('resultados_df_area'+VERSION_SUFFIX, pd.DataFrame())
-    if not df_resultados_atual.empty:
+    df_perfil_atual = st.session_state.get('perfil_df_area'+VERSION_SUFFIX, pd.DataFrame())
+    if not df_resultados_atual.empty or not df_perfil_atual.empty:
         with st.expander("📊 Ver Entidades Detectadas (do Texto da Área Original)", expanded=False):
-            st.markdown("As seguintes entidades foram detectadas no texto original da área:")
-            st.dataframe(df_resultados_atual, use_container_width=True) 
+            if not df_resultados_atual.empty:
+                st.markdown("As seguintes entidades foram detectadas no texto original da área:")
+                st.dataframe(df_resultados_atual, use_container_width=True,
+                             column_config={"Score": st.column_config.NumberColumn(format="%.2f")})
+            if not df_perfil_atual.empty:
+                st.markdown("**Perfil da análise** (tempo, candidatos e resultados finais por reconhecedor):")
+                st.dataframe(df_perfil_atual, use_container_width=True, hide_index=True)
 
     # Chamar a função genérica para exibir a seção LLM para a aba de texto
     texto_anonimizado_area_atual = st.session_state.get(KEY_TEXTO_ANONIMIZADO_OUTPUT_AREA_STATE)
@@ -1355,6 +1437,17 @@ Desenvolvido por:
 Juiz Federal Rodrigo Gonçalves de Souza
 """
 st.sidebar.markdown(sidebar_text_sobre)
+for info_modelo in informacoes_modelos_carregados():
+    memoria_modelo = f", +{info_modelo['memoria_modelo_mb']:.0f} MB" if info_modelo['memoria_modelo_mb'] is not None else ""
+    st.sidebar.caption(f"Modelo spaCy {info_modelo['modelo']} ({info_modelo['perfil']}): "
+                       f"carregado em {info_modelo['tempo_carga_s']:.1f} s{memoria_modelo}")
+estatisticas_resultados = cache_resultados.estatisticas()
+st.sidebar.caption(f"Cache de resultados: {estatisticas_resultados['acertos_memoria'] + estatisticas_resultados['acertos_disco']} acertos "
+                   f"({estatisticas_resultados['acertos_disco']} do disco), {estatisticas_resultados['falhas']} falhas")
+if cache_artefatos_nlp is not None:
+    estatisticas_cache = cache_artefatos_nlp.estatisticas()
+    st.sidebar.caption(f"Cache de NLP: {estatisticas_cache['acertos']} acertos, {estatisticas_cache['falhas']} falhas, "
+                       f"{estatisticas_cache['itens']}/{estatisticas_cache['limite_itens']} textos")
 
 st.sidebar.divider()
 st.sidebar.markdown(
@@ -0,0 +1,97 @@
+# Nome do arquivo: benchmarks/benchmark_analise_incremental.py
+"""
+Latência da aba de texto (análise, filtro de termos comuns, resolução de
+conflitos e anonimização) depois de uma edição pequena: texto inteiro
+reanalisado x AnalisadorIncremental (analise_incremental.py), que só
+reanalisa os parágrafos alterados. Para o texto de cada PDF de exemplo e para
+esses textos repetidos --copias vezes, mede a primeira análise (cache vazio)
+e --edicoes edições de um caractere em parágrafos diferentes, e confere se o
+texto anonimizado é idêntico ao da análise completa do texto editado.
+
+Uso:
+    python benchmarks/benchmark_analise_incremental.py [--modelo pt_core_news_lg] [--copias 5] [--edicoes 5]
+"""
+
+import argparse
+import time
+
+from comum import (carregar_lista, entidades_para_analise, listas_reconhecedores, operadores_anonimizador,
+                   textos_pdfs_exemplo)
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from analise_incremental import AnalisadorIncremental, dividir_paragrafos
+from anonimizacao_rapida import anonimizar_texto
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns, resolver_conflitos
+
+
+def editar(texto, paragrafos, indice, numero):
+    """Troca um caractere no meio do parágrafo `indice` (como uma correção de digitação)."""
+    inicio, fim = paragrafos[indice]
+    posicao = (inicio + fim) // 2
+    # Letra diferente a cada edição: nas cópias repetidas, a edição não recria um parágrafo já guardado
+    letras = [letra for letra in "kwyzq" if letra != texto[posicao]]
+    return texto[:posicao] + letras[numero % len(letras)] + texto[posicao + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=5)
+    parser.add_argument("--edicoes", type=int, default=5, help="edições de um caractere por texto (vale a mediana)")
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    def analisar(trecho):
+        return analisar_em_blocos(analyzer, text=trecho, language="pt", entities=entidades)
+
+    def anonimizar(texto, resultados):
+        resultados = filtrar_termos_comuns(texto, resultados, termos_comuns)
+        resultados, _ = resolver_conflitos(texto, resultados)
+        return anonimizar_texto(anonymizer, texto, resultados, operadores)
+
+    textos = textos_pdfs_exemplo()
+    textos.append((f"todos os exemplos x{args.copias}", "\n\n".join(texto for _, texto in textos * args.copias)))
+    print(f"{'texto':<46} {'caracteres':>10} {'parágr.':>7} {'completa':>9} {'1ª incr.':>9} "
+          f"{'edição':>9} {'reanalisado':>11} {'ganho':>6}  saída")
+    for nome, texto in textos:
+        incremental = AnalisadorIncremental()
+        paragrafos = dividir_paragrafos(texto)
+        inicio = time.perf_counter()
+        anonimizar(texto, incremental.analisar(texto, "benchmark", analisar)[0])
+        tempo_primeira = time.perf_counter() - inicio
+
+        tempos_completos, tempos_incrementais, reanalisados, iguais = [], [], [], True
+        edicoes = min(args.edicoes, len(paragrafos))
+        for numero in range(edicoes):
+            texto = editar(texto, paragrafos, (numero * 2 + 1) * len(paragrafos) // (edicoes * 2), numero)
+            inicio = time.perf_counter()
+            esperado = anonimizar(texto, analisar(texto))
+            tempos_completos.append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            resultados, estatisticas = incremental.analisar(texto, "benchmark", analisar)
+            obtido = anonimizar(texto, resultados)
+            tempos_incrementais.append(time.perf_counter() - inicio)
+            reanalisados.append(estatisticas["caracteres_reanalisados"])
+            iguais = iguais and obtido == esperado
+        completa = sorted(tempos_completos)[edicoes // 2]
+        edicao = sorted(tempos_incrementais)[edicoes // 2]
+        print(f"{nome[:46]:<46} {len(texto):>10} {len(paragrafos):>7} {completa * 1000:>7.0f}ms "
+              f"{tempo_primeira * 1000:>7.0f}ms {edicao * 1000:>7.1f}ms {sorted(reanalisados)[edicoes // 2]:>11} "
+              f"{completa / edicao:>5.1f}x  {'idêntica' if iguais else 'DIFERENTE'}")
+
+
+if __name__ == "__main__":
+    main()
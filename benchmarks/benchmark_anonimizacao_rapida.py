@@ -0,0 +1,74 @@
+# Nome do arquivo: benchmarks/benchmark_anonimizacao_rapida.py
+"""
+Tempo da anonimização (após a análise) pelo AnonymizerEngine e pela
+anonimização direta de anonimizacao_rapida.py, para o texto de cada PDF de
+exemplo e para esses textos repetidos --copias vezes (milhares de resultados).
+Confere se o texto anonimizado e os offsets dos resultados (que o Presidio
+ajusta ao unir entidades) são idênticos nos dois caminhos, e indica quando o
+AnonymizerEngine foi usado como alternativa.
+
+Uso:
+    python benchmarks/benchmark_anonimizacao_rapida.py [--modelo pt_core_news_lg] [--copias 5] [--repeticoes 3]
+"""
+
+import argparse
+import copy
+
+from comum import (carregar_lista, cronometrar, entidades_para_analise, listas_reconhecedores,
+                   operadores_anonimizador, textos_pdfs_exemplo)
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from anonimizacao_rapida import anonimizar_rapido, operadores_suportados
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=5)
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções por caminho (vale a mais rápida)")
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    assert operadores_suportados(operadores)
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    textos = textos_pdfs_exemplo()
+    textos.append((f"todos os exemplos x{args.copias}", "".join(texto for _, texto in textos) * args.copias))
+    print(f"{'texto':<58} {'caracteres':>10} {'resultados':>10} {'Presidio':>9} {'direto':>9} {'ganho':>6}  saída")
+    for nome, texto in textos:
+        resultados = filtrar_termos_comuns(texto, analisar_em_blocos(analyzer, text=texto, language="pt", entities=entidades),
+                                           termos_comuns)
+        # Os dois caminhos ajustam os offsets dos resultados unidos: cada execução recebe uma cópia
+        copias_presidio = [copy.deepcopy(resultados) for _ in range(args.repeticoes)]
+        copias_diretas = [copy.deepcopy(resultados) for _ in range(args.repeticoes)]
+        tempo_presidio, esperado = cronometrar(
+            lambda: anonymizer.anonymize(text=texto, analyzer_results=copias_presidio.pop(), operators=operadores).text,
+            args.repeticoes)
+        tempo_direto, obtido = cronometrar(lambda: anonimizar_rapido(texto, copias_diretas.pop(), operadores),
+                                           args.repeticoes)
+        resultados_presidio, resultados_diretos = copy.deepcopy(resultados), copy.deepcopy(resultados)
+        anonymizer.anonymize(text=texto, analyzer_results=resultados_presidio, operators=operadores)
+        anonimizar_rapido(texto, resultados_diretos, operadores)
+        offsets_iguais = ([(r.start, r.end) for r in resultados_presidio] == [(r.start, r.end) for r in resultados_diretos])
+        if obtido is None:
+            situacao = "AnonymizerEngine (mesmo tipo sobreposto)"
+        else:
+            situacao = "idêntica" if obtido == esperado and offsets_iguais else "DIFERENTE"
+        print(f"{nome[:58]:<58} {len(texto):>10} {len(resultados):>10} {tempo_presidio * 1000:>7.1f}ms "
+              f"{tempo_direto * 1000:>7.1f}ms {tempo_presidio / tempo_direto:>5.1f}x  {situacao}")
+
+
+if __name__ == "__main__":
+    main()
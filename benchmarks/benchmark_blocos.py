@@ -0,0 +1,65 @@
+# Nome do arquivo: benchmarks/benchmark_blocos.py
+"""
+Compara a análise do documento inteiro com a análise em blocos
+(analise_blocos.analisar_em_blocos) nos PDFs de exemplo: resultados idênticos,
+tempo e pico de memória alocada (tracemalloc).
+
+Para que os PDFs de exemplo sejam de fato divididos, o tamanho de bloco padrão
+do script é pequeno (--tamanho-bloco 5000).
+
+Uso:
+    python benchmarks/benchmark_blocos.py [--modelo pt_core_news_lg] [--tamanho-bloco 5000] [--sobreposicao 1000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from comum import listas_reconhecedores, textos_pdfs_exemplo
+
+from presidio_analyzer import AnalyzerEngine
+
+from analise_blocos import analisar_em_blocos, dividir_em_blocos
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+
+
+def spans(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    retorno = funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / (1024 * 1024), retorno
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--tamanho-bloco", type=int, default=5000)
+    parser.add_argument("--sobreposicao", type=int, default=1000)
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo), supported_languages=["pt"], default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+
+    for nome, texto in textos_pdfs_exemplo():
+        blocos = dividir_em_blocos(texto, args.tamanho_bloco, args.sobreposicao) if len(texto) > args.tamanho_bloco else [(0, len(texto))]
+        tempo_inteiro, pico_inteiro, inteiro = medir(lambda: analyzer.analyze(text=texto, language="pt"))
+        tempo_blocos, pico_blocos, em_blocos = medir(lambda: analisar_em_blocos(
+            analyzer, text=texto, tamanho_bloco=args.tamanho_bloco, sobreposicao=args.sobreposicao, language="pt"))
+        diferencas = len(set(spans(inteiro)) ^ set(spans(em_blocos)))
+        print(f"{nome}: {len(texto)} caracteres, {len(blocos)} blocos")
+        print(f"  inteiro   {tempo_inteiro * 1000:8.1f} ms  pico {pico_inteiro:7.1f} MB  {len(inteiro)} resultados")
+        print(f"  em blocos {tempo_blocos * 1000:8.1f} ms  pico {pico_blocos:7.1f} MB  {len(em_blocos)} resultados"
+              f"  ({'idênticos' if not diferencas else f'{diferencas} diferenças'})")
+
+
+if __name__ == "__main__":
+    main()
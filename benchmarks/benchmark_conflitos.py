@@ -0,0 +1,91 @@
+# Nome do arquivo: benchmarks/benchmark_conflitos.py
+"""
+Resolução de conflitos entre os resultados da análise (pos_analise.resolver_conflitos)
+para o texto de cada PDF de exemplo e para esses textos repetidos --copias
+vezes: tempo da varredura, quantos intervalos foram removidos, unidos e
+recortados, tempo da anonimização (AnonymizerEngine) com e sem a etapa, e a
+comparação dos dois textos anonimizados: idêntica ou o número de trechos
+diferentes e de letras/dígitos que ficaram à mostra só com a etapa (o
+esperado é 0; diferenças só de pontuação vêm de recortes sem letra nem dígito,
+que a etapa descarta).
+
+Uso:
+    python benchmarks/benchmark_conflitos.py [--modelo pt_core_news_lg] [--copias 5]
+"""
+
+import argparse
+import copy
+import difflib
+import re
+import time
+
+from comum import (carregar_lista, entidades_para_analise, listas_reconhecedores, operadores_anonimizador,
+                   textos_pdfs_exemplo)
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns, resolver_conflitos
+
+# Marcadores dos operadores replace (<NOME>, <ENDERECO>...) não contam como texto à mostra
+_MARCADOR = re.compile(r"<[A-Z_]+>")
+
+
+def _alfanumericos(palavras):
+    return sum(caractere.isalnum() for palavra in palavras for caractere in _MARCADOR.sub("", palavra))
+
+
+def comparar(esperado, obtido):
+    """Trechos diferentes (por palavra) e letras/dígitos a mais em `obtido` nesses trechos."""
+    if obtido == esperado:
+        return "idêntica"
+    palavras_esperadas, palavras_obtidas = esperado.split(), obtido.split()
+    diferencas = [(i1, i2, j1, j2) for tag, i1, i2, j1, j2 in
+                  difflib.SequenceMatcher(None, palavras_esperadas, palavras_obtidas, autojunk=False).get_opcodes()
+                  if tag != "equal"]
+    expostos = sum(max(0, _alfanumericos(palavras_obtidas[j1:j2]) - _alfanumericos(palavras_esperadas[i1:i2]))
+                   for i1, i2, j1, j2 in diferencas)
+    return f"{len(diferencas)} trechos diferentes, {expostos} letras/dígitos à mostra"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    textos = textos_pdfs_exemplo()
+    textos.append((f"todos os exemplos x{args.copias}", "".join(texto for _, texto in textos) * args.copias))
+    print(f"{'texto':<50} {'resultados':>10} {'varredura':>10} {'removidos':>9} {'unidos':>6} {'recortados':>10} "
+          f"{'anonimização antes':>19} {'depois':>9}  saída")
+    for nome, texto in textos:
+        resultados = filtrar_termos_comuns(texto, analisar_em_blocos(analyzer, text=texto, language="pt", entities=entidades),
+                                           termos_comuns)
+        inicio = time.perf_counter()
+        resolvidos, contagem = resolver_conflitos(texto, resultados)
+        tempo_varredura = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        esperado = anonymizer.anonymize(text=texto, analyzer_results=copy.deepcopy(resultados), operators=operadores).text
+        tempo_antes = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        obtido = anonymizer.anonymize(text=texto, analyzer_results=resolvidos, operators=operadores).text
+        tempo_depois = time.perf_counter() - inicio
+        print(f"{nome[:50]:<50} {len(resultados):>10} {tempo_varredura * 1000:>8.1f}ms {contagem['removidos']:>9} "
+              f"{contagem['unidos']:>6} {contagem['recortados']:>10} {tempo_antes * 1000:>17.1f}ms {tempo_depois * 1000:>7.1f}ms  "
+              f"{comparar(esperado, obtido)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Nome do arquivo: benchmarks/benchmark_extracao.py
+"""
+Tempo de extração do texto de um PDF grande em função do número de processos
+(extracao_pdf.extrair_paginas_pdf), comparado ao laço sequencial original
+(texto_completo += pagina.get_text()). O PDF é montado com as páginas dos
+PDFs de exemplo repetidas --copias vezes.
+
+Uso:
+    python benchmarks/benchmark_extracao.py [--copias 50] [--max-trabalhadores N]
+"""
+
+import argparse
+import os
+import time
+
+from comum import caminhos_pdfs_exemplo
+
+import fitz  # PyMuPDF
+
+from extracao_pdf import extrair_paginas_pdf, resumo_extracao
+
+
+def extrair_sequencial_original(dados_pdf):
+    texto_completo = ""
+    documento_pdf = fitz.open(stream=dados_pdf, filetype="pdf")
+    for pagina in documento_pdf: texto_completo += pagina.get_text()
+    documento_pdf.close()
+    return texto_completo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copias", type=int, default=50)
+    parser.add_argument("--max-trabalhadores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with fitz.open() as documento_grande:
+        for caminho in caminhos_pdfs_exemplo():
+            with fitz.open(caminho) as documento_pdf:
+                for _ in range(args.copias):
+                    documento_grande.insert_pdf(documento_pdf)
+        num_paginas = documento_grande.page_count
+        dados_pdf = documento_grande.tobytes()
+    print(f"PDF: {num_paginas} páginas, {len(dados_pdf) / 1e6:.1f} MB, {os.cpu_count()} núcleos\n")
+
+    inicio = time.perf_counter()
+    referencia = extrair_sequencial_original(dados_pdf)
+    tempo_original = time.perf_counter() - inicio
+    print(f"{'original (+=)':<16} {tempo_original:7.2f} s")
+
+    num_trabalhadores = 1
+    while num_trabalhadores <= args.max_trabalhadores:
+        extracao = extrair_paginas_pdf(dados_pdf, num_trabalhadores=num_trabalhadores, paginas_minimas_paralelo=0)
+        identicos = "".join(extracao["paginas"]) == referencia
+        print(f"{num_trabalhadores:>2} processo(s)    {extracao['tempo_total_s']:7.2f} s  "
+              f"aceleração {tempo_original / extracao['tempo_total_s']:4.1f}x  "
+              f"{'idênticos' if identicos else 'DIFERENTES'}")
+        print(f"    {resumo_extracao(extracao)}")
+        num_trabalhadores *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Nome do arquivo: benchmarks/benchmark_fluxo_pdf.py
+"""
+Pico de memória (tracemalloc) e tempo da anonimização de um PDF grande em
+fluxo, por lote de páginas (fluxo_pdf.anonimizar_pdf_em_fluxo), comparados ao
+fluxo anterior: extrair o documento inteiro e anonimizá-lo de uma vez. O PDF é
+montado com as páginas dos PDFs de exemplo repetidas --copias vezes. Informa
+também quantas linhas do texto anonimizado diferem entre os dois modos.
+
+Uso:
+    python benchmarks/benchmark_fluxo_pdf.py [--modelo pt_core_news_lg] [--copias 10] [--paginas-por-lote 5 10 50]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from comum import (caminhos_pdfs_exemplo, carregar_lista, entidades_para_analise, listas_reconhecedores,
+                   operadores_anonimizador)
+
+import fitz  # PyMuPDF
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+
+
+def medir(funcao):
+    """Executa `funcao` retornando (retorno, tempo em s, pico de memória em MB)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    retorno = funcao()
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retorno, tempo, pico / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=10)
+    parser.add_argument("--paginas-por-lote", type=int, nargs="+", default=[5, 10, 50])
+    args = parser.parse_args()
+
+    with fitz.open() as documento_grande:
+        for caminho in caminhos_pdfs_exemplo():
+            with fitz.open(caminho) as documento_pdf:
+                for _ in range(args.copias):
+                    documento_grande.insert_pdf(documento_pdf)
+        num_paginas = documento_grande.page_count
+        dados_pdf = documento_grande.tobytes()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    def anonimizar(texto):
+        resultados = analisar_em_blocos(analyzer, text=texto, language="pt", entities=entidades)
+        resultados = filtrar_termos_comuns(texto, resultados, termos_comuns)
+        return anonymizer.anonymize(text=texto, analyzer_results=resultados, operators=operadores).text, resultados
+
+    anonimizar("aquecimento do modelo")
+    print(f"PDF: {num_paginas} páginas, {len(dados_pdf) / 1e6:.1f} MB, modelo {args.modelo}\n")
+
+    def documento_inteiro():
+        with fitz.open(stream=dados_pdf, filetype="pdf") as documento_pdf:
+            texto = "".join(pagina.get_text() for pagina in documento_pdf)
+        return anonimizar(texto)[0]
+
+    referencia, tempo, pico = medir(documento_inteiro)
+    print(f"{'documento inteiro':<22} {tempo:7.2f} s  pico {pico:8.1f} MB")
+
+    for paginas_por_lote in args.paginas_por_lote:
+        def em_fluxo():
+            saida = io.StringIO()
+            for _ in anonimizar_pdf_em_fluxo(dados_pdf, anonimizar, saida, paginas_por_lote, num_trabalhadores=1):
+                pass
+            return saida.getvalue()
+
+        texto, tempo, pico = medir(em_fluxo)
+        linhas, linhas_referencia = texto.splitlines(), referencia.splitlines()
+        diferencas = sum(a != b for a, b in zip(linhas, linhas_referencia)) + abs(len(linhas) - len(linhas_referencia))
+        print(f"fluxo, {paginas_por_lote:>3} pág./lote    {tempo:7.2f} s  pico {pico:8.1f} MB  "
+              f"{'idêntico' if texto == referencia else f'{diferencas} de {len(linhas_referencia)} linhas diferentes'}")
+
+
+if __name__ == "__main__":
+    main()
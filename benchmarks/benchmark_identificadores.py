@@ -0,0 +1,55 @@
+# Nome do arquivo: benchmarks/benchmark_identificadores.py
+"""
+Compara os oito reconhecedores numéricos antigos (CPF, OAB, CEP, CNH, SIAPE,
+CI, CIN e ID_DOCUMENTO, cada um com seus próprios padrões) com o
+ReconhecedorIdentificadoresNumericos (passada única) nos PDFs de exemplo.
+
+Uso:
+    python benchmarks/benchmark_identificadores.py
+"""
+
+from comum import cronometrar, textos_pdfs_exemplo
+
+from presidio_analyzer import EntityRecognizer, PatternRecognizer
+from presidio_analyzer.pattern import Pattern
+
+from reconhecedores import FORMATOS_IDENTIFICADORES_NUMERICOS, ReconhecedorIdentificadoresNumericos
+
+
+def reconhecedores_antigos():
+    """Reproduz um PatternRecognizer por entidade, como em carregar_analyzer_engine."""
+    padroes_por_entidade = {}
+    for nome, entidade, regex, score, _, _ in FORMATOS_IDENTIFICADORES_NUMERICOS:
+        padroes_por_entidade.setdefault(entidade, []).append(Pattern(name=nome, regex=regex, score=score))
+    return [PatternRecognizer(supported_entity=entidade, patterns=padroes, supported_language="pt")
+            for entidade, padroes in padroes_por_entidade.items()]
+
+
+def spans(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+def main():
+    antigos = reconhecedores_antigos()
+    novo = ReconhecedorIdentificadoresNumericos()
+    entidades = novo.supported_entities
+
+    def analisar_antigos(texto):
+        resultados = []
+        for reconhecedor in antigos:
+            resultados.extend(reconhecedor.analyze(texto, entidades))
+        return resultados
+
+    for nome, texto in textos_pdfs_exemplo():
+        for fator in (1, 10):
+            texto_teste = texto * fator
+            t_antigo, r_antigo = cronometrar(lambda: analisar_antigos(texto_teste), repeticoes=3)
+            t_novo, r_novo = cronometrar(lambda: novo.analyze(texto_teste, entidades), repeticoes=3)
+            iguais = spans(EntityRecognizer.remove_duplicates(r_antigo)) == spans(EntityRecognizer.remove_duplicates(r_novo))
+            print(f"{nome} x{fator} ({len(texto_teste):,} caracteres): "
+                  f"antigo {t_antigo * 1000:.1f} ms | novo {t_novo * 1000:.1f} ms | "
+                  f"ganho {t_antigo / t_novo:.1f}x | resultados idênticos: {iguais} ({len(r_novo)} ocorrências)")
+
+
+if __name__ == "__main__":
+    main()
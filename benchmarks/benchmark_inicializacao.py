@@ -0,0 +1,127 @@
+# Nome do arquivo: benchmarks/benchmark_inicializacao.py
+"""
+Mede o tempo até a primeira análise (cold start) em três cenários, cada um em um
+processo Python novo:
+
+  original    reconhecedores como na versão anterior (um Pattern por sobrenome,
+              um PatternRecognizer por identificador numérico, deny-lists)
+  sem_pacote  reconhecedores atuais, montados a partir das listas
+  com_pacote  reconhecedores atuais, carregados do pacote pré-compilado em disco
+
+Sem --modelo, a "primeira análise" roda só os reconhecedores customizados no
+primeiro PDF de exemplo. Com --modelo (ex.: pt_core_news_lg), monta o
+AnalyzerEngine completo; nesse caso o carregamento do spaCy domina o tempo.
+
+Uso:
+    python benchmarks/benchmark_inicializacao.py [--modelo pt_core_news_lg] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODOS = ("original", "sem_pacote", "com_pacote")
+
+
+def montar_reconhecedores(modo, dir_cache):
+    from comum import listas_reconhecedores
+
+    listas = listas_reconhecedores()
+    if modo == "original":
+        from presidio_analyzer import PatternRecognizer
+        from benchmark_identificadores import reconhecedores_antigos
+        from benchmark_sobrenomes import reconhecedor_antigo
+
+        termos_safe_location, termos_legal_header, lista_sobrenomes, termos_estado_civil, termos_organizacoes = listas
+        lista = [
+            PatternRecognizer(supported_entity="SAFE_LOCATION", deny_list=termos_safe_location, supported_language="pt", deny_list_score=0.99),
+            PatternRecognizer(supported_entity="LEGAL_HEADER", deny_list=termos_legal_header, supported_language="pt", deny_list_score=0.99),
+            PatternRecognizer(supported_entity="ESTADO_CIVIL", deny_list=termos_estado_civil, supported_language="pt", deny_list_score=0.99),
+            PatternRecognizer(supported_entity="ORGANIZACAO_CONHECIDA", deny_list=termos_organizacoes, supported_language="pt", deny_list_score=0.99),
+            reconhecedor_antigo(lista_sobrenomes),
+        ]
+        return lista + reconhecedores_antigos()
+
+    from pacote_reconhecedores import carregar_pacote_reconhecedores, construir_reconhecedores
+
+    if modo == "sem_pacote":
+        return construir_reconhecedores(*listas)
+    return carregar_pacote_reconhecedores(*listas, dir_cache=dir_cache)["reconhecedores"]
+
+
+def executar_modo(modo, modelo, dir_cache):
+    """Executado no processo filho: imprime um JSON com os tempos medidos."""
+    inicio = time.perf_counter()
+    import presidio_analyzer  # noqa: F401 (importação contada só no total, não na montagem)
+    from comum import textos_pdfs_exemplo
+
+    _, texto = textos_pdfs_exemplo()[0]
+    inicio_montagem = time.perf_counter()
+    lista_reconhecedores = montar_reconhecedores(modo, dir_cache)
+
+    analyzer = None
+    if modelo:
+        from presidio_analyzer import AnalyzerEngine
+        from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+        analyzer = AnalyzerEngine(nlp_engine=SpacyNlpEngine(models=[{"lang_code": "pt", "model_name": modelo}]),
+                                  supported_languages=["pt"], default_score_threshold=0.4)
+        for reconhecedor in lista_reconhecedores:
+            analyzer.registry.add_recognizer(reconhecedor)
+    fim_montagem = time.perf_counter()
+
+    if analyzer:
+        analyzer.analyze(text=texto, language="pt")
+    else:
+        for reconhecedor in lista_reconhecedores:
+            reconhecedor.analyze(texto, reconhecedor.supported_entities)
+    fim = time.perf_counter()
+
+    print(json.dumps({
+        "montagem_s": fim_montagem - inicio_montagem,
+        "primeira_analise_s": fim - fim_montagem,
+        "total_s": fim - inicio,
+    }))
+
+
+def medir(modo, modelo, dir_cache):
+    comando = [sys.executable, os.path.abspath(__file__), "--filho", modo, "--dir-cache", dir_cache]
+    if modelo:
+        comando += ["--modelo", modelo]
+    inicio = time.perf_counter()
+    saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+    medicao = json.loads(saida.strip().splitlines()[-1])
+    medicao["processo_s"] = time.perf_counter() - inicio
+    return medicao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default=None, help="modelo spaCy para montar o AnalyzerEngine completo")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--filho", choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--dir-cache", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        executar_modo(args.filho, args.modelo, args.dir_cache)
+        return
+
+    with tempfile.TemporaryDirectory() as dir_cache:
+        # Primeira execução com pacote: constrói e grava o artefato
+        medicao = medir("com_pacote", args.modelo, dir_cache)
+        print(f"{'com_pacote (1ª vez)':<20} montagem {medicao['montagem_s'] * 1000:8.1f} ms  "
+              f"1ª análise {medicao['primeira_analise_s'] * 1000:8.1f} ms  processo {medicao['processo_s']:.2f} s")
+        for modo in MODOS:
+            medicoes = [medir(modo, args.modelo, dir_cache) for _ in range(args.repeticoes)]
+            melhor = min(medicoes, key=lambda m: m["montagem_s"] + m["primeira_analise_s"])
+            print(f"{modo:<20} montagem {melhor['montagem_s'] * 1000:8.1f} ms  "
+                  f"1ª análise {melhor['primeira_analise_s'] * 1000:8.1f} ms  processo {melhor['processo_s']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Nome do arquivo: benchmarks/benchmark_lote.py
+"""
+Vazão (documentos por segundo) da anonimização em lote
+(anonimizacao_lote.anonimizar_em_lote, nlp.pipe) comparada ao laço de um
+documento por vez (analyze + filtro de termos comuns + anonymize), usado hoje
+pelas interfaces. Os documentos são as páginas dos PDFs de exemplo, repetidas
+até --documentos. Confere também que os textos anonimizados são idênticos.
+
+Uso:
+    python benchmarks/benchmark_lote.py [--modelo pt_core_news_lg] [--documentos 300]
+                                        [--batch-size 8 32 128] [--n-process 1 2]
+"""
+
+import argparse
+import itertools
+import time
+
+from comum import (carregar_lista, entidades_para_analise, listas_reconhecedores, operadores_anonimizador,
+                   paginas_pdfs_exemplo)
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from anonimizacao_lote import anonimizar_em_lote
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--documentos", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2])
+    args = parser.parse_args()
+
+    paginas = [texto for _, _, texto in paginas_pdfs_exemplo() if texto.strip()]
+    documentos = list(itertools.islice(itertools.cycle(paginas), args.documentos))
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo), supported_languages=["pt"], default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+    print(f"{len(documentos)} documentos, {sum(map(len, documentos))} caracteres, modelo {args.modelo}\n")
+
+    def um_por_vez():
+        for texto in documentos:
+            resultados = analyzer.analyze(text=texto, language="pt", entities=entidades, return_decision_process=False)
+            resultados = filtrar_termos_comuns(texto, resultados, termos_comuns)
+            yield anonymizer.anonymize(text=texto, analyzer_results=resultados, operators=operadores).text
+
+    list(itertools.islice(um_por_vez(), 5))  # aquecimento
+    inicio = time.perf_counter()
+    referencia = list(um_por_vez())
+    tempo = time.perf_counter() - inicio
+    print(f"{'um por vez':<28} {len(documentos) / tempo:7.1f} docs/s")
+
+    for n_process, batch_size in itertools.product(args.n_process, args.batch_size):
+        inicio = time.perf_counter()
+        saida = [documento["texto_anonimizado"] for documento in anonimizar_em_lote(
+            documentos, analyzer, anonymizer, operadores, entidades, termos_comuns,
+            batch_size=batch_size, n_process=n_process)]
+        tempo = time.perf_counter() - inicio
+        rotulo = f"lote (batch={batch_size}, proc={n_process})"
+        print(f"{rotulo:<28} {len(documentos) / tempo:7.1f} docs/s  "
+              f"{'idênticos' if saida == referencia else 'DIFERENTES'}")
+
+
+if __name__ == "__main__":
+    main()
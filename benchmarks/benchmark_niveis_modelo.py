@@ -0,0 +1,154 @@
+# Nome do arquivo: benchmarks/benchmark_niveis_modelo.py
+"""
+Precisão, revocação, latência e memória de cada nível de modelo spaCy
+(pt_core_news_sm/md/lg) sobre uma amostra rotulada, com o pipeline completo do
+anonimizador (reconhecedores customizados + filtro de termos comuns).
+
+A amostra (benchmarks/dados/amostra_rotulada.jsonl) traz, por linha, o texto e
+a lista [entidade, trecho]; todas as ocorrências do trecho contam como rótulo.
+Uma detecção é considerada correta se for da mesma entidade e se sobrepuser a
+um trecho rotulado. Só as entidades presentes nos rótulos são avaliadas.
+
+Cada modelo roda em um processo separado, para que a memória residente (RSS)
+medida após a carga seja a daquele modelo.
+
+Uso:
+    python benchmarks/benchmark_niveis_modelo.py [--modelos sm md lg] [--repeticoes 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from comum import (RAIZ_REPOSITORIO, carregar_lista, entidades_para_analise, listas_reconhecedores,
+                   operadores_anonimizador)
+
+CAMINHO_AMOSTRA = os.path.join(RAIZ_REPOSITORIO, "benchmarks", "dados", "amostra_rotulada.jsonl")
+
+
+def carregar_amostra():
+    amostra = []
+    with open(CAMINHO_AMOSTRA, "r", encoding="utf-8") as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            item = json.loads(linha)
+            rotulos = set()
+            for entidade, trecho in item["entidades"]:
+                inicio = item["texto"].find(trecho)
+                while inicio != -1:
+                    rotulos.add((entidade, inicio, inicio + len(trecho)))
+                    inicio = item["texto"].find(trecho, inicio + 1)
+            amostra.append((item["texto"], rotulos))
+    return amostra
+
+
+def _sobrepoe(a, b):
+    return a[0] == b[0] and a[1] < b[2] and b[1] < a[2]
+
+
+def avaliar_modelo(modelo, repeticoes):
+    """Executado no processo filho: carrega o modelo, avalia a amostra e imprime um JSON."""
+    from presidio_analyzer import AnalyzerEngine
+
+    from motor_nlp import carregar_modelo_spacy, criar_motor_nlp, memoria_residente_mb
+    from pacote_reconhecedores import construir_reconhecedores
+    from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+
+    amostra = carregar_amostra()
+    entidades_avaliadas = {rotulo[0] for _, rotulos in amostra for rotulo in rotulos}
+    entidades = entidades_para_analise(operadores_anonimizador())
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    memoria_inicial = memoria_residente_mb()
+    inicio = time.perf_counter()
+    carregar_modelo_spacy(modelo)
+    tempo_carga = time.perf_counter() - inicio
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(modelo), supported_languages=["pt"], default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    memoria_modelo = memoria_residente_mb()
+
+    def analisar(texto):
+        resultados = analyzer.analyze(text=texto, language="pt", entities=entidades)
+        return filtrar_termos_comuns(texto, resultados, termos_comuns)
+
+    analisar(amostra[0][0])  # aquecimento
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        predicoes_por_texto = [analisar(texto) for texto, _ in amostra]
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    acertos_rotulos, total_rotulos, acertos_predicoes, total_predicoes = Counter(), Counter(), Counter(), Counter()
+    for (_, rotulos), resultados in zip(amostra, predicoes_por_texto):
+        predicoes = {(r.entity_type, r.start, r.end) for r in resultados if r.entity_type in entidades_avaliadas}
+        for rotulo in rotulos:
+            total_rotulos[rotulo[0]] += 1
+            acertos_rotulos[rotulo[0]] += any(_sobrepoe(rotulo, p) for p in predicoes)
+        for predicao in predicoes:
+            total_predicoes[predicao[0]] += 1
+            acertos_predicoes[predicao[0]] += any(_sobrepoe(predicao, r) for r in rotulos)
+
+    caracteres = sum(len(texto) for texto, _ in amostra)
+    print(json.dumps({
+        "tempo_carga_s": tempo_carga,
+        "ms_por_mil_caracteres": melhor * 1000 / caracteres * 1000,
+        "memoria_residente_mb": memoria_modelo,
+        "memoria_modelo_mb": (memoria_modelo - memoria_inicial) if memoria_inicial and memoria_modelo else None,
+        "entidades": {
+            entidade: {
+                "revocacao": acertos_rotulos[entidade] / total_rotulos[entidade] if total_rotulos[entidade] else None,
+                "precisao": acertos_predicoes[entidade] / total_predicoes[entidade] if total_predicoes[entidade] else None,
+                "rotulos": total_rotulos[entidade],
+                "predicoes": total_predicoes[entidade],
+            }
+            for entidade in sorted(entidades_avaliadas)
+        },
+    }))
+
+
+def _formatar(valor):
+    return "   -  " if valor is None else f"{valor:6.2f}"
+
+
+def main():
+    from motor_nlp import niveis_modelo_instalados, resolver_modelo_spacy
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelos", nargs="+", default=None,
+                        help="níveis (sm, md, lg) ou nomes/caminhos de modelos; padrão: todos os níveis instalados")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--filho", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        avaliar_modelo(args.filho, args.repeticoes)
+        return
+
+    modelos = args.modelos or niveis_modelo_instalados()
+    if not modelos:
+        print("Nenhum modelo pt_core_news_* instalado. Use --modelos para indicar um modelo.")
+        return
+    for nivel in modelos:
+        modelo = resolver_modelo_spacy(nivel)
+        saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--filho", modelo,
+                                "--repeticoes", str(args.repeticoes)],
+                               check=True, capture_output=True, text=True).stdout
+        medicao = json.loads(saida.strip().splitlines()[-1])
+        print(f"\n{modelo}: carga {medicao['tempo_carga_s']:.1f} s, "
+              f"{medicao['ms_por_mil_caracteres']:.1f} ms/1k caracteres, "
+              f"RSS {_formatar(medicao['memoria_residente_mb']).strip()} MB "
+              f"(modelo +{_formatar(medicao['memoria_modelo_mb']).strip()} MB)")
+        print(f"  {'Entidade':<16} {'Revocação':>9} {'Precisão':>9} {'Rótulos':>8} {'Predições':>10}")
+        for entidade, metricas in medicao["entidades"].items():
+            print(f"  {entidade:<16} {_formatar(metricas['revocacao']):>9} {_formatar(metricas['precisao']):>9} "
+                  f"{metricas['rotulos']:>8} {metricas['predicoes']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Nome do arquivo: benchmarks/benchmark_paralelo.py
+"""
+Latência da análise de um único documento grande em função do número de
+processos (analise_paralela.AnalisadorParalelo), comparada à análise
+sequencial em blocos. O documento é o maior PDF de exemplo repetido
+--copias vezes.
+
+Uso:
+    python benchmarks/benchmark_paralelo.py [--modelo pt_core_news_lg] [--copias 10] [--tamanho-bloco 20000] [--max-trabalhadores N]
+"""
+
+import argparse
+import os
+import time
+
+from comum import listas_reconhecedores, textos_pdfs_exemplo
+
+from presidio_analyzer import AnalyzerEngine
+
+from analise_blocos import analisar_em_blocos
+from analise_paralela import AnalisadorParalelo
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+
+
+def spans(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=10)
+    parser.add_argument("--tamanho-bloco", type=int, default=20000)
+    parser.add_argument("--max-trabalhadores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    listas = listas_reconhecedores()
+    texto = max((texto for _, texto in textos_pdfs_exemplo()), key=len) * args.copias
+    print(f"Documento: {len(texto)} caracteres, blocos de {args.tamanho_bloco}, {os.cpu_count()} núcleos\n")
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo), supported_languages=["pt"], default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas):
+        analyzer.registry.add_recognizer(reconhecedor)
+    analisar_em_blocos(analyzer, text=texto[:args.tamanho_bloco], language="pt")  # aquecimento
+    inicio = time.perf_counter()
+    referencia = spans(analisar_em_blocos(analyzer, text=texto, tamanho_bloco=args.tamanho_bloco, language="pt"))
+    tempo_sequencial = time.perf_counter() - inicio
+    print(f"{'sequencial':<14} {tempo_sequencial:7.2f} s")
+
+    num_trabalhadores = 1
+    while num_trabalhadores <= args.max_trabalhadores:
+        analisador = AnalisadorParalelo(listas, num_trabalhadores=num_trabalhadores, modelo=args.modelo)
+        try:
+            analisador.analisar(text=texto, tamanho_bloco=args.tamanho_bloco, language="pt")  # carrega os modelos
+            inicio = time.perf_counter()
+            resultados = spans(analisador.analisar(text=texto, tamanho_bloco=args.tamanho_bloco, language="pt"))
+            tempo = time.perf_counter() - inicio
+        finally:
+            analisador.encerrar()
+        print(f"{num_trabalhadores:>2} processo(s)  {tempo:7.2f} s  aceleração {tempo_sequencial / tempo:4.1f}x  "
+              f"{'idênticos' if resultados == referencia else 'DIFERENTES'}")
+        num_trabalhadores *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Nome do arquivo: benchmarks/benchmark_perfis_spacy.py
+"""
+Compara os perfis de pipeline spaCy (completo, ner_lema, ner) nas páginas dos
+PDFs de exemplo: tempo de carga do modelo, latência do spaCy por página e
+diferenças de detecção do AnalyzerEngine completo (com os reconhecedores
+customizados) em relação ao perfil "completo".
+
+Uso:
+    python benchmarks/benchmark_perfis_spacy.py [--modelo pt_core_news_lg]
+"""
+
+import argparse
+import statistics
+import time
+
+from comum import listas_reconhecedores, paginas_pdfs_exemplo
+
+from presidio_analyzer import AnalyzerEngine
+
+from motor_nlp import PERFIS_PIPELINE_SPACY, criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+
+
+def spans(resultados):
+    return {(r.entity_type, r.start, r.end) for r in resultados}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    args = parser.parse_args()
+
+    paginas = [texto for _, _, texto in paginas_pdfs_exemplo() if texto.strip()]
+    reconhecedores = construir_reconhecedores(*listas_reconhecedores())
+    print(f"{len(paginas)} páginas, {sum(map(len, paginas))} caracteres, modelo {args.modelo}\n")
+
+    referencia = None
+    for perfil in PERFIS_PIPELINE_SPACY:
+        inicio = time.perf_counter()
+        motor = criar_motor_nlp(args.modelo, perfil)
+        motor.load()
+        tempo_carga = time.perf_counter() - inicio
+
+        latencias = []
+        for texto in paginas:
+            inicio = time.perf_counter()
+            motor.process_text(texto, "pt")
+            latencias.append(time.perf_counter() - inicio)
+
+        analyzer = AnalyzerEngine(nlp_engine=motor, supported_languages=["pt"], default_score_threshold=0.4)
+        for reconhecedor in reconhecedores:
+            analyzer.registry.add_recognizer(reconhecedor)
+        deteccoes = [spans(analyzer.analyze(text=texto, language="pt")) for texto in paginas]
+        if referencia is None:
+            referencia = deteccoes
+        ausentes = sum(len(ref - atual) for ref, atual in zip(referencia, deteccoes))
+        novas = sum(len(atual - ref) for ref, atual in zip(referencia, deteccoes))
+
+        latencias_ms = sorted(latencia * 1000 for latencia in latencias)
+        p95 = latencias_ms[min(len(latencias_ms) - 1, int(0.95 * len(latencias_ms)))]
+        print(f"{perfil:<10} desativados={motor.componentes_desativados['pt']}")
+        print(f"{'':<10} carga {tempo_carga:.2f} s | por página: média {statistics.mean(latencias_ms):.1f} ms, "
+              f"p95 {p95:.1f} ms, total {sum(latencias_ms):.0f} ms")
+        print(f"{'':<10} detecções {sum(map(len, deteccoes))} | vs. completo: {ausentes} ausentes, {novas} novas\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Nome do arquivo: benchmarks/benchmark_redacao_pdf.py
+"""
+Geração do PDF anonimizado com tarjas (redacao_pdf.gerar_pdf_redigido) para
+cada PDF de exemplo e para um PDF grande (os exemplos repetidos --copias
+vezes), com 1 a --max-trabalhadores processos. Compara com o original:
+tamanho do arquivo e tempo de rasterização de todas as páginas (custo de
+exibição), e confere quantos trechos tarjados ainda aparecem no texto do PDF
+gerado (deve ser 0).
+
+Uso:
+    python benchmarks/benchmark_redacao_pdf.py [--modelo pt_core_news_lg] [--copias 20] [--max-trabalhadores N]
+"""
+
+import argparse
+import io
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+from comum import (caminhos_pdfs_exemplo, carregar_lista, entidades_para_analise, listas_reconhecedores,
+                   operadores_anonimizador)
+
+import fitz  # PyMuPDF
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+from redacao_pdf import TabelaRedacoes, distribuir_resultados_por_pagina, gerar_pdf_redigido
+
+
+def tempo_rasterizacao(caminho):
+    inicio = time.perf_counter()
+    with fitz.open(caminho) as documento_pdf:
+        for pagina in documento_pdf:
+            pagina.get_pixmap(dpi=72)
+    return time.perf_counter() - inicio
+
+
+def trechos_visiveis(caminho_original, caminho_redigido, redacoes):
+    """
+    Quantos trechos tarjados (com 4+ caracteres) ainda aparecem no texto da respectiva página: ocorrências,
+    como palavra inteira, além das que o original tinha fora das tarjas e das que estão nos próprios rótulos.
+    """
+    visiveis = 0
+    with fitz.open(caminho_original) as original, fitz.open(caminho_redigido) as redigido:
+        for numero in redacoes.paginas():
+            redacoes_pagina = redacoes.da_pagina(numero)
+            texto_original, texto_redigido = original[numero].get_text(), redigido[numero].get_text()
+            rotulos = "\n".join(rotulo for _, _, rotulo in redacoes_pagina)
+            tarjados = Counter(texto_original[inicio:fim].strip() for inicio, fim in {(inicio, fim) for inicio, fim, _ in redacoes_pagina})
+            for trecho, quantidade in tarjados.items():
+                if len(trecho) >= 4:
+                    padrao = (r"(?<!\w)" if re.match(r"\w", trecho) else "") + re.escape(trecho) + \
+                             (r"(?!\w)" if re.search(r"\w$", trecho) else "")
+                    fora_das_tarjas = max(len(re.findall(padrao, texto_original)) - quantidade, 0)
+                    nos_rotulos = len(re.findall(padrao, rotulos))  # ex.: o "mask" mantém o início do CPF
+                    visiveis += max(len(re.findall(padrao, texto_redigido)) - fora_das_tarjas - nos_rotulos, 0)
+    return visiveis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--copias", type=int, default=20)
+    parser.add_argument("--max-trabalhadores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo), supported_languages=["pt"], default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+
+    def anonimizar(texto):
+        resultados = filtrar_termos_comuns(texto, analisar_em_blocos(analyzer, text=texto, language="pt", entities=entidades), termos_comuns)
+        return anonymizer.anonymize(text=texto, analyzer_results=resultados, operators=operadores).text, resultados
+
+    def redacoes_do_pdf(caminho):
+        return TabelaRedacoes.concatenar([
+            distribuir_resultados_por_pagina(etapa["paginas"], etapa["resultados"], operadores, etapa["pagina_inicial"])
+            for etapa in anonimizar_pdf_em_fluxo(caminho, anonimizar, io.StringIO(), num_trabalhadores=1)])
+
+    with tempfile.TemporaryDirectory() as dir_temporario:
+        caminho_grande = os.path.join(dir_temporario, f"exemplos_x{args.copias}.pdf")
+        with fitz.open() as documento_grande:
+            for caminho in caminhos_pdfs_exemplo():
+                with fitz.open(caminho) as documento_pdf:
+                    for _ in range(args.copias):
+                        documento_grande.insert_pdf(documento_pdf)
+            documento_grande.save(caminho_grande, garbage=3, deflate=True)
+
+        print(f"{'PDF':<58} {'proc.':>5} {'páginas':>7} {'tarjas':>6} {'geração':>9} {'tamanho':>17} {'rasterização':>21} {'visíveis':>8}")
+        for caminho in caminhos_pdfs_exemplo() + [caminho_grande]:
+            redacoes = redacoes_do_pdf(caminho)
+            tamanho_original = os.path.getsize(caminho)
+            raster_original = tempo_rasterizacao(caminho)
+            num_trabalhadores = 1
+            while num_trabalhadores <= (args.max_trabalhadores if caminho == caminho_grande else 1):
+                caminho_saida = os.path.join(dir_temporario, f"redigido_{num_trabalhadores}.pdf")
+                redacao = gerar_pdf_redigido(caminho, redacoes, caminho_saida, num_trabalhadores=num_trabalhadores,
+                                             paginas_minimas_paralelo=0)
+                print(f"{os.path.basename(caminho)[:58]:<58} {redacao['trabalhadores']:>5} {redacao['paginas']:>7} "
+                      f"{redacao['tarjas']:>6} {redacao['tempo_s']:>8.2f}s "
+                      f"{tamanho_original / 1e6:>6.2f}→{redacao['tamanho_bytes'] / 1e6:>6.2f} MB "
+                      f"{raster_original:>8.2f}→{tempo_rasterizacao(caminho_saida):>6.2f} s "
+                      f"{trechos_visiveis(caminho, caminho_saida, redacoes):>8}")
+                num_trabalhadores *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Nome do arquivo: benchmarks/benchmark_repeticoes_pdf.py
+"""
+Anonimização em fluxo de cada PDF de exemplo com e sem o reaproveitamento dos
+cabeçalhos/rodapés repetidos (repeticoes_pdf.py): tempo por página, caracteres
+enviados à análise e quantas linhas do texto anonimizado e quantos intervalos
+detectados diferem entre os dois modos.
+
+Uso:
+    python benchmarks/benchmark_repeticoes_pdf.py [--modelo pt_core_news_lg] [--repeticoes 3]
+"""
+
+import argparse
+import io
+import os
+import time
+
+from comum import (caminhos_pdfs_exemplo, carregar_lista, entidades_para_analise, listas_reconhecedores,
+                   operadores_anonimizador)
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+from analise_blocos import analisar_em_blocos
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções por modo (vale a mais rápida)")
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    anonymizer = AnonymizerEngine()
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+    caracteres_analisados = [0]
+
+    def anonimizar(texto):
+        caracteres_analisados[0] += len(texto)
+        resultados = filtrar_termos_comuns(texto, analisar_em_blocos(analyzer, text=texto, language="pt", entities=entidades), termos_comuns)
+        return anonymizer.anonymize(text=texto, analyzer_results=resultados, operators=operadores).text, resultados
+
+    def executar(caminho, reaproveitar):
+        melhor = None
+        for _ in range(args.repeticoes):
+            caracteres_analisados[0] = 0
+            saida, resultados, paginas = io.StringIO(), set(), 0
+            inicio = time.perf_counter()
+            for etapa in anonimizar_pdf_em_fluxo(caminho, anonimizar, saida, reaproveitar_repeticoes=reaproveitar,
+                                                 num_trabalhadores=1):
+                # Offsets relativos ao texto do lote, identificado pela página inicial
+                resultados.update((etapa["pagina_inicial"], r.entity_type, r.start, r.end) for r in etapa["resultados"])
+                paginas = etapa["total_paginas"]
+            tempo = time.perf_counter() - inicio
+            if melhor is None or tempo < melhor[0]:
+                melhor = (tempo, saida.getvalue(), resultados, caracteres_analisados[0], paginas)
+        return melhor
+
+    anonimizar("aquecimento do modelo")
+    print(f"{'PDF':<58} {'modo':<13} {'ms/página':>9} {'caracteres analisados':>22} {'diferenças':>30}")
+    for caminho in caminhos_pdfs_exemplo():
+        tempo_base, texto_base, resultados_base, caracteres_base, paginas = executar(caminho, False)
+        tempo, texto, resultados, caracteres, _ = executar(caminho, True)
+        linhas, linhas_base = texto.splitlines(), texto_base.splitlines()
+        linhas_diferentes = sum(a != b for a, b in zip(linhas, linhas_base)) + abs(len(linhas) - len(linhas_base))
+        nome = os.path.basename(caminho)[:58]
+        print(f"{nome:<58} {'lote inteiro':<13} {tempo_base / paginas * 1000:>9.1f} {caracteres_base:>22}")
+        print(f"{nome:<58} {'repetições':<13} {tempo / paginas * 1000:>9.1f} {caracteres:>22} "
+              f"{linhas_diferentes:>6} linhas, {len(resultados ^ resultados_base):>4} intervalos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Nome do arquivo: benchmarks/benchmark_sobrenomes.py
+"""
+Compara o reconhecedor de sobrenomes antigo (um Pattern por sobrenome) com o
+ReconhecedorSobrenomes (trie, passada única) nos PDFs de exemplo.
+
+Uso:
+    python benchmarks/benchmark_sobrenomes.py
+"""
+
+import re
+
+from comum import carregar_lista, cronometrar, textos_pdfs_exemplo
+
+from presidio_analyzer import PatternRecognizer
+from presidio_analyzer.pattern import Pattern
+
+from reconhecedores import ReconhecedorSobrenomes
+
+
+def reconhecedor_antigo(lista_sobrenomes):
+    """Reproduz o reconhecedor que existia em carregar_analyzer_engine."""
+    surnames_patterns = [Pattern(name=f"surname_{s.lower().replace(' ', '_')}", regex=rf"(?i)\b{re.escape(s)}\b", score=0.97) for s in lista_sobrenomes]
+    return PatternRecognizer(supported_entity="PERSON", name="BrazilianCommonSurnamesRecognizer",
+                             patterns=surnames_patterns, supported_language="pt")
+
+
+def spans(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+def main():
+    lista_sobrenomes = carregar_lista("sobrenomes_comuns.txt")
+    antigo = reconhecedor_antigo(lista_sobrenomes)
+    novo = ReconhecedorSobrenomes(lista_sobrenomes)
+
+    print(f"Sobrenomes na lista: {len(lista_sobrenomes)}")
+    for nome, texto in textos_pdfs_exemplo():
+        # Texto repetido para simular um documento longo (~300 páginas)
+        for fator in (1, 10):
+            texto_teste = texto * fator
+            t_antigo, r_antigo = cronometrar(lambda: antigo.analyze(texto_teste, ["PERSON"]), repeticoes=3)
+            t_novo, r_novo = cronometrar(lambda: novo.analyze(texto_teste, ["PERSON"]), repeticoes=3)
+            iguais = spans(r_antigo) == spans(r_novo)
+            print(f"{nome} x{fator} ({len(texto_teste):,} caracteres): "
+                  f"antigo {t_antigo * 1000:.1f} ms | novo {t_novo * 1000:.1f} ms | "
+                  f"ganho {t_antigo / t_novo:.1f}x | resultados idênticos: {iguais} ({len(r_novo)} ocorrências)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Nome do arquivo: benchmarks/benchmark_tabela_intervalos.py
+"""
+Memória (tracemalloc) e tempo para guardar e exibir --quantidade intervalos
+detectados (padrão 100 mil), obtidos repetindo, com offsets deslocados, os
+resultados reais da análise dos PDFs de exemplo:
+
+- lista de RecognizerResult (o que a análise devolve);
+- tabela da interface como antes: dicionários por resultado e DataFrame com
+  o score formatado como texto;
+- TabelaIntervalos (tabela_intervalos.py) e o DataFrame gerado a partir dela.
+
+Também compara filtrar por score e ordenar a lista de objetos com as
+operações vetorizadas da tabela e, no caminho do PDF, o que fica guardado até
+o PDF tarjado ser gerado (dicionário de listas de redações por página x
+redacao_pdf.TabelaRedacoes, com páginas de --caracteres-pagina caracteres) e
+o tamanho da entrada do cache_resultados (lista JSON x colunas binárias).
+
+Uso:
+    python benchmarks/benchmark_tabela_intervalos.py [--modelo pt_core_news_lg] [--quantidade 100000] [--caracteres-pagina 3000]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from comum import (carregar_lista, entidades_para_analise, listas_reconhecedores, operadores_anonimizador,
+                   textos_pdfs_exemplo)
+
+import pandas as pd
+from presidio_analyzer import AnalyzerEngine, RecognizerResult
+
+from analise_blocos import analisar_em_blocos
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns
+from redacao_pdf import distribuir_resultados_por_pagina
+from tabela_intervalos import TabelaIntervalos
+
+
+def medir(funcao):
+    """(retorno, memória retida pelo retorno em MB, pico em MB, tempo em s)."""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    retorno = funcao()
+    tempo = time.perf_counter() - inicio
+    retida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retorno, retida / 2**20, pico / 2**20, tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="pt_core_news_lg")
+    parser.add_argument("--quantidade", type=int, default=100_000)
+    parser.add_argument("--caracteres-pagina", type=int, default=3000)
+    args = parser.parse_args()
+
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(args.modelo, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    operadores = operadores_anonimizador()
+    entidades = entidades_para_analise(operadores)
+    termos_comuns = construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))
+    texto_base = "".join(texto for _, texto in textos_pdfs_exemplo())
+    modelos = filtrar_termos_comuns(texto_base, analisar_em_blocos(analyzer, text=texto_base, language="pt",
+                                                                   entities=entidades), termos_comuns)
+    copias = -(-args.quantidade // len(modelos))
+    texto = texto_base * copias
+
+    def gerar_resultados():
+        return [RecognizerResult(r.entity_type, r.start + copia * len(texto_base), r.end + copia * len(texto_base),
+                                 r.score, r.analysis_explanation, dict(r.recognition_metadata or {}))
+                for copia in range(copias) for r in modelos][:args.quantidade]
+
+    resultados, memoria_lista, _, _ = medir(gerar_resultados)
+
+    def tabela_antes():
+        dados = [{"Entidade": r.entity_type, "Texto Detectado": texto[r.start:r.end], "Início": r.start,
+                  "Fim": r.end, "Score": f"{r.score:.2f}"} for r in sorted(resultados, key=lambda x: x.start)]
+        return pd.DataFrame(dados)
+
+    def tabela_depois():
+        return TabelaIntervalos.de_resultados(resultados).ordenar().para_pandas(texto)
+
+    df_antes, retida_antes, pico_antes, tempo_antes = medir(tabela_antes)
+    del df_antes
+    tabela, retida_tabela, pico_tabela, tempo_tabela = medir(lambda: TabelaIntervalos.de_resultados(resultados))
+    df_depois, retida_depois, pico_depois, tempo_depois = medir(tabela_depois)
+    del df_depois
+
+    print(f"{len(resultados):,} intervalos ({len(modelos)} resultados reais repetidos)".replace(",", "."))
+    print(f"{'':<42} {'retida':>10} {'pico':>10} {'tempo':>9}")
+    print(f"{'lista de RecognizerResult':<42} {memoria_lista:>7.1f} MB {'':>10} {'':>9}")
+    print(f"{'dicionários + DataFrame (antes)':<42} {retida_antes:>7.1f} MB {pico_antes:>7.1f} MB {tempo_antes * 1000:>7.0f}ms")
+    print(f"{'TabelaIntervalos':<42} {retida_tabela:>7.1f} MB {pico_tabela:>7.1f} MB {tempo_tabela * 1000:>7.0f}ms")
+    print(f"{'TabelaIntervalos + DataFrame (depois)':<42} {retida_depois:>7.1f} MB {pico_depois:>7.1f} MB {tempo_depois * 1000:>7.0f}ms")
+    print(f"{'   (sem a coluna Texto Detectado)':<42} {tabela.ordenar().para_pandas().memory_usage(deep=True).sum() / 2**20:>7.1f} MB")
+
+    _, _, _, tempo_objetos = medir(lambda: sorted((r for r in resultados if r.score >= 0.5), key=lambda r: (r.start, -r.end)))
+    _, _, _, tempo_vetorizado = medir(lambda: tabela.filtrar(tabela.score >= 0.5).ordenar())
+    print(f"filtrar score >= 0,5 e ordenar: objetos {tempo_objetos * 1000:.1f} ms, tabela {tempo_vetorizado * 1000:.1f} ms")
+
+    paginas = [texto[inicio:inicio + args.caracteres_pagina] for inicio in range(0, len(texto), args.caracteres_pagina)]
+    redacoes, retida_redacoes, pico_redacoes, tempo_redacoes = medir(
+        lambda: distribuir_resultados_por_pagina(paginas, resultados, operadores))
+    # Como ficavam antes: um dicionário com uma lista de tuplas (início, fim, rótulo) por página
+    _, retida_dicionario, _, _ = medir(lambda: {numero: [(inicio, fim, str(rotulo)) for inicio, fim, rotulo in redacoes.da_pagina(numero)]
+                                                for numero in redacoes.paginas()})
+    tarjas = f"{len(redacoes):,}".replace(",", ".")
+    print(f"redações do PDF ({len(paginas)} páginas, {tarjas} tarjas): dicionário de listas {retida_dicionario:.1f} MB, "
+          f"TabelaRedacoes {retida_redacoes:.1f} MB (pico {pico_redacoes:.1f} MB, {tempo_redacoes * 1000:.0f} ms)")
+    tamanho_json = len(json.dumps([[r.entity_type, r.start, r.end, r.score] for r in resultados]))
+    print(f"entrada do cache de resultados: JSON {tamanho_json / 2**20:.1f} MB, colunas binárias {len(tabela.para_bytes()) / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Nome do arquivo: benchmarks/benchmark_upload_pdf.py
+"""
+Pico de memória (RSS) de uma sessão que processa um PDF grande enviado por
+upload (os exemplos repetidos --copias vezes, guardados num BytesIO como o
+UploadedFile do Streamlit): hash, contagem de tokens, anonimização em fluxo e
+geração do PDF com tarjas. Compara passar os bytes a cada etapa (getvalue(),
+como antes) com gravar o upload uma vez em disco (extracao_pdf.gravar_upload_pdf)
+e passar o caminho: pico de RSS e megabytes gravados em disco pelo processo
+(as cópias temporárias do PDF). Cada modo roda num processo novo; a
+anonimização é a identidade, para medir só o manuseio do PDF.
+
+Uso:
+    python benchmarks/benchmark_upload_pdf.py [--copias 20] [--trabalhadores 1]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz
+
+from comum import caminhos_pdfs_exemplo
+
+from extracao_pdf import gravar_upload_pdf, iterar_lotes_paginas
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from redacao_pdf import TabelaRedacoes, gerar_pdf_redigido
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _gravados_mb() -> float:
+    """Bytes escritos pelo processo (Linux; 0 onde /proc não existe)."""
+    try:
+        with open("/proc/self/io") as arquivo:
+            campos = dict(linha.split(": ") for linha in arquivo.read().splitlines())
+        return int(campos["wchar"]) / 2**20
+    except OSError:
+        return 0.0
+
+
+def executar_modo(modo: str, caminho_pdf: str, trabalhadores: int):
+    with open(caminho_pdf, "rb") as arquivo:
+        upload = io.BytesIO(arquivo.read())
+    rss_inicial, gravados_inicial = _rss_mb(), _gravados_mb()
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory() as dir_temporario:
+        if modo == "bytes":
+            hashlib.sha256(upload.getvalue()).hexdigest()
+            origem = lambda: upload.getvalue()
+        else:
+            caminho, _ = gravar_upload_pdf(upload, os.path.join(dir_temporario, "uploads"))
+            origem = lambda: caminho
+        for _ in iterar_lotes_paginas(origem(), num_trabalhadores=trabalhadores):
+            pass
+        for _ in anonimizar_pdf_em_fluxo(origem(), lambda texto: (texto, []), io.StringIO(),
+                                         num_trabalhadores=trabalhadores):
+            pass
+        gerar_pdf_redigido(origem(), TabelaRedacoes.vazia(), os.path.join(dir_temporario, "saida.pdf"), num_trabalhadores=trabalhadores)
+    tempo = time.perf_counter() - inicio
+    print(f"{rss_inicial:.1f} {_rss_mb():.1f} {_gravados_mb() - gravados_inicial:.1f} {tempo:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copias", type=int, default=20)
+    parser.add_argument("--trabalhadores", type=int, default=1, help="processos de extração e redação")
+    parser.add_argument("--modo", choices=["bytes", "caminho"], help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.modo:
+        executar_modo(args.modo, args.pdf, args.trabalhadores)
+        return
+
+    with tempfile.TemporaryDirectory() as dir_temporario:
+        caminho_grande = os.path.join(dir_temporario, f"exemplos_x{args.copias}.pdf")
+        with fitz.open() as documento_grande:
+            for caminho in caminhos_pdfs_exemplo():
+                with fitz.open(caminho) as documento_pdf:
+                    for _ in range(args.copias):
+                        documento_grande.insert_pdf(documento_pdf)
+            paginas = documento_grande.page_count
+            documento_grande.save(caminho_grande, garbage=3, deflate=True)
+        tamanho_mb = os.path.getsize(caminho_grande) / 2**20
+
+        print(f"PDF: {paginas} páginas, {tamanho_mb:.1f} MB, {args.trabalhadores} processo(s)")
+        print(f"{'modo':<8} {'RSS após upload':>16} {'pico de RSS':>12} {'acréscimo':>10} {'gravados':>11} {'tempo':>8}")
+        for modo in ("bytes", "caminho"):
+            saida = subprocess.run([sys.executable, __file__, "--modo", modo, "--pdf", caminho_grande,
+                                    "--trabalhadores", str(args.trabalhadores)],
+                                   check=True, capture_output=True, text=True).stdout.split()
+            rss_inicial, rss_pico, gravados, tempo = map(float, saida[-4:])
+            print(f"{modo:<8} {rss_inicial:>13.1f} MB {rss_pico:>9.1f} MB {rss_pico - rss_inicial:>7.1f} MB "
+                  f"{gravados:>8.1f} MB {tempo:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Nome do arquivo: benchmarks/comum.py
+"""
+Funções auxiliares compartilhadas pelos scripts de benchmark.
+
+Os benchmarks não importam o anonimizador.py (que é um script Streamlit);
+leem as listas e os PDFs de exemplo diretamente da raiz do repositório.
+"""
+
+import glob
+import os
+import sys
+import time
+
+RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Permite "import reconhecedores" etc. ao executar o script de dentro de benchmarks/
+if RAIZ_REPOSITORIO not in sys.path:
+    sys.path.insert(0, RAIZ_REPOSITORIO)
+
+
+def carregar_lista(nome_arquivo):
+    """Lê uma lista (um item por linha) da raiz do repositório, como carregar_lista_de_arquivo."""
+    with open(os.path.join(RAIZ_REPOSITORIO, nome_arquivo), "r", encoding="utf-8") as f:
+        return [linha.strip() for linha in f if linha.strip()]
+
+
+def caminhos_pdfs_exemplo():
+    """Retorna os caminhos dos PDFs de exemplo distribuídos com o repositório."""
+    return sorted(glob.glob(os.path.join(RAIZ_REPOSITORIO, "*.pdf")))
+
+
+def textos_pdfs_exemplo():
+    """Extrai o texto de cada PDF de exemplo. Retorna uma lista de (nome, texto)."""
+    import fitz  # PyMuPDF
+
+    textos = []
+    for caminho in caminhos_pdfs_exemplo():
+        with fitz.open(caminho) as documento_pdf:
+            texto = "".join(pagina.get_text() for pagina in documento_pdf)
+        textos.append((os.path.basename(caminho), texto))
+    return textos
+
+
+def paginas_pdfs_exemplo():
+    """Extrai o texto página a página dos PDFs de exemplo. Retorna uma lista de (nome, número da página, texto)."""
+    import fitz  # PyMuPDF
+
+    paginas = []
+    for caminho in caminhos_pdfs_exemplo():
+        with fitz.open(caminho) as documento_pdf:
+            for numero, pagina in enumerate(documento_pdf, start=1):
+                paginas.append((os.path.basename(caminho), numero, pagina.get_text()))
+    return paginas
+
+
+def cronometrar(funcao, repeticoes=5):
+    """Executa `funcao` `repeticoes` vezes e retorna (melhor tempo em segundos, último retorno)."""
+    melhor = float("inf")
+    retorno = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, retorno
+
+
+def listas_estaticas_anonimizador():
+    """
+    Lê as listas definidas diretamente no anonimizador.py (estados/capitais, cabeçalhos
+    legais, estado civil, organizações) sem executar o script Streamlit.
+    """
+    import ast
+
+    nomes = {"LISTA_ESTADOS_CAPITAIS_BR", "TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR",
+             "LISTA_ESTADO_CIVIL", "LISTA_ORGANIZACOES_CONHECIDAS"}
+    with open(os.path.join(RAIZ_REPOSITORIO, "anonimizador.py"), "r", encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    listas = {}
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and len(no.targets) == 1 and getattr(no.targets[0], "id", None) in nomes:
+            listas[no.targets[0].id] = ast.literal_eval(no.value)
+    return listas
+
+
+def listas_reconhecedores():
+    """Listas na ordem esperada por carregar_analyzer_engine / carregar_pacote_reconhecedores."""
+    estaticas = listas_estaticas_anonimizador()
+    return (
+        estaticas["LISTA_ESTADOS_CAPITAIS_BR"],
+        estaticas["TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR"],
+        carregar_lista("sobrenomes_comuns.txt"),
+        estaticas["LISTA_ESTADO_CIVIL"],
+        estaticas["LISTA_ORGANIZACOES_CONHECIDAS"],
+    )
+
+
+def operadores_anonimizador():
+    """Executa obter_operadores_anonimizacao() do anonimizador.py isoladamente (sem o Streamlit)."""
+    import ast
+
+    from presidio_anonymizer.entities import OperatorConfig
+
+    with open(os.path.join(RAIZ_REPOSITORIO, "anonimizador.py"), "r", encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    funcao = next(no for no in arvore.body
+                  if isinstance(no, ast.FunctionDef) and no.name == "obter_operadores_anonimizacao")
+    escopo = {"OperatorConfig": OperatorConfig}
+    exec(compile(ast.Module(body=[funcao], type_ignores=[]), "anonimizador.py", "exec"), escopo)
+    return escopo["obter_operadores_anonimizacao"]()
+
+
+def entidades_para_analise(operadores):
+    """Mesma lista de entidades montada nas abas do anonimizador.py."""
+    entidades = set(operadores) | {"SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA",
+                                   "ID_DOCUMENTO", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"}
+    entidades.discard("DEFAULT")
+    return sorted(entidades)
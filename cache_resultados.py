@@ -0,0 +1,211 @@
+# Nome do arquivo: cache_resultados.py
+"""
+Cache do resultado completo da anonimização (análise + filtro de termos comuns
++ resolução de conflitos + anonimização), para documentos anonimizados repetidas vezes: modelos,
+intimações enviadas a várias partes, reenvios do mesmo PDF.
+
+A chave é o SHA-256 do texto combinado com a impressão digital da
+configuração: assinatura do pacote de reconhecedores (listas e código, ver
+pacote_reconhecedores.calcular_assinatura_pacote), código da pós-análise, da
+anonimização direta e da análise em blocos, termos comuns, operadores de
+anonimização, entidades, limiar de score e modelo/perfil spaCy. Qualquer
+mudança em uma lista ou nesse código gera outra impressão digital, e as
+entradas antigas simplesmente deixam de ser encontradas. A impressão digital
+é calculada uma vez por motor carregado, não a cada anonimização.
+
+Há dois níveis: um LRU em memória (acertos em microssegundos) e, opcionalmente
+(ANONIMIZADOR_CACHE_RESULTADOS_DISCO > 0; desativado por padrão), um banco
+SQLite em modo WAL no diretório de cache, que sobrevive a reinícios e é
+compartilhado entre processos. O texto original não é gravado, apenas o seu
+hash, mas o texto anonimizado e os intervalos detectados ficam no disco. Os
+intervalos vão nas colunas binárias de tabela_intervalos.TabelaIntervalos
+(14 bytes por intervalo, em vez de uma lista JSON por intervalo).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+import analise_blocos
+import anonimizacao_rapida
+import pos_analise
+from pacote_reconhecedores import DIR_CACHE_PADRAO
+from tabela_intervalos import TabelaIntervalos
+
+logger = logging.getLogger("anonimizador")
+
+# Incrementar quando o formato gravado mudar (mudanças no código que gera os resultados
+# entram na impressão digital pelo hash dos módulos em MODULOS_RESULTADO)
+VERSAO_CACHE_RESULTADOS = 3  # 2: resultados gravados após pos_analise.resolver_conflitos; 3: colunas binárias
+LIMITE_ITENS_MEMORIA_PADRAO = int(os.environ.get("ANONIMIZADOR_CACHE_RESULTADOS_MEMORIA", "128"))
+# Máximo de entradas no SQLite; 0 (padrão) desativa o nível em disco, que grava os textos anonimizados
+LIMITE_ITENS_DISCO_PADRAO = int(os.environ.get("ANONIMIZADOR_CACHE_RESULTADOS_DISCO", "0"))
+# Módulos cujo código, além dos reconhecedores, altera o texto anonimizado e os intervalos guardados
+MODULOS_RESULTADO = (pos_analise, anonimizacao_rapida, analise_blocos)
+NOME_ARQUIVO_BANCO = "resultados_anonimizacao.sqlite3"
+
+
+def _descrever_operadores(operadores: Dict) -> Dict:
+    return {entidade: [operador.operator_name, operador.params] for entidade, operador in operadores.items()}
+
+
+@functools.lru_cache(maxsize=1)
+def assinatura_codigo_resultado() -> str:
+    """SHA-256 do código de MODULOS_RESULTADO e deste módulo (lido uma vez por processo)."""
+    sha = hashlib.sha256()
+    for caminho in [modulo.__file__ for modulo in MODULOS_RESULTADO] + [__file__]:
+        with open(caminho, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def impressao_digital_configuracao(analyzer,
+                                   assinatura_reconhecedores: str,
+                                   termos_comuns: Iterable[str],
+                                   operadores: Dict,
+                                   entidades: Iterable[str]) -> str:
+    """
+    SHA-256 de tudo o que, além do texto, determina o resultado da anonimização.
+
+    `assinatura_reconhecedores` é a "assinatura" de carregar_pacote_reconhecedores; o
+    modelo, o perfil do pipeline e o limiar de score vêm do próprio `analyzer`. O cálculo
+    serializa as listas de termos: deve ser feito uma vez, quando os motores são carregados.
+    """
+    nlp_engine = analyzer.nlp_engine
+    configuracao = {
+        "versao": VERSAO_CACHE_RESULTADOS,
+        "reconhecedores": assinatura_reconhecedores,
+        "codigo": assinatura_codigo_resultado(),
+        "termos_comuns": sorted(termos_comuns),
+        "operadores": _descrever_operadores(operadores),
+        "entidades": sorted(set(entidades)),
+        "limiar": analyzer.default_score_threshold,
+        "modelos": getattr(nlp_engine, "models", None),
+        "perfil": getattr(nlp_engine, "perfil", None),
+    }
+    return hashlib.sha256(json.dumps(configuracao, ensure_ascii=False, sort_keys=True, default=str)
+                          .encode("utf-8")).hexdigest()
+
+
+def _serializar_resultados(resultados: List[RecognizerResult]) -> bytes:
+    return TabelaIntervalos.de_resultados(resultados).para_bytes()
+
+
+def _desserializar_resultados(dados: bytes) -> List[RecognizerResult]:
+    return TabelaIntervalos.de_bytes(dados).para_resultados()
+
+
+class CacheResultados:
+    """LRU em memória na frente de um banco SQLite (WAL) com os resultados de anonimização."""
+
+    def __init__(self,
+                 dir_cache: Optional[str] = DIR_CACHE_PADRAO,
+                 limite_itens_memoria: int = LIMITE_ITENS_MEMORIA_PADRAO,
+                 limite_itens_disco: int = LIMITE_ITENS_DISCO_PADRAO):
+        """Com `dir_cache` None ou `limite_itens_disco` 0, só o nível em memória é usado."""
+        self.limite_itens_memoria = limite_itens_memoria
+        self.limite_itens_disco = limite_itens_disco
+        self._memoria: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self._conexao = None
+        if dir_cache and limite_itens_disco > 0:
+            try:
+                self._conexao = self._abrir_banco(os.path.join(dir_cache, NOME_ARQUIVO_BANCO))
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Cache de resultados em disco indisponível (%s); usando só a memória.", e)
+
+    @staticmethod
+    def _abrir_banco(caminho: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Uma conexão compartilhada pelas threads do Streamlit, serializada pela trava
+        conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=5)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        conexao.execute("CREATE TABLE IF NOT EXISTS resultados ("
+                        "chave TEXT PRIMARY KEY, texto_anonimizado TEXT NOT NULL, "
+                        "resultados BLOB NOT NULL, usado_em REAL NOT NULL)")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_resultados_usado_em ON resultados (usado_em)")
+        conexao.commit()
+        return conexao
+
+    @staticmethod
+    def chave(texto: str, impressao_digital: str) -> str:
+        sha = hashlib.sha256(impressao_digital.encode("ascii"))
+        sha.update(texto.encode("utf-8"))
+        return sha.hexdigest()
+
+    def _guardar_memoria(self, chave: str, item: Tuple[str, bytes]):
+        self._memoria[chave] = item
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.limite_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def obter(self, texto: str, impressao_digital: str) -> Optional[Tuple[str, List[RecognizerResult]]]:
+        """Retorna (texto_anonimizado, resultados) ou None se o texto não estiver no cache."""
+        chave = self.chave(texto, impressao_digital)
+        with self._trava:
+            item = self._memoria.get(chave)
+            if item is not None:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+            elif self._conexao is not None:
+                try:
+                    item = self._conexao.execute(
+                        "SELECT texto_anonimizado, resultados FROM resultados WHERE chave = ?", (chave,)).fetchone()
+                    if item is not None:
+                        self._conexao.execute("UPDATE resultados SET usado_em = ? WHERE chave = ?", (time.time(), chave))
+                        self._conexao.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Falha ao ler o cache de resultados: %s", e)
+                    item = None
+                if item is not None:
+                    item = tuple(item)
+                    self._guardar_memoria(chave, item)
+                    self.acertos_disco += 1
+            if item is None:
+                self.falhas += 1
+                return None
+        texto_anonimizado, resultados = item
+        return texto_anonimizado, _desserializar_resultados(resultados)
+
+    def guardar(self, texto: str, impressao_digital: str, texto_anonimizado: str, resultados: List[RecognizerResult]):
+        chave = self.chave(texto, impressao_digital)
+        item = (texto_anonimizado, _serializar_resultados(resultados))
+        with self._trava:
+            self._guardar_memoria(chave, item)
+            if self._conexao is None:
+                return
+            try:
+                self._conexao.execute("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)", (chave, *item, time.time()))
+                # Descarta as entradas menos usadas além do limite (inclui as de configurações antigas)
+                self._conexao.execute(
+                    "DELETE FROM resultados WHERE chave IN (SELECT chave FROM resultados "
+                    "ORDER BY usado_em DESC LIMIT -1 OFFSET ?)", (self.limite_itens_disco,))
+                self._conexao.commit()
+            except sqlite3.Error as e:
+                logger.warning("Falha ao gravar o cache de resultados: %s", e)
+
+    def limpar(self):
+        with self._trava:
+            self._memoria.clear()
+            if self._conexao is not None:
+                self._conexao.execute("DELETE FROM resultados")
+                self._conexao.commit()
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {"acertos_memoria": self.acertos_memoria, "acertos_disco": self.acertos_disco,
+                    "falhas": self.falhas, "itens_memoria": len(self._memoria),
+                    "disco": self._conexao is not None}
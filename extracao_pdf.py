@@ -0,0 +1,259 @@
+# Nome do arquivo: extracao_pdf.py
+"""
+Extração do texto de PDFs página a página, opcionalmente em vários processos.
+
+Em PDFs grandes (dossiês de centenas ou milhares de páginas) o intervalo de
+páginas é dividido entre um pool de processos; cada processo abre o mesmo
+arquivo (os bytes enviados são gravados uma única vez em um arquivo
+temporário) e extrai a sua faixa. Os textos voltam na ordem das páginas e
+são unidos uma única vez, junto com o tempo de extração de cada página.
+
+iterar_lotes_paginas entrega as páginas em lotes, na ordem, sem manter o
+documento inteiro em memória: no modo paralelo só uma janela de lotes fica em
+andamento nos processos, enquanto o chamador consome (e analisa) os anteriores.
+
+ANONIMIZADOR_TRABALHADORES_EXTRACAO define o número de processos (0 = número
+de núcleos; 1 = sempre sequencial) e ANONIMIZADOR_PAGINAS_MINIMAS_PARALELO o
+número mínimo de páginas para usar o pool (abaixo disso, abrir os processos
+custa mais que extrair). ANONIMIZADOR_PAGINAS_POR_LOTE define o tamanho do lote.
+
+As páginas digitalizadas (sem camada de texto) de cada lote passam pelo OCR
+seletivo de ocr_pdf.py antes de o lote ser entregue.
+
+CacheLeiturasPdf guarda o resultado da leitura de um PDF (contagem de tokens,
+prévia, tempos) pelo SHA-256 dos bytes: reenviar ou renomear o mesmo arquivo
+não o extrai de novo, e arquivos diferentes com o mesmo nome nunca colidem.
+
+gravar_upload_pdf grava o upload uma única vez em disco (ANONIMIZADOR_DIR_UPLOADS)
+e calcula o SHA-256 na mesma passada; a partir daí contagem de tokens, extração,
+anonimização e tarjas recebem o caminho (fitz.open(caminho) lê o arquivo sob
+demanda e os processos do pool abrem o mesmo arquivo), em vez de cópias dos bytes.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from ocr_pdf import OCR_ATIVO_PADRAO, ReconhecedorOcr
+
+NUM_TRABALHADORES_EXTRACAO_PADRAO = int(os.environ.get("ANONIMIZADOR_TRABALHADORES_EXTRACAO", "0"))
+PAGINAS_MINIMAS_PARALELO_PADRAO = int(os.environ.get("ANONIMIZADOR_PAGINAS_MINIMAS_PARALELO", "64"))
+PAGINAS_POR_LOTE_PADRAO = int(os.environ.get("ANONIMIZADOR_PAGINAS_POR_LOTE", "10"))
+# Lotes em andamento por processo: mais de um equilibra páginas de custo desigual (imagens, tabelas)
+LOTES_EM_ANDAMENTO_POR_TRABALHADOR = 2
+LIMITE_LEITURAS_PDF_PADRAO = int(os.environ.get("ANONIMIZADOR_CACHE_LEITURAS_PDF", "32"))
+DIR_UPLOADS_PDF_PADRAO = os.environ.get("ANONIMIZADOR_DIR_UPLOADS",
+                                        os.path.join(tempfile.gettempdir(), "anonimizador_uploads"))
+# Retenção dos uploads órfãos (de sessões encerradas sem remover o seu): o PDF ainda não está anonimizado
+HORAS_UPLOADS_PDF_PADRAO = float(os.environ.get("ANONIMIZADOR_UPLOADS_HORAS", "1"))
+TAMANHO_BLOCO_COPIA = 1 << 20
+
+
+def _abrir_pdf(origem: Union[str, bytes]):
+    if isinstance(origem, (bytes, bytearray)):
+        return fitz.open(stream=origem, filetype="pdf")
+    return fitz.open(origem)
+
+
+def _extrair_faixa(argumentos) -> List[Tuple[str, float]]:
+    """(texto, tempo_s) de cada página em [inicio, fim); executado no processo trabalhador."""
+    origem, inicio, fim = argumentos
+    paginas = []
+    with _abrir_pdf(origem) as documento_pdf:
+        for numero in range(inicio, fim):
+            inicio_pagina = time.perf_counter()
+            texto = documento_pdf[numero].get_text()
+            paginas.append((texto, time.perf_counter() - inicio_pagina))
+    return paginas
+
+
+def iterar_lotes_paginas(origem: Union[str, bytes],
+                         paginas_por_lote: int = PAGINAS_POR_LOTE_PADRAO,
+                         num_trabalhadores: int = NUM_TRABALHADORES_EXTRACAO_PADRAO,
+                         paginas_minimas_paralelo: int = PAGINAS_MINIMAS_PARALELO_PADRAO,
+                         usar_ocr: bool = OCR_ATIVO_PADRAO) -> Iterator[Dict]:
+    """
+    Gera, na ordem, um dicionário por lote de até `paginas_por_lote` páginas de `origem`
+    (caminho ou bytes do PDF), com "pagina_inicial" (base 0), "paginas" (textos),
+    "tempos_s" (tempo de extração de cada página), "total_paginas", "trabalhadores",
+    "paginas_ocr" e "paginas_sem_texto" (ver ocr_pdf.ReconhecedorOcr.completar_lote).
+    """
+    with _abrir_pdf(origem) as documento_pdf, ReconhecedorOcr(ativo=usar_ocr) as ocr:
+        total_paginas = documento_pdf.page_count
+        num_trabalhadores = min(num_trabalhadores or os.cpu_count() or 1, total_paginas)
+        if num_trabalhadores <= 1 or total_paginas < paginas_minimas_paralelo:
+            for inicio in range(0, total_paginas, paginas_por_lote):
+                paginas = []
+                for numero in range(inicio, min(inicio + paginas_por_lote, total_paginas)):
+                    inicio_pagina = time.perf_counter()
+                    texto = documento_pdf[numero].get_text()
+                    paginas.append((texto, time.perf_counter() - inicio_pagina))
+                yield ocr.completar_lote(documento_pdf, _lote(inicio, paginas, total_paginas, 1))
+            return
+
+        caminho_temporario = None
+        if not isinstance(origem, str):
+            # Os processos abrem o mesmo arquivo, em vez de receber cada um uma cópia dos bytes
+            descritor, caminho_temporario = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(descritor, "wb") as arquivo_temporario:
+                arquivo_temporario.write(origem)
+            origem = caminho_temporario
+        executor = ProcessPoolExecutor(max_workers=num_trabalhadores, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            inicios = iter(range(0, total_paginas, paginas_por_lote))
+            em_andamento = deque()
+            while True:
+                # Mantém a janela cheia; o resultado mais antigo é entregue primeiro (ordem das páginas)
+                while len(em_andamento) < num_trabalhadores * LOTES_EM_ANDAMENTO_POR_TRABALHADOR:
+                    inicio = next(inicios, None)
+                    if inicio is None:
+                        break
+                    fim = min(inicio + paginas_por_lote, total_paginas)
+                    em_andamento.append((inicio, executor.submit(_extrair_faixa, (origem, inicio, fim))))
+                if not em_andamento:
+                    return
+                inicio, futuro = em_andamento.popleft()
+                # Só as páginas digitalizadas do lote vão para o OCR; o texto das demais já está pronto
+                yield ocr.completar_lote(documento_pdf, _lote(inicio, futuro.result(), total_paginas, num_trabalhadores))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if caminho_temporario:
+                os.remove(caminho_temporario)
+
+
+def _lote(inicio: int, paginas: List[Tuple[str, float]], total_paginas: int, trabalhadores: int) -> Dict:
+    return {"pagina_inicial": inicio, "paginas": [texto for texto, _ in paginas],
+            "tempos_s": [tempo for _, tempo in paginas], "total_paginas": total_paginas,
+            "trabalhadores": trabalhadores}
+
+
+def extrair_paginas_pdf(origem: Union[str, bytes],
+                        num_trabalhadores: int = NUM_TRABALHADORES_EXTRACAO_PADRAO,
+                        paginas_minimas_paralelo: int = PAGINAS_MINIMAS_PARALELO_PADRAO,
+                        paginas_por_lote: int = PAGINAS_POR_LOTE_PADRAO,
+                        usar_ocr: bool = OCR_ATIVO_PADRAO) -> Dict:
+    """
+    Extrai o texto de todas as páginas de `origem` (caminho ou bytes do PDF).
+
+    Retorna um dicionário com "paginas" (textos na ordem das páginas), "tempos_s"
+    (tempo de extração de cada página), "tempo_total_s", "trabalhadores",
+    "paginas_ocr" e "paginas_sem_texto".
+    """
+    inicio = time.perf_counter()
+    extracao = {"paginas": [], "tempos_s": [], "trabalhadores": 1, "paginas_ocr": [], "paginas_sem_texto": []}
+    for lote in iterar_lotes_paginas(origem, paginas_por_lote, num_trabalhadores, paginas_minimas_paralelo, usar_ocr):
+        extracao["paginas"].extend(lote["paginas"])
+        extracao["tempos_s"].extend(lote["tempos_s"])
+        extracao["trabalhadores"] = lote["trabalhadores"]
+        extracao["paginas_ocr"].extend(lote["paginas_ocr"])
+        extracao["paginas_sem_texto"].extend(lote["paginas_sem_texto"])
+    extracao["tempo_total_s"] = time.perf_counter() - inicio
+    return extracao
+
+
+def resumo_extracao(extracao: Dict) -> str:
+    """Linha de resumo com o total de páginas, o tempo e a página mais lenta."""
+    tempos = extracao["tempos_s"]
+    if not tempos:
+        return "PDF sem páginas."
+    pagina_mais_lenta = max(range(len(tempos)), key=tempos.__getitem__)
+    resumo = (f"{len(tempos)} páginas extraídas em {extracao['tempo_total_s']:.2f} s "
+              f"({extracao['trabalhadores']} processo(s)); página mais lenta: {pagina_mais_lenta + 1} "
+              f"({tempos[pagina_mais_lenta] * 1000:.0f} ms)")
+    if extracao.get("paginas_ocr"):
+        resumo += f"; OCR em {len(extracao['paginas_ocr'])} página(s)"
+    if extracao.get("paginas_sem_texto"):
+        resumo += f"; {len(extracao['paginas_sem_texto'])} página(s) sem texto"
+    return resumo
+
+
+def _remover_uploads_antigos(diretorio: str, horas: float):
+    limite = time.time() - horas * 3600
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:  # em uso por outra sessão (Windows) ou já removido
+            pass
+
+
+def gravar_upload_pdf(arquivo: BinaryIO,
+                      diretorio: str = DIR_UPLOADS_PDF_PADRAO,
+                      horas_retencao: float = HORAS_UPLOADS_PDF_PADRAO) -> Tuple[str, str]:
+    """
+    Grava o PDF enviado (objeto de arquivo, ex.: o UploadedFile do Streamlit) em um arquivo
+    próprio em `diretorio` (legível só pelo usuário do processo), em blocos, calculando o
+    SHA-256 na mesma passada e sem criar uma cópia dos bytes em memória.
+
+    Quem grava remove o arquivo com remover_upload_pdf ao trocar ou retirar o upload; arquivos
+    sem uso há mais de `horas_retencao` horas (de sessões encerradas) são apagados aqui.
+    Retorna (caminho, sha256); o SHA-256 identifica o arquivo independentemente do nome.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    _remover_uploads_antigos(diretorio, horas_retencao)
+    sha = hashlib.sha256()
+    descritor, caminho = tempfile.mkstemp(prefix="upload_", suffix=".pdf", dir=diretorio)
+    try:
+        with os.fdopen(descritor, "wb") as destino:
+            arquivo.seek(0)
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_COPIA), b""):
+                sha.update(bloco)
+                destino.write(bloco)
+        arquivo.seek(0)
+    except BaseException:
+        remover_upload_pdf(caminho)
+        raise
+    return caminho, sha.hexdigest()
+
+
+def remover_upload_pdf(caminho: Optional[str]) -> None:
+    """Apaga o arquivo gravado por gravar_upload_pdf (se ainda existir)."""
+    if not caminho:
+        return
+    try:
+        os.remove(caminho)
+    except OSError:  # já removido pela limpeza dos órfãos
+        pass
+
+
+class CacheLeiturasPdf:
+    """LRU (limitado em número de itens) das leituras de PDFs, por chave derivada do SHA-256 dos bytes."""
+
+    def __init__(self, limite_itens: int = LIMITE_LEITURAS_PDF_PADRAO):
+        self.limite_itens = limite_itens
+        self._itens: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave: Hashable) -> Optional[Dict]:
+        with self._trava:
+            leitura = self._itens.get(chave)
+            if leitura is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return leitura
+
+    def guardar(self, chave: Hashable, leitura: Dict) -> None:
+        if self.limite_itens <= 0:
+            return
+        with self._trava:
+            self._itens[chave] = leitura
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.limite_itens:
+                self._itens.popitem(last=False)
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._itens)}
@@ -0,0 +1,67 @@
+# Nome do arquivo: fluxo_pdf.py
+"""
+Anonimização de PDFs em fluxo: extração → análise → anonimização por lote de
+páginas (ver extracao_pdf.iterar_lotes_paginas), em vez de extrair o
+documento inteiro e anonimizá-lo de uma só vez.
+
+Cada lote anonimizado é escrito em um buffer de saída assim que fica pronto e
+o gerador informa o progresso (páginas processadas / total) a cada lote, o
+que alimenta a barra de progresso do Streamlit e o gr.Progress do Gradio. A
+memória de trabalho passa a ser proporcional a um lote de páginas, mais o
+texto anonimizado acumulado na saída.
+
+Cada lote é analisado isoladamente: uma entidade partida entre a última
+página de um lote e a primeira do seguinte não é reconhecida. Como o texto
+de cada página termina em quebra de linha, isso só afeta entidades que já
+estavam divididas entre páginas no PDF.
+"""
+
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple, Union
+
+from presidio_analyzer import RecognizerResult
+
+from extracao_pdf import PAGINAS_POR_LOTE_PADRAO, iterar_lotes_paginas
+from repeticoes_pdf import REAPROVEITAR_REPETICOES_PADRAO, DetectorRepeticoes, anonimizar_paginas
+
+
+def anonimizar_pdf_em_fluxo(origem: Union[str, bytes],
+                            anonimizar_trecho: Callable[[str], Tuple[str, List[RecognizerResult]]],
+                            saida: TextIO,
+                            paginas_por_lote: int = PAGINAS_POR_LOTE_PADRAO,
+                            reaproveitar_repeticoes: bool = REAPROVEITAR_REPETICOES_PADRAO,
+                            **kwargs_extracao) -> Iterator[Dict]:
+    """
+    Anonimiza `origem` (caminho ou bytes do PDF) lote a lote, escrevendo o resultado em `saida`.
+
+    `anonimizar_trecho` recebe o texto de um lote e retorna (texto anonimizado,
+    resultados da análise), como análise + filtros + AnonymizerEngine. A cada lote é
+    gerado um dicionário com "pagina_inicial", "paginas" (textos das páginas do lote),
+    "paginas_processadas", "total_paginas", "texto_original" (do lote), "resultados"
+    (offsets em texto_original, usados por redacao_pdf), "tempos_s" (extração de cada
+    página do lote), "paginas_ocr" e "paginas_sem_texto" (ver ocr_pdf.py), além de
+    "caracteres_reaproveitados" (acumulado). Lotes sem texto útil são copiados sem análise.
+
+    Com `reaproveitar_repeticoes`, cabeçalhos e rodapés repetidos são analisados uma vez
+    por documento (ver repeticoes_pdf.py) e `anonimizar_trecho` recebe, além do corpo do
+    lote, cada bloco repetido distinto.
+    """
+    detector = DetectorRepeticoes() if reaproveitar_repeticoes else None
+    for lote in iterar_lotes_paginas(origem, paginas_por_lote, **kwargs_extracao):
+        texto_lote = "".join(lote["paginas"])
+        if detector is not None:
+            texto_anonimizado, resultados = anonimizar_paginas(lote["paginas"], anonimizar_trecho, detector)
+        else:
+            texto_anonimizado, resultados = anonimizar_trecho(texto_lote) if texto_lote.strip() else (texto_lote, [])
+        saida.write(texto_anonimizado)
+        yield {
+            "pagina_inicial": lote["pagina_inicial"],
+            "paginas": lote["paginas"],
+            "paginas_processadas": lote["pagina_inicial"] + len(lote["paginas"]),
+            "total_paginas": lote["total_paginas"],
+            "texto_original": texto_lote,
+            "resultados": resultados,
+            "tempos_s": lote["tempos_s"],
+            "paginas_ocr": lote["paginas_ocr"],
+            "paginas_sem_texto": lote["paginas_sem_texto"],
+            "caracteres_reaproveitados": detector.caracteres_reaproveitados if detector is not None else 0,
+        }
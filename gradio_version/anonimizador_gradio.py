@@ -2,17 +2,12 @@
 # Versão 1.2 (Gradio) - Funcionalidade completa (Texto, PDF e LLM)
 
 import gradio as gr
-import spacy
-from presidio_analyzer import AnalyzerEngine, PatternRecognizer
-from presidio_analyzer.nlp_engine import SpacyNlpEngine
-from presidio_analyzer.pattern import Pattern
+from presidio_analyzer import AnalyzerEngine
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 import pandas as pd
-import io
-import fitz  # PyMuPDF
+import tempfile
 from docx import Document
-import re
 import os
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -21,8 +16,27 @@ import openai
 import anthropic
 import requests
 import json
+import logging
+import shutil
+import time
 import tiktoken
 import httpx
+import sys
+
+# Os reconhecedores customizados são compartilhados com a versão Streamlit (pasta pai)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pacote_reconhecedores import calcular_assinatura_pacote, carregar_pacote_reconhecedores
+from motor_nlp import MODELO_SPACY_PADRAO, PERFIL_PIPELINE_PADRAO, cache_artefatos_nlp, carregar_modelo_spacy, criar_motor_nlp, informacoes_modelos_carregados
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns, resolver_conflitos, resumo_conflitos
+from analise_blocos import analisar_em_blocos
+from analise_incremental import ANALISE_INCREMENTAL_PADRAO, AnalisadorIncremental
+from anonimizacao_rapida import anonimizar_texto
+from extracao_pdf import HORAS_UPLOADS_PDF_PADRAO
+from fluxo_pdf import anonimizar_pdf_em_fluxo
+from ocr_pdf import tesseract_disponivel
+from redacao_pdf import TabelaRedacoes, distribuir_resultados_por_pagina, gerar_pdf_redigido
+from cache_resultados import CacheResultados, impressao_digital_configuracao
+from perfilamento import PERFILAMENTO_ATIVO, analisar_com_perfil, registrar_perfil_json
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
@@ -40,6 +54,10 @@ MODELO_CLAUDE = "claude-3-5-haiku-latest"
 MODELO_GROQ_LLAMA3_70B = "llama-3.3-70b-versatile"
 MODELO_OLLAMA_NEMOTRON = "nemotron-mini"
 OLLAMA_BASE_URL = "http://localhost:11434"
+LIMITE_PREVIA_TEXTO_PDF = 100_000 # caracteres de cada texto exibidos na aba de PDF (o texto inteiro vai para o .txt)
+DIR_SAIDAS_PDF = os.path.join(tempfile.gettempdir(), "anonimizador_gradio") # um subdiretório por requisição de PDF
+
+logger = logging.getLogger("anonimizador")
 
 # Dicionário de Configurações das LLMs
 LLM_CONFIGS = {
@@ -102,52 +120,36 @@ LISTA_ORGANIZACOES_CONHECIDAS = ["FUNASA","INSS","IBAMA","CNPQ","IBGE","FIOCRUZ"
 
 # --- Configuração e Inicialização do Presidio (Motor Principal) ---
 # (As funções carregar_analyzer_engine, obter_operadores_anonimizacao, etc., continuam aqui)
-def carregar_analyzer_engine(termos_safe_location, termos_legal_header, lista_sobrenomes, termos_estado_civil, termos_organizacoes_conhecidas, termos_comuns_a_manter):
+def carregar_analyzer_engine(termos_safe_location, termos_legal_header, lista_sobrenomes, termos_estado_civil, termos_organizacoes_conhecidas, modelo_spacy=MODELO_SPACY_PADRAO):
     try:
-        spacy.load('pt_core_news_lg')
+        carregar_modelo_spacy(modelo_spacy, PERFIL_PIPELINE_PADRAO)
     except OSError:
-        print("ERRO CRÍTICO: Modelo spaCy 'pt_core_news_lg' não encontrado. Instale com: python -m spacy download pt_core_news_lg")
+        print(f"ERRO CRÍTICO: Modelo spaCy '{modelo_spacy}' não encontrado. Instale com: python -m spacy download {modelo_spacy}")
         return None
 
-    spacy_engine_obj = SpacyNlpEngine(models=[{'lang_code': 'pt', 'model_name': 'pt_core_news_lg'}])
+    spacy_engine_obj = criar_motor_nlp(modelo_spacy, PERFIL_PIPELINE_PADRAO)
     analyzer = AnalyzerEngine(nlp_engine=spacy_engine_obj, supported_languages=["pt"], default_score_threshold=0.4)
-    if termos_safe_location: analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="SAFE_LOCATION", name="SafeLocationRecognizer", deny_list=termos_safe_location, supported_language="pt", deny_list_score=0.99))
-    if termos_legal_header: analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="LEGAL_HEADER", name="LegalHeaderRecognizer", deny_list=termos_legal_header, supported_language="pt", deny_list_score=0.99))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="CPF", name="CustomCpfRecognizer", patterns=[Pattern(name="CpfRegexPattern", regex=r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b", score=0.85)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="OAB_NUMBER", name="CustomOabRecognizer", patterns=[Pattern(name="OabRegexPattern", regex=r"\b(?:OAB\s+)?\d{1,6}(?:\.\d{3})?\s*\/\s*[A-Z]{2}\b", score=0.85)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="CEP_NUMBER", name="CustomCepRecognizer", patterns=[Pattern(name="CepPattern", regex=r"\b(\d{5}-?\d{3}|\d{2}\.\d{3}-?\d{3})\b", score=0.80)], supported_language="pt"))
-    if termos_estado_civil: analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="ESTADO_CIVIL", name="EstadoCivilRecognizer", patterns=[Pattern(name=f"estado_civil_{t.lower()}", regex=rf"(?i)\b{re.escape(t)}\b", score=0.99) for t in termos_estado_civil], supported_language="pt"))
-    if termos_organizacoes_conhecidas: analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="ORGANIZACAO_CONHECIDA", name="OrganizacaoConhecidaRecognizer", patterns=[Pattern(name=f"org_{t.lower()}", regex=rf"(?i)\b{re.escape(t)}\b", score=0.99) for t in termos_organizacoes_conhecidas], supported_language="pt"))
-    if lista_sobrenomes: analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="PERSON", name="BrazilianCommonSurnamesRecognizer", patterns=[Pattern(name=f"surname_{s.lower().replace(' ', '_')}", regex=rf"(?i)\b{re.escape(s)}\b", score=0.97) for s in lista_sobrenomes], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="CNH", name="CNHRecognizer", patterns=[Pattern(name="cnh_formatado", regex=r"\bCNH\s*(?:nº|n\.)?\s*\d{11}\b", score=0.98), Pattern(name="cnh_apenas_numeros", regex=r"\b(?<![\w])\d{11}(?![\w])\b", score=0.85)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="SIAPE", name="SIAPERecognizer", patterns=[Pattern(name="siape_formatado", regex=r"\bSIAPE\s*(?:nº|n\.)?\s*\d{7}\b", score=0.98), Pattern(name="siape_apenas_numeros", regex=r"\b(?<![\w])\d{7}(?![\w])\b", score=0.85)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="CI", name="CIRecognizer", patterns=[Pattern(name="ci_formatado", regex=r"\bCI\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", score=0.98), Pattern(name="ci_padrao", regex=r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", score=0.90)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="CIN", name="CINRecognizer", patterns=[Pattern(name="cin_formatado", regex=r"\bCIN\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", score=0.98), Pattern(name="cin_padrao", regex=r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", score=0.90)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="MATRICULA_SIAPE", name="MatriculaSiapeRecognizer", patterns=[Pattern(name="matricula_siape", regex=r"(?i)\b(matr[íi]cula|siape)\b", score=0.95)], supported_language="pt"))
-    analyzer.registry.add_recognizer(PatternRecognizer(supported_entity="ID_DOCUMENTO", name="IdDocumentoRecognizer", patterns=[Pattern(name="numero_beneficio_nb_formatado", regex=r"\bNB\s*\d{1,3}(\.?\d{3}){2}-[\dX]\b", score=0.98), Pattern(name="id_numerico_longo_pje", regex=r"\b\d{10,25}\b", score=0.97), Pattern(name="id_prefixo_numerico", regex=r"\bID\s*\d{8,12}\b", score=0.97), Pattern(name="numero_rg_completo", regex=r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+(?:-\dª\s*VIA)?\s*-\s*[A-Z]{2,3}\/[A-Z]{2}\b", score=0.98), Pattern(name="numero_rg_simples", regex=r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+\b", score=0.97), Pattern(name="numero_processo_cnj", regex=r"\b\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}\b", score=0.95), Pattern(name="numero_rnm", regex=r"\bRNM\s*(?:nº|n\.)?\s*[A-Z0-9]{7,15}\b", score=0.98), Pattern(name="numero_crm", regex=r"\bCRM\s*[A-Z]{2}\s*-\s*\d{1,6}\b", score=0.98)], supported_language="pt"))
+    pacote = carregar_pacote_reconhecedores(termos_safe_location, termos_legal_header, lista_sobrenomes, termos_estado_civil, termos_organizacoes_conhecidas)
+    print(f"Reconhecedores customizados: {pacote['origem']} em {pacote['tempo_s'] * 1000:.1f} ms")
+    for info_modelo in informacoes_modelos_carregados(): print(f"Modelo spaCy {info_modelo['modelo']} ({info_modelo['perfil']}): carregado em {info_modelo['tempo_carga_s']:.1f} s, memória residente {info_modelo['memoria_residente_mb'] or 0:.0f} MB")
+    for reconhecedor in pacote["reconhecedores"]: analyzer.registry.add_recognizer(reconhecedor)
     return analyzer
 
 def obter_operadores_anonimizacao():
     return {"DEFAULT": OperatorConfig("keep"),"PERSON": OperatorConfig("replace", {"new_value": "<NOME>"}),"LOCATION": OperatorConfig("replace", {"new_value": "<ENDERECO>"}),"EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),"PHONE_NUMBER": OperatorConfig("mask", {"type": "mask", "masking_char": "*", "chars_to_mask": 4, "from_end": True}),"CPF": OperatorConfig("replace", {"new_value": "<CPF>"}),"DATE_TIME": OperatorConfig("keep"),"OAB_NUMBER": OperatorConfig("replace", {"new_value": "<OAB>"}),"CEP_NUMBER": OperatorConfig("replace", {"new_value": "<CEP>"}),"ESTADO_CIVIL": OperatorConfig("keep"),"ORGANIZACAO_CONHECIDA": OperatorConfig("keep"),"ID_DOCUMENTO": OperatorConfig("keep"),"LEGAL_OR_COMMON_TERM": OperatorConfig("keep"),"CNH": OperatorConfig("replace", {"new_value": "***"}),"SIAPE": OperatorConfig("replace", {"new_value": "***"}),"CI": OperatorConfig("replace", {"new_value": "***"}),"CIN": OperatorConfig("replace", {"new_value": "***"}),"RG": OperatorConfig("replace", {"new_value": "***"}),"MATRICULA_SIAPE": OperatorConfig("replace", {"new_value": "***"})}
 def carregar_anonymizer_engine(): return AnonymizerEngine()
 
-analyzer_engine = carregar_analyzer_engine(LISTA_ESTADOS_CAPITAIS_BR, TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR, LISTA_SOBRENOMES_FREQUENTES_BR, LISTA_ESTADO_CIVIL, LISTA_ORGANIZACOES_CONHECIDAS, LISTA_TERMOS_COMUNS)
+analyzer_engine = carregar_analyzer_engine(LISTA_ESTADOS_CAPITAIS_BR, TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR, LISTA_SOBRENOMES_FREQUENTES_BR, LISTA_ESTADO_CIVIL, LISTA_ORGANIZACOES_CONHECIDAS)
 anonymizer_engine = carregar_anonymizer_engine()
+termos_comuns_a_manter = construir_conjunto_termos_comuns(LISTA_TERMOS_COMUNS)
 operadores = obter_operadores_anonimizacao()
+cache_resultados = CacheResultados()
+analisador_incremental = AnalisadorIncremental()
+ENTIDADES_PARA_ANALISE = sorted(set(operadores.keys()) | {"SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA", "ID_DOCUMENTO", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"} - {"DEFAULT"})
+# Impressão digital da configuração para o cache de resultados, calculada uma vez com o motor
+IMPRESSAO_CONFIGURACAO = impressao_digital_configuracao(analyzer_engine, calcular_assinatura_pacote(LISTA_ESTADOS_CAPITAIS_BR, TERMOS_CABECALHO_LEGAL_NAO_ANONIMIZAR, LISTA_SOBRENOMES_FREQUENTES_BR, LISTA_ESTADO_CIVIL, LISTA_ORGANIZACOES_CONHECIDAS), LISTA_TERMOS_COMUNS, operadores, ENTIDADES_PARA_ANALISE)
 
 # --- Funções de Processamento de Arquivos ---
-def extrair_texto_de_pdf(caminho_arquivo_pdf):
-    texto_completo = ""
-    try:
-        with fitz.open(caminho_arquivo_pdf) as documento_pdf:
-            for pagina in documento_pdf:
-                texto_completo += pagina.get_text()
-    except Exception as e:
-        print(f"Erro ao extrair texto do PDF: {e}")
-        return None, f"Erro ao extrair texto do PDF: {e}"
-    if not texto_completo.strip():
-        return None, "O PDF carregado não contém texto extraível."
-    return texto_completo, None
 # ... (demais funções de LLM e helpers)
 def carregar_chave_api(env_var_name: str, servico_nome_exibicao: str) -> str | None:
     api_key = os.getenv(env_var_name)
@@ -190,15 +192,41 @@ def reescrever_texto_com_ollama(texto_anonimizado, system_prompt, user_prompt_in
 
 # --- Funções de Lógica da Interface (Event Handlers) ---
 
+def _anonimizar_resultados(texto_original, incremental=False):
+    """
+    Anonimiza o texto, retornando (texto anonimizado, resultados da análise).
+    Com `incremental` (área de texto), só os parágrafos alterados são reanalisados (ver analise_incremental.py).
+    """
+    entidades_para_analise = ENTIDADES_PARA_ANALISE
+    impressao = IMPRESSAO_CONFIGURACAO
+    resultado_cache = None if PERFILAMENTO_ATIVO else cache_resultados.obter(texto_original, impressao)
+    if resultado_cache:
+        texto_anonimizado, resultados_analise = resultado_cache
+    else:
+        if PERFILAMENTO_ATIVO:
+            resultados_analise, perfil = analisar_com_perfil(analyzer_engine, analisar=analisar_em_blocos, text=texto_original, language='pt', entities=entidades_para_analise, return_decision_process=False)
+            registrar_perfil_json(perfil, interface="gradio", caracteres=len(texto_original))
+        elif incremental and ANALISE_INCREMENTAL_PADRAO:
+            resultados_analise, estatisticas = analisador_incremental.analisar(
+                texto_original, impressao,
+                lambda trecho: analisar_em_blocos(analyzer_engine, text=trecho, language='pt', entities=entidades_para_analise, return_decision_process=False))
+            logger.info("Análise incremental: %d de %d parágrafos reanalisados", estatisticas['reanalisados'], estatisticas['paragrafos'])
+        else:
+            resultados_analise = analisar_em_blocos(analyzer_engine, text=texto_original, language='pt', entities=entidades_para_analise, return_decision_process=False)
+        if cache_artefatos_nlp is not None: logger.debug("Cache de NLP: %s", cache_artefatos_nlp.estatisticas())
+        resultados_analise = filtrar_termos_comuns(texto_original, resultados_analise, termos_comuns_a_manter)
+        resultados_analise, conflitos = resolver_conflitos(texto_original, resultados_analise)
+        logger.debug(resumo_conflitos(conflitos))
+        texto_anonimizado = anonimizar_texto(anonymizer_engine, texto_original, resultados_analise, operadores)
+        cache_resultados.guardar(texto_original, impressao, texto_anonimizado, resultados_analise)
+    logger.debug("Cache de resultados: %s", cache_resultados.estatisticas())
+    return texto_anonimizado, resultados_analise
+
 def _anonimizar_logica(texto_original):
     """Função interna que contém a lógica de anonimização compartilhada."""
-    entidades_para_analise = list(operadores.keys()) + ["SAFE_LOCATION", "LEGAL_HEADER", "ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA", "ID_DOCUMENTO", "CNH", "SIAPE", "CI", "CIN", "MATRICULA_SIAPE"]
-    entidades_para_analise = list(set(entidades_para_analise) - {"DEFAULT"})
-    resultados_analise = analyzer_engine.analyze(text=texto_original, language='pt', entities=entidades_para_analise, return_decision_process=False)
-    resultado_anonimizado_obj = anonymizer_engine.anonymize(text=texto_original, analyzer_results=resultados_analise, operators=operadores)
-    
+    texto_anonimizado, resultados_analise = _anonimizar_resultados(texto_original, incremental=True)
     dados_resultados = [{"Entidade": res.entity_type, "Texto Detectado": texto_original[res.start:res.end], "Início": res.start, "Fim": res.end, "Score": f"{res.score:.2f}"} for res in sorted(resultados_analise, key=lambda x: x.start)]
-    return resultado_anonimizado_obj.text, pd.DataFrame(dados_resultados)
+    return texto_anonimizado, pd.DataFrame(dados_resultados)
 
 def processar_texto_area(texto_original):
     if not texto_original or not texto_original.strip():
@@ -212,28 +240,105 @@ def processar_texto_area(texto_original):
         gr.Error(f"Ocorreu um erro durante a anonimização: {e}")
         return "Erro ao processar o texto.", pd.DataFrame(None)
 
-def processar_arquivo_pdf(arquivo_temp, progress=gr.Progress()):
+def _previa_texto(texto):
+    """Início do texto exibido na interface; o texto inteiro do PDF fica no .txt para download."""
+    if len(texto) < LIMITE_PREVIA_TEXTO_PDF:
+        return texto
+    return texto + f"\n\n[... exibindo os primeiros {LIMITE_PREVIA_TEXTO_PDF:,} caracteres]".replace(",", ".")
+
+def criar_dir_saida_pdf(dir_anterior):
+    """
+    Diretório próprio da requisição para o .txt e o PDF tarjado. O da requisição anterior
+    da mesma sessão é apagado; os de sessões encerradas, após HORAS_UPLOADS_PDF_PADRAO
+    horas sem uso (como os uploads do Streamlit, ver extracao_pdf.gravar_upload_pdf).
+    """
+    remover_dir_saida_pdf(dir_anterior)
+    os.makedirs(DIR_SAIDAS_PDF, exist_ok=True)
+    limite = time.time() - HORAS_UPLOADS_PDF_PADRAO * 3600
+    for nome in os.listdir(DIR_SAIDAS_PDF):
+        caminho = os.path.join(DIR_SAIDAS_PDF, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                shutil.rmtree(caminho, ignore_errors=True)
+        except OSError:  # já removido por outra sessão
+            pass
+    return tempfile.mkdtemp(prefix="pdf_", dir=DIR_SAIDAS_PDF)
+
+def remover_dir_saida_pdf(dir_saida):
+    """Apaga o diretório criado por criar_dir_saida_pdf (se ainda existir)."""
+    if dir_saida:
+        shutil.rmtree(dir_saida, ignore_errors=True)
+
+def limpar_saida_pdf(dir_saida):
+    """Upload retirado: o .txt e o PDF tarjado da sessão são apagados na hora."""
+    remover_dir_saida_pdf(dir_saida)
+    return None, None
+
+def processar_arquivo_pdf(arquivo_temp, dir_anterior, progress=gr.Progress()):
+    # O Gradio copia os arquivos retornados para o próprio cache depois do retorno; por isso o
+    # diretório de saída vive até a próxima requisição da sessão (ou até o upload ser retirado).
     if arquivo_temp is None:
         gr.Warning("Por favor, carregue um arquivo PDF.")
-        return None, None, None
+        return None, None, None, None, dir_anterior
     
     progress(0, desc="Iniciando...")
+    dir_saida = criar_dir_saida_pdf(dir_anterior)
     try:
-        progress(0.2, desc="Extraindo texto do PDF...")
-        texto_extraido, erro = extrair_texto_de_pdf(arquivo_temp.name)
-        if erro:
-            gr.Error(erro)
-            return None, None, None
-
-        progress(0.6, desc="Anonimizando o conteúdo...")
-        texto_anonimizado, _ = _anonimizar_logica(texto_extraido) # Não precisamos do DF aqui
+        # Extração → análise → anonimização por lote de páginas (ver fluxo_pdf.py). Cada lote anonimizado
+        # vai direto para um .txt em disco; em memória ficam só as prévias exibidas nas caixas de texto.
+        nome_base = os.path.splitext(os.path.basename(arquivo_temp.name))[0]
+        caminho_texto_anonimizado = os.path.join(dir_saida, f"anonimizado_{nome_base}.txt")
+        previa_original, tem_texto = "", False
+        tempos_extracao, paginas_ocr, paginas_sem_texto = [], [], []
+        caracteres_reaproveitados = 0
+        redacoes_lotes = []  # Uma TabelaRedacoes por lote, unidas no fim (ver redacao_pdf.py)
+        with open(caminho_texto_anonimizado, "w", encoding="utf-8") as saida_anonimizada:
+            for etapa in anonimizar_pdf_em_fluxo(arquivo_temp.name, _anonimizar_resultados, saida_anonimizada):
+                tem_texto = tem_texto or bool(etapa["texto_original"].strip())
+                if len(previa_original) < LIMITE_PREVIA_TEXTO_PDF:
+                    previa_original += etapa["texto_original"][:LIMITE_PREVIA_TEXTO_PDF - len(previa_original)]
+                tempos_extracao.extend(etapa["tempos_s"])
+                paginas_ocr.extend(etapa["paginas_ocr"])
+                paginas_sem_texto.extend(etapa["paginas_sem_texto"])
+                caracteres_reaproveitados = etapa["caracteres_reaproveitados"]
+                redacoes_lotes.append(distribuir_resultados_por_pagina(etapa["paginas"], etapa["resultados"], operadores, etapa["pagina_inicial"]))
+                progress(etapa["paginas_processadas"] / etapa["total_paginas"], desc=f"Anonimizando: página {etapa['paginas_processadas']} de {etapa['total_paginas']}")
+        logger.info("Extração: %d páginas, %.2f s; página mais lenta: %.0f ms; OCR em %d página(s); %d página(s) sem texto; "
+                    "%d caracteres de cabeçalhos/rodapés repetidos reaproveitados", len(tempos_extracao), sum(tempos_extracao),
+                    max(tempos_extracao, default=0) * 1000, len(paginas_ocr), len(paginas_sem_texto), caracteres_reaproveitados)
+        if paginas_sem_texto:
+            gr.Warning(f"{len(paginas_sem_texto)} página(s) sem texto, provavelmente digitalizada(s). "
+                       + ("O OCR não conseguiu lê-las." if tesseract_disponivel() else "Instale o Tesseract (tesseract-ocr-por) para lê-las por OCR."))
+        if not tem_texto:
+            gr.Error("O PDF carregado não contém texto extraível.")
+            remover_dir_saida_pdf(dir_saida)
+            return None, None, None, None, None
+        with open(caminho_texto_anonimizado, encoding="utf-8") as arquivo_texto:
+            previa_anonimizada = arquivo_texto.read(LIMITE_PREVIA_TEXTO_PDF)
+
+        # PDF com as tarjas aplicadas no próprio documento, preservando o layout (ver redacao_pdf.py)
+        progress(1, desc="Gerando o PDF anonimizado...")
+        caminho_pdf_redigido = os.path.join(dir_saida, f"anonimizado_{os.path.basename(arquivo_temp.name)}")
+        redacao = gerar_pdf_redigido(arquivo_temp.name, TabelaRedacoes.concatenar(redacoes_lotes), caminho_pdf_redigido)
+        logger.info("PDF anonimizado: %d tarjas em %d páginas, %.2f s, %.1f MB", redacao['tarjas'], redacao['paginas'], redacao['tempo_s'], redacao['tamanho_bytes'] / 1e6)
         
         progress(1, desc="Concluído!")
         gr.Info("Arquivo PDF anonimizado com sucesso!")
-        return texto_extraido, texto_anonimizado, texto_anonimizado # Retorna o anonimizado também para o State da LLM
+        # O State da LLM guarda o caminho do .txt, não o texto anonimizado inteiro
+        return (_previa_texto(previa_original), _previa_texto(previa_anonimizada), caminho_texto_anonimizado,
+                [caminho_pdf_redigido, caminho_texto_anonimizado], dir_saida)
     except Exception as e:
         gr.Error(f"Ocorreu um erro ao processar o PDF: {e}")
-        return None, None, None
+        remover_dir_saida_pdf(dir_saida)
+        return None, None, None, None, None
+
+def gerar_resumo_llm_pdf(caminho_texto_anonimizado, modelo_escolhido, prompt_customizado, progress=gr.Progress()):
+    """O texto anonimizado do PDF é lido do .txt gerado por processar_arquivo_pdf só quando o resumo é pedido."""
+    if not caminho_texto_anonimizado or not os.path.exists(caminho_texto_anonimizado):
+        gr.Warning("Texto anonimizado não disponível. Anonimize o PDF novamente.")
+        return None
+    with open(caminho_texto_anonimizado, encoding="utf-8") as arquivo_texto:
+        return gerar_resumo_llm(arquivo_texto.read(), modelo_escolhido, prompt_customizado, progress)
 
 def gerar_resumo_llm(texto_anonimizado, modelo_escolhido, prompt_customizado, progress=gr.Progress()):
     if not texto_anonimizado or not modelo_escolhido:
@@ -286,6 +391,7 @@ with gr.Blocks(theme=gr.themes.Soft(), title="AnonimizaJUD") as demo:
     # Estados para passar o texto anonimizado para a seção LLM de cada aba
     texto_anonimizado_state_area = gr.State()
     texto_anonimizado_state_pdf = gr.State()
+    dir_saida_state_pdf = gr.State() # Diretório com o .txt e o PDF tarjado da última requisição (ver criar_dir_saida_pdf)
     
     with gr.Tabs():
         with gr.TabItem("⌨️ Anonimizar Texto Colado"):
@@ -311,6 +417,7 @@ with gr.Blocks(theme=gr.themes.Soft(), title="AnonimizaJUD") as demo:
                 with gr.Accordion("📄 Ver Texto Extraído do PDF (Original)", open=False):
                     texto_original_pdf = gr.Textbox(lines=15, label="Texto Original Extraído", interactive=False)
                 texto_anonimizado_pdf = gr.Textbox(lines=15, label="Texto Anonimizado (Camada 1)", interactive=False)
+            pdf_anonimizado = gr.File(label="📥 PDF Anonimizado (tarjas no documento original) e texto anonimizado completo (.txt)", file_count="multiple", interactive=False)
 
             # Instanciando a seção LLM para esta aba
             llm_choice_pdf, btn_gerar_resumo_pdf, custom_prompt_llm_pdf, llm_output_pdf = criar_secao_llm()
@@ -322,8 +429,9 @@ with gr.Blocks(theme=gr.themes.Soft(), title="AnonimizaJUD") as demo:
     btn_gerar_resumo_area.click(fn=gerar_resumo_llm, inputs=[texto_anonimizado_state_area, llm_choice_area, custom_prompt_llm_area], outputs=[llm_output_area])
     
     # Aba de PDF
-    btn_anonimizar_pdf.click(fn=processar_arquivo_pdf, inputs=[upload_pdf], outputs=[texto_original_pdf, texto_anonimizado_pdf, texto_anonimizado_state_pdf])
-    btn_gerar_resumo_pdf.click(fn=gerar_resumo_llm, inputs=[texto_anonimizado_state_pdf, llm_choice_pdf, custom_prompt_llm_pdf], outputs=[llm_output_pdf])
+    btn_anonimizar_pdf.click(fn=processar_arquivo_pdf, inputs=[upload_pdf, dir_saida_state_pdf], outputs=[texto_original_pdf, texto_anonimizado_pdf, texto_anonimizado_state_pdf, pdf_anonimizado, dir_saida_state_pdf])
+    upload_pdf.clear(fn=limpar_saida_pdf, inputs=[dir_saida_state_pdf], outputs=[texto_anonimizado_state_pdf, dir_saida_state_pdf])
+    btn_gerar_resumo_pdf.click(fn=gerar_resumo_llm_pdf, inputs=[texto_anonimizado_state_pdf, llm_choice_pdf, custom_prompt_llm_pdf], outputs=[llm_output_pdf])
 
 # --- Ponto de Entrada para Iniciar o App ---
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+# Nome do arquivo: motor_nlp.py
+"""
+Motor de NLP (spaCy) usado pelo AnalyzerEngine do Presidio.
+
+O pt_core_news_lg completo roda tok2vec, morphologizer, parser, lemmatizer,
+attribute_ruler e ner. A anonimização só precisa das entidades (ner) e dos
+lemas (usados pelo Presidio para o reforço de score por palavras de contexto),
+então os perfis abaixo desativam, na carga do modelo, os componentes que não
+são necessários:
+
+  completo   pipeline inteiro (comportamento original)
+  ner_lema   ner + lemmatizer (+ attribute_ruler); sem parser e morfologia
+  ner        apenas ner; sem lemas, o reforço por contexto deixa de atuar
+
+Dependências entre componentes são respeitadas: um tok2vec compartilhado
+continua ativo se algum componente mantido o escuta, e um lematizador por
+regras mantém o tagger/morphologizer de que depende.
+
+Os modelos são carregados por um registro compartilhado no processo: cada
+combinação (modelo, perfil) é carregada uma única vez e a mesma instância é
+entregue ao Presidio, com o tempo de carga e a memória residente registrados.
+
+Opcionalmente, os NlpArtifacts de cada texto ficam em um cache LRU limitado
+pelo número de textos (ANONIMIZADOR_CACHE_NLP_ITENS, padrão 0: desativado):
+analisar de novo o mesmo texto roda só os reconhecedores de padrões. Os
+artefatos contêm o Doc do spaCy, isto é, o texto original ainda não
+anonimizado, compartilhado por todas as sessões do processo.
+"""
+
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import spacy
+from presidio_analyzer.nlp_engine import NerModelConfiguration, SpacyNlpEngine
+
+# Níveis de modelo em português; o nível da implantação vem de ANONIMIZADOR_MODELO_SPACY
+# (um nível "sm"/"md"/"lg" ou o nome/caminho de um modelo spaCy)
+MODELOS_SPACY_POR_NIVEL = {
+    "sm": "pt_core_news_sm",
+    "md": "pt_core_news_md",
+    "lg": "pt_core_news_lg",
+}
+
+
+def resolver_modelo_spacy(nivel_ou_modelo: str) -> str:
+    """Converte um nível ("sm", "md", "lg") no nome do modelo; outros valores são devolvidos como estão."""
+    return MODELOS_SPACY_POR_NIVEL.get(nivel_ou_modelo, nivel_ou_modelo)
+
+
+@functools.lru_cache(maxsize=1)
+def niveis_modelo_instalados() -> List[str]:
+    """Níveis cujo modelo spaCy está instalado como pacote, do menor para o maior."""
+    return [nivel for nivel, modelo in MODELOS_SPACY_POR_NIVEL.items() if spacy.util.is_package(modelo)]
+
+
+MODELO_SPACY_PADRAO = resolver_modelo_spacy(os.environ.get("ANONIMIZADOR_MODELO_SPACY", "lg"))
+
+PERFIS_PIPELINE_SPACY = {
+    "completo": None,
+    "ner_lema": ("ner", "lemmatizer", "trainable_lemmatizer", "attribute_ruler"),
+    "ner": ("ner",),
+}
+PERFIL_PIPELINE_PADRAO = os.environ.get("ANONIMIZADOR_PERFIL_SPACY", "completo")
+
+# Componentes dos quais um lematizador por regras (mode="rule") depende para obter o POS
+_DEPENDENCIAS_LEMATIZADOR_REGRAS = ("tagger", "morphologizer", "attribute_ruler")
+
+
+def componentes_a_desativar(nlp, perfil: str) -> List[str]:
+    """Retorna os componentes do pipeline `nlp` que o perfil não utiliza."""
+    if perfil not in PERFIS_PIPELINE_SPACY:
+        raise ValueError(f"Perfil de pipeline spaCy desconhecido: '{perfil}'. "
+                         f"Opções: {', '.join(PERFIS_PIPELINE_SPACY)}")
+    componentes_perfil = PERFIS_PIPELINE_SPACY[perfil]
+    if componentes_perfil is None:
+        return []
+
+    manter = {nome for nome in nlp.pipe_names if nome in componentes_perfil}
+    for nome in list(manter):
+        if getattr(nlp.get_pipe(nome), "mode", None) == "rule":
+            manter.update(n for n in nlp.pipe_names if n in _DEPENDENCIAS_LEMATIZADOR_REGRAS)
+    # tok2vec/transformer compartilhados: mantidos se algum componente mantido os escuta
+    for nome in nlp.pipe_names:
+        ouvintes = getattr(nlp.get_pipe(nome), "listening_components", None) or []
+        if manter.intersection(ouvintes):
+            manter.add(nome)
+    return [nome for nome in nlp.pipe_names if nome not in manter]
+
+
+# Registro de modelos carregados no processo: (modelo, perfil) -> {"nlp", "tempo_carga_s", ...}
+_modelos_carregados: Dict[tuple, Dict] = {}
+_trava_modelos = threading.Lock()
+
+
+def memoria_residente_mb() -> Optional[float]:
+    """Memória residente (RSS) atual do processo em MB, ou None se não for possível medir."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource  # indisponível no Windows
+        # Sem /proc (ex.: macOS): usa o pico de memória, em bytes no macOS e em KB no Linux
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _registro_modelo(modelo: str, perfil: str) -> Dict:
+    chave = (modelo, perfil)
+    with _trava_modelos:
+        registro = _modelos_carregados.get(chave)
+        if registro is None:
+            memoria_antes = memoria_residente_mb()
+            inicio = time.perf_counter()
+            nlp = spacy.load(modelo)
+            desativar = componentes_a_desativar(nlp, perfil)
+            if desativar:
+                nlp.select_pipes(disable=desativar)
+            memoria_depois = memoria_residente_mb()
+            registro = {
+                "nlp": nlp,
+                "modelo": modelo,
+                "perfil": perfil,
+                "componentes_desativados": desativar,
+                "tempo_carga_s": time.perf_counter() - inicio,
+                "memoria_residente_mb": memoria_depois,
+                "memoria_modelo_mb": (memoria_depois - memoria_antes
+                                      if memoria_antes is not None and memoria_depois is not None else None),
+            }
+            _modelos_carregados[chave] = registro
+    return registro
+
+
+def carregar_modelo_spacy(modelo: str = MODELO_SPACY_PADRAO, perfil: str = "completo"):
+    """
+    Carrega o modelo spaCy uma única vez por processo (por perfil) e retorna a instância compartilhada.
+
+    Lança OSError se o modelo não estiver instalado, como spacy.load.
+    """
+    return _registro_modelo(modelo, perfil)["nlp"]
+
+
+def informacoes_modelos_carregados() -> List[Dict]:
+    """Tempo de carga e memória de cada modelo do registro (sem a instância do spaCy)."""
+    with _trava_modelos:
+        return [{chave: valor for chave, valor in registro.items() if chave != "nlp"}
+                for registro in _modelos_carregados.values()]
+
+
+class CacheArtefatosNlp:
+    """
+    Cache LRU de NlpArtifacts, com chave (hash SHA-256 do texto, modelo, perfil, idioma).
+
+    Permite que uma nova análise do mesmo texto (novo clique, outro conjunto de
+    entidades, rerun do Streamlit) reaproveite a tokenização e o NER, rodando
+    apenas os reconhecedores de padrões. O limite é o número de textos; os menos
+    usados são descartados primeiro. A memória de cada item cresce com o texto:
+    cerca de 0,8 KB por token (medido com tracemalloc em um pipeline com tok2vec
+    de largura 96, como o dos modelos pt_core_news), metade disso no tensor do Doc.
+    """
+
+    def __init__(self, limite_itens: int):
+        self.limite_itens = limite_itens
+        self._itens: "OrderedDict[tuple, object]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(texto: str, modelo: str, perfil: str, idioma: str) -> tuple:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest(), modelo, perfil, idioma
+
+    def obter(self, chave: tuple):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return item
+
+    def guardar(self, chave: tuple, artefatos) -> None:
+        with self._trava:
+            self._itens[chave] = artefatos
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.limite_itens:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._itens),
+                    "limite_itens": self.limite_itens}
+
+
+# Cache compartilhado por todos os motores do processo (guarda textos não anonimizados); 0 desativa
+LIMITE_CACHE_NLP_ITENS = int(os.environ.get("ANONIMIZADOR_CACHE_NLP_ITENS", "0"))
+cache_artefatos_nlp = CacheArtefatosNlp(LIMITE_CACHE_NLP_ITENS) if LIMITE_CACHE_NLP_ITENS > 0 else None
+
+
+class SpacyNlpEnginePerfilado(SpacyNlpEngine):
+    """SpacyNlpEngine que desativa, na carga, os componentes não usados pelo perfil escolhido."""
+
+    def __init__(self,
+                 models: Optional[List[Dict[str, str]]] = None,
+                 perfil: str = PERFIL_PIPELINE_PADRAO,
+                 ner_model_configuration: Optional[NerModelConfiguration] = None,
+                 cache: Optional[CacheArtefatosNlp] = None):
+        if perfil not in PERFIS_PIPELINE_SPACY:
+            raise ValueError(f"Perfil de pipeline spaCy desconhecido: '{perfil}'. "
+                             f"Opções: {', '.join(PERFIS_PIPELINE_SPACY)}")
+        super().__init__(models=models, ner_model_configuration=ner_model_configuration)
+        self.perfil = perfil
+        self.cache = cache
+        self._modelo_por_idioma = {model["lang_code"]: model["model_name"] for model in self.models}
+        self.componentes_desativados: Dict[str, List[str]] = {}
+
+    def load(self) -> None:
+        # Usa o registro compartilhado em vez de spacy.load, para não duplicar o modelo em memória
+        self.nlp = {}
+        for model in self.models:
+            self._validate_model_params(model)
+            registro = _registro_modelo(model["model_name"], self.perfil)
+            self.nlp[model["lang_code"]] = registro["nlp"]
+            self.componentes_desativados[model["lang_code"]] = registro["componentes_desativados"]
+
+    def process_text(self, text: str, language: str):
+        """Como SpacyNlpEngine.process_text, reaproveitando os NlpArtifacts do cache quando houver."""
+        if self.cache is None:
+            return super().process_text(text, language)
+        chave = self.cache.chave(text, self._modelo_por_idioma.get(language), self.perfil, language)
+        artefatos = self.cache.obter(chave)
+        if artefatos is None:
+            artefatos = super().process_text(text, language)
+            self.cache.guardar(chave, artefatos)
+        return artefatos
+
+    def process_batch(self,
+                      texts: Iterable,
+                      language: str,
+                      as_tuples: bool = False,
+                      batch_size: int = 32,
+                      n_process: int = 1) -> Iterator[Tuple]:
+        """
+        Como SpacyNlpEngine.process_batch, mas repassando batch_size e n_process ao nlp.pipe.
+
+        Com as_tuples=True, `texts` são pares (texto, contexto) e o retorno é
+        (texto, NlpArtifacts, contexto), o que permite identificar cada documento.
+        """
+        if not self.nlp:
+            raise ValueError("NLP engine is not loaded. Consider calling .load()")
+        if as_tuples:
+            docs = self.nlp[language].pipe(((str(texto), contexto) for texto, contexto in texts),
+                                           as_tuples=True, batch_size=batch_size, n_process=n_process)
+            for doc, contexto in docs:
+                yield doc.text, self._doc_to_nlp_artifact(doc, language), contexto
+        else:
+            docs = self.nlp[language].pipe((str(texto) for texto in texts),
+                                           batch_size=batch_size, n_process=n_process)
+            for doc in docs:
+                yield doc.text, self._doc_to_nlp_artifact(doc, language)
+
+
+def criar_motor_nlp(modelo: str = MODELO_SPACY_PADRAO, perfil: str = PERFIL_PIPELINE_PADRAO,
+                    cache: Optional[CacheArtefatosNlp] = cache_artefatos_nlp) -> SpacyNlpEnginePerfilado:
+    """Cria o motor de NLP em português para o AnalyzerEngine (com o cache de artefatos compartilhado)."""
+    return SpacyNlpEnginePerfilado(models=[{"lang_code": "pt", "model_name": modelo}], perfil=perfil, cache=cache)
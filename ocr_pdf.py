@@ -0,0 +1,352 @@
+# Nome do arquivo: ocr_pdf.py
+"""
+OCR seletivo das páginas digitalizadas de um PDF.
+
+Peças processuais costumam misturar páginas nascidas digitais (camada de
+texto completa) com páginas digitalizadas, para as quais page.get_text()
+devolve texto vazio. Só as páginas com menos de
+ANONIMIZADOR_OCR_CARACTERES_MINIMOS caracteres (sem contar espaços) passam
+pelo OCR do Tesseract, pelo suporte embutido do PyMuPDF
+(page.get_textpage_ocr); as demais seguem no caminho rápido, sem custo extra.
+
+O OCR roda em um pool de processos criado só quando aparece a primeira página
+digitalizada; cada página é enviada como um PDF de uma página só, sem copiar o
+documento inteiro. O texto reconhecido fica em cache em memória pelo hash do
+conteúdo da página (operadores de desenho e bytes das imagens), do idioma e da
+resolução, junto com as caixas dos caracteres calculadas do mesmo TextPage: a
+geração do PDF com tarjas (redacao_pdf.py) usa essas caixas em vez de refazer
+o OCR. O texto reconhecido é o conteúdo do documento ainda não anonimizado,
+por isso o nível em disco (um SQLite no diretório de cache, para que o mesmo
+documento reenviado não seja reconhecido de novo) só é usado quando
+ANONIMIZADOR_CACHE_OCR_DISCO indica um número máximo de páginas.
+
+Requer o Tesseract com os dados do idioma (ex.: apt install tesseract-ocr
+tesseract-ocr-por; TESSDATA_PREFIX se estiverem fora do caminho padrão). Sem
+ele, as páginas sem texto são apenas informadas em "paginas_sem_texto".
+"""
+
+import contextlib
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+logger = logging.getLogger("anonimizador")
+
+OCR_ATIVO_PADRAO = os.environ.get("ANONIMIZADOR_OCR", "1") == "1"
+CARACTERES_MINIMOS_OCR_PADRAO = int(os.environ.get("ANONIMIZADOR_OCR_CARACTERES_MINIMOS", "20"))
+IDIOMA_OCR_PADRAO = os.environ.get("ANONIMIZADOR_OCR_IDIOMA", "por")
+DPI_OCR_PADRAO = int(os.environ.get("ANONIMIZADOR_OCR_DPI", "300"))
+# 0 = número de núcleos; 1 = OCR no próprio processo
+NUM_TRABALHADORES_OCR_PADRAO = int(os.environ.get("ANONIMIZADOR_TRABALHADORES_OCR", "0"))
+LIMITE_ITENS_MEMORIA_OCR_PADRAO = 256
+# Máximo de páginas no SQLite; 0 (padrão) desativa o nível em disco, que guardaria texto não anonimizado
+LIMITE_ITENS_DISCO_OCR_PADRAO = int(os.environ.get("ANONIMIZADOR_CACHE_OCR_DISCO", "0"))
+# O mesmo diretório de pacote_reconhecedores.DIR_CACHE_PADRAO, sem importar o Presidio nos processos de extração
+DIR_CACHE_OCR_PADRAO = os.environ.get(
+    "ANONIMIZADOR_DIR_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+NOME_ARQUIVO_BANCO_OCR = "ocr_paginas.sqlite3"
+# Incrementar quando a forma de gerar o texto reconhecido mudar
+VERSAO_CACHE_OCR = 1
+
+# set_small_glyph_heights é uma opção global do PyMuPDF; a trava impede que uma sessão do Streamlit
+# a restaure no meio da extração de caixas de outra
+_TRAVA_ALTURAS_GLIFOS = threading.Lock()
+
+# Caixas dos caracteres de uma página, na ordem do texto de get_text(): (n, 4) com x0, y0, x1, y1
+# (NaN nas quebras de linha) e (n, 2) com (bloco, linha)
+CaixasPagina = Tuple[np.ndarray, np.ndarray]
+_SEM_CAIXA = (np.nan, np.nan, np.nan, np.nan)
+
+
+@contextlib.contextmanager
+def _alturas_corpo_fonte():
+    """
+    Liga set_small_glyph_heights (caixas com a altura do corpo da fonte, para a tarja de
+    redacao_pdf.py cobrir só a própria linha) e restaura o valor anterior na saída.
+    A opção vale no momento da extração, inclusive de um TextPage criado antes.
+    """
+    with _TRAVA_ALTURAS_GLIFOS:
+        anterior = fitz.TOOLS.set_small_glyph_heights()
+        fitz.TOOLS.set_small_glyph_heights(True)
+        try:
+            yield
+        finally:
+            fitz.TOOLS.set_small_glyph_heights(anterior)
+
+
+@functools.lru_cache(maxsize=1)
+def tesseract_disponivel() -> bool:
+    """Se o PyMuPDF encontra os dados do Tesseract (necessários para o OCR)."""
+    try:
+        fitz.get_tessdata()
+        return True
+    except Exception:  # RuntimeError sem Tesseract; versões antigas do PyMuPDF não têm get_tessdata
+        return False
+
+
+def precisa_ocr(texto: str, caracteres_minimos: int = CARACTERES_MINIMOS_OCR_PADRAO) -> bool:
+    """Se a camada de texto da página está vazia ou abaixo do mínimo de caracteres."""
+    return len("".join(texto.split())) < caracteres_minimos
+
+
+def textpage_ocr(pagina, idioma: str = IDIOMA_OCR_PADRAO, dpi: int = DPI_OCR_PADRAO):
+    """TextPage com o OCR da página inteira; get_text(textpage=...) dá o mesmo texto usado na análise."""
+    return pagina.get_textpage_ocr(language=idioma, dpi=dpi, full=True)
+
+
+def caixas_caracteres(pagina, textpage=None) -> CaixasPagina:
+    """
+    Caixas dos caracteres de page.get_text() (ou do TextPage do OCR). O texto de
+    get_text("rawdict") concatenado linha a linha é idêntico ao de get_text(), então as
+    posições coincidem com os offsets do texto analisado. As caixas têm a altura do corpo
+    da fonte (ver _alturas_corpo_fonte).
+    """
+    with _alturas_corpo_fonte():
+        blocos = pagina.get_text("rawdict", textpage=textpage)["blocks"]
+    coordenadas, linhas = [], []
+    for numero_bloco, bloco in enumerate(blocos):
+        if bloco["type"] != 0:
+            continue
+        for numero_linha, linha in enumerate(bloco["lines"]):
+            for trecho in linha["spans"]:
+                for caractere in trecho["chars"]:
+                    coordenadas.append(caractere["bbox"])
+                    linhas.append((numero_bloco, numero_linha))
+            coordenadas.append(_SEM_CAIXA)
+            linhas.append((numero_bloco, numero_linha))
+    return (np.array(coordenadas, dtype=np.float64).reshape(-1, 4),
+            np.array(linhas, dtype=np.int32).reshape(-1, 2))
+
+
+def hash_pagina(documento_pdf, numero: int) -> str:
+    """SHA-256 do que é desenhado na página: dimensões, operadores e bytes das imagens e XObjects."""
+    pagina = documento_pdf[numero]
+    sha = hashlib.sha256(f"{tuple(pagina.rect)}|{pagina.rotation}".encode("ascii"))
+    sha.update(pagina.read_contents())
+    for xref in [imagem[0] for imagem in pagina.get_images(full=True)] + [xobjeto[0] for xobjeto in pagina.get_xobjects()]:
+        sha.update(documento_pdf.xref_stream_raw(xref) or b"")
+    return sha.hexdigest()
+
+
+def _pagina_isolada(documento_pdf, numero: int) -> bytes:
+    """A página `numero` como um PDF de uma página, para enviar a um processo trabalhador."""
+    with fitz.open() as documento_pagina:
+        documento_pagina.insert_pdf(documento_pdf, from_page=numero, to_page=numero)
+        return documento_pagina.tobytes(garbage=1)
+
+
+def _reconhecer_pagina(argumentos) -> Tuple[Optional[str], Optional[CaixasPagina], float]:
+    """(texto reconhecido e caixas dos caracteres, ou None em caso de falha, tempo_s); executado no processo trabalhador."""
+    dados_pagina, idioma, dpi = argumentos
+    inicio = time.perf_counter()
+    try:
+        with fitz.open(stream=dados_pagina, filetype="pdf") as documento_pdf:
+            pagina = documento_pdf[0]
+            textpage = textpage_ocr(pagina, idioma, dpi)
+            texto = pagina.get_text(textpage=textpage)
+            caixas = caixas_caracteres(pagina, textpage)
+    except Exception as e:
+        logger.warning("Falha no OCR de uma página: %s", e)
+        texto, caixas = None, None
+    return texto, caixas, time.perf_counter() - inicio
+
+
+class CacheOcr:
+    """
+    LRU em memória (texto reconhecido e caixas dos caracteres de cada página) na frente de
+    um banco SQLite (WAL) opcional, só com o texto.
+    """
+
+    def __init__(self,
+                 dir_cache: Optional[str] = DIR_CACHE_OCR_PADRAO,
+                 limite_itens_memoria: int = LIMITE_ITENS_MEMORIA_OCR_PADRAO,
+                 limite_itens_disco: int = LIMITE_ITENS_DISCO_OCR_PADRAO):
+        """Com `dir_cache` None ou `limite_itens_disco` 0, só o nível em memória é usado."""
+        self.limite_itens_memoria = limite_itens_memoria
+        self.limite_itens_disco = limite_itens_disco
+        self._memoria: "OrderedDict[str, str]" = OrderedDict()
+        # Só em memória: servem à geração do PDF com tarjas na mesma sessão
+        self._caixas: "OrderedDict[str, CaixasPagina]" = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self._conexao = None
+        if dir_cache and limite_itens_disco > 0:
+            try:
+                os.makedirs(dir_cache, exist_ok=True)
+                self._conexao = sqlite3.connect(os.path.join(dir_cache, NOME_ARQUIVO_BANCO_OCR),
+                                                check_same_thread=False, timeout=5)
+                self._conexao.execute("PRAGMA journal_mode=WAL")
+                self._conexao.execute("CREATE TABLE IF NOT EXISTS paginas ("
+                                      "chave TEXT PRIMARY KEY, texto TEXT NOT NULL, usado_em REAL NOT NULL)")
+                self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_paginas_usado_em ON paginas (usado_em)")
+                self._conexao.commit()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Cache de OCR em disco indisponível (%s); usando só a memória.", e)
+                self._conexao = None
+
+    @staticmethod
+    def chave(hash_conteudo: str, idioma: str, dpi: int) -> str:
+        return hashlib.sha256(f"{VERSAO_CACHE_OCR}|{idioma}|{dpi}|{hash_conteudo}".encode("ascii")).hexdigest()
+
+    def _guardar_memoria(self, chave: str, texto: str):
+        self._memoria[chave] = texto
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.limite_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def obter(self, chave: str) -> Optional[str]:
+        with self._trava:
+            texto = self._memoria.get(chave)
+            if texto is not None:
+                self._memoria.move_to_end(chave)
+            elif self._conexao is not None:
+                try:
+                    linha = self._conexao.execute("SELECT texto FROM paginas WHERE chave = ?", (chave,)).fetchone()
+                    if linha is not None:
+                        texto = linha[0]
+                        self._conexao.execute("UPDATE paginas SET usado_em = ? WHERE chave = ?", (time.time(), chave))
+                        self._conexao.commit()
+                        self._guardar_memoria(chave, texto)
+                except sqlite3.Error as e:
+                    logger.warning("Falha ao ler o cache de OCR: %s", e)
+            if texto is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+            return texto
+
+    def guardar(self, chave: str, texto: str):
+        with self._trava:
+            self._guardar_memoria(chave, texto)
+            if self._conexao is None:
+                return
+            try:
+                self._conexao.execute("INSERT OR REPLACE INTO paginas VALUES (?, ?, ?)", (chave, texto, time.time()))
+                self._conexao.execute(
+                    "DELETE FROM paginas WHERE chave IN (SELECT chave FROM paginas "
+                    "ORDER BY usado_em DESC LIMIT -1 OFFSET ?)", (self.limite_itens_disco,))
+                self._conexao.commit()
+            except sqlite3.Error as e:
+                logger.warning("Falha ao gravar o cache de OCR: %s", e)
+
+    def guardar_caixas(self, chave: str, caixas: CaixasPagina):
+        with self._trava:
+            self._caixas[chave] = caixas
+            self._caixas.move_to_end(chave)
+            while len(self._caixas) > self.limite_itens_memoria:
+                self._caixas.popitem(last=False)
+
+    def obter_caixas(self, chave: str) -> Optional[CaixasPagina]:
+        """Caixas dos caracteres do OCR da página, se ela foi reconhecida neste processo."""
+        with self._trava:
+            caixas = self._caixas.get(chave)
+            if caixas is not None:
+                self._caixas.move_to_end(chave)
+            return caixas
+
+    def tem_caixas(self) -> bool:
+        with self._trava:
+            return bool(self._caixas)
+
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens_memoria": len(self._memoria),
+                    "itens_caixas": len(self._caixas), "disco": self._conexao is not None}
+
+
+@functools.lru_cache(maxsize=1)
+def obter_cache_ocr() -> CacheOcr:
+    """Cache compartilhado do processo, aberto no primeiro uso (não nos processos de extração)."""
+    return CacheOcr()
+
+
+class ReconhecedorOcr:
+    """
+    Completa os lotes de extracao_pdf.iterar_lotes_paginas com o OCR das páginas sem
+    texto. Use como gerenciador de contexto: o pool de processos é criado no primeiro
+    lote que precisa dele e encerrado na saída.
+    """
+
+    def __init__(self,
+                 ativo: bool = OCR_ATIVO_PADRAO,
+                 caracteres_minimos: int = CARACTERES_MINIMOS_OCR_PADRAO,
+                 idioma: str = IDIOMA_OCR_PADRAO,
+                 dpi: int = DPI_OCR_PADRAO,
+                 num_trabalhadores: int = NUM_TRABALHADORES_OCR_PADRAO,
+                 cache: Optional[CacheOcr] = None):
+        """Sem `cache`, usa o cache compartilhado (obter_cache_ocr)."""
+        self.ativo = ativo and tesseract_disponivel()
+        self.caracteres_minimos = caracteres_minimos
+        self.idioma = idioma
+        self.dpi = dpi
+        self.num_trabalhadores = num_trabalhadores or os.cpu_count() or 1
+        self.cache = cache if cache is not None else (obter_cache_ocr() if self.ativo else None)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _reconhecer(self, argumentos):
+        if self.num_trabalhadores <= 1:
+            return map(_reconhecer_pagina, argumentos)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.num_trabalhadores,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor.map(_reconhecer_pagina, argumentos)
+
+    def completar_lote(self, documento_pdf, lote: Dict) -> Dict:
+        """
+        Substitui, em lote["paginas"], o texto das páginas sem camada de texto pelo OCR
+        (somando o tempo em lote["tempos_s"]) e acrescenta "paginas_ocr" e
+        "paginas_sem_texto" (números das páginas, base 0).
+        """
+        lote["paginas_ocr"], lote["paginas_sem_texto"] = [], []
+        pendentes = []
+        for indice, texto in enumerate(lote["paginas"]):
+            if not precisa_ocr(texto, self.caracteres_minimos):
+                continue
+            numero = lote["pagina_inicial"] + indice
+            if not self.ativo:
+                lote["paginas_sem_texto"].append(numero)
+                continue
+            chave = self.cache.chave(hash_pagina(documento_pdf, numero), self.idioma, self.dpi)
+            texto_ocr = self.cache.obter(chave)
+            if texto_ocr is None:
+                pendentes.append((indice, numero, chave))
+            else:
+                lote["paginas"][indice] = texto_ocr
+                lote["paginas_ocr"].append(numero)
+
+        if pendentes:
+            argumentos = [(_pagina_isolada(documento_pdf, numero), self.idioma, self.dpi) for _, numero, _ in pendentes]
+            for (indice, numero, chave), (texto_ocr, caixas, tempo) in zip(pendentes, self._reconhecer(argumentos)):
+                lote["tempos_s"][indice] += tempo
+                if texto_ocr is None:
+                    lote["paginas_sem_texto"].append(numero)
+                    continue
+                lote["paginas"][indice] = texto_ocr
+                lote["paginas_ocr"].append(numero)
+                self.cache.guardar(chave, texto_ocr)
+                self.cache.guardar_caixas(chave, caixas)
+            lote["paginas_ocr"].sort()
+            lote["paginas_sem_texto"].sort()
+        return lote
@@ -0,0 +1,216 @@
+# Nome do arquivo: pacote_reconhecedores.py
+"""
+Pacote pré-compilado de reconhecedores, persistido em disco para acelerar a
+inicialização (cold start) do Streamlit/HF Spaces e da versão Gradio.
+
+A montagem dos reconhecedores (trie de sobrenomes, alternação de termos,
+scanner de identificadores, deny-lists do Presidio) é feita uma vez e gravada
+com pickle em um artefato versionado. O nome do artefato carrega a assinatura
+SHA-256 das listas de origem (o conteúdo dos .txt e das listas estáticas), da
+configuração dos reconhecedores, do código-fonte dos módulos envolvidos e das
+versões instaladas do presidio_analyzer e do regex (o pickle guarda objetos e
+regexes compiladas dessas bibliotecas): qualquer mudança em um deles gera outra
+assinatura e o pacote é reconstruído automaticamente na próxima inicialização.
+
+O arquivo só é lido de um diretório de cache local escrito pela própria
+aplicação (pickle não deve ser usado com arquivos de origem desconhecida).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from importlib import metadata
+
+from presidio_analyzer import PatternRecognizer
+from presidio_analyzer.pattern import Pattern
+
+import reconhecedores
+from reconhecedores import (
+    FORMATOS_IDENTIFICADORES_NUMERICOS,
+    ReconhecedorIdentificadoresNumericos,
+    ReconhecedorListaTermos,
+    ReconhecedorSobrenomes,
+)
+
+logger = logging.getLogger("anonimizador")
+
+# Incrementar quando o formato do artefato mudar de forma incompatível
+VERSAO_PACOTE = 1
+# Bibliotecas cujos objetos vão no pickle: outra versão instalada invalida o pacote
+BIBLIOTECAS_PACOTE = ("presidio_analyzer", "regex")
+DIR_CACHE_PADRAO = os.environ.get(
+    "ANONIMIZADOR_DIR_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+
+
+def construir_reconhecedores(termos_safe_location,
+                             termos_legal_header,
+                             lista_sobrenomes,
+                             termos_estado_civil,
+                             termos_organizacoes_conhecidas):
+    """Monta a lista de reconhecedores customizados registrados no AnalyzerEngine."""
+    lista_reconhecedores = []
+
+    # Reconhecedor para Locais Seguros (Estados e Capitais)
+    if termos_safe_location:
+        lista_reconhecedores.append(PatternRecognizer(
+            supported_entity="SAFE_LOCATION",
+            name="SafeLocationRecognizer",
+            deny_list=termos_safe_location,
+            supported_language="pt",
+            deny_list_score=0.99
+        ))
+
+    # Reconhecedor para Cabeçalhos Legais
+    if termos_legal_header:
+        lista_reconhecedores.append(PatternRecognizer(
+            supported_entity="LEGAL_HEADER",
+            name="LegalHeaderRecognizer",
+            deny_list=termos_legal_header,
+            supported_language="pt",
+            deny_list_score=0.99
+        ))
+
+    # Reconhecedor único para identificadores numéricos: CPF, OAB_NUMBER, CEP_NUMBER,
+    # CNH, SIAPE, CI, CIN e ID_DOCUMENTO (NB, IDs PJe, RG, processo CNJ, RNM, CRM).
+    # Os formatos e scores ficam em reconhecedores.FORMATOS_IDENTIFICADORES_NUMERICOS;
+    # o texto é percorrido uma única vez e cada sequência numérica é testada só
+    # contra os formatos compatíveis.
+    lista_reconhecedores.append(ReconhecedorIdentificadoresNumericos(
+        FORMATOS_IDENTIFICADORES_NUMERICOS,
+        name="IdentificadoresNumericosRecognizer",
+        supported_language="pt"
+    ))
+
+    # Reconhecedor para ESTADO_CIVIL e ORGANIZACOES_CONHECIDAS
+    # (listas deduplicadas e compiladas em uma única alternação, do termo mais longo para o mais curto)
+    listas_termos = {}
+    if termos_estado_civil:
+        listas_termos["ESTADO_CIVIL"] = (termos_estado_civil, 0.99)
+    if termos_organizacoes_conhecidas:
+        listas_termos["ORGANIZACAO_CONHECIDA"] = (termos_organizacoes_conhecidas, 0.99)
+    if listas_termos:
+        lista_reconhecedores.append(ReconhecedorListaTermos(
+            listas_termos,
+            name="EstadoCivilOrganizacaoConhecidaRecognizer",
+            supported_language="pt"
+        ))
+
+    # Reconhecedor para Sobrenomes Frequentes (da lista externa)
+    # (trie carregada uma única vez; o texto é percorrido em uma só passada)
+    if lista_sobrenomes:
+        lista_reconhecedores.append(ReconhecedorSobrenomes(
+            lista_sobrenomes,
+            supported_entity="PERSON",
+            name="BrazilianCommonSurnamesRecognizer",
+            supported_language="pt",
+            score=0.97
+        ))
+
+    # Reconhecedor para termos "matrícula" e "siape" (substituir por ***)
+    lista_reconhecedores.append(PatternRecognizer(
+        supported_entity="MATRICULA_SIAPE",
+        name="MatriculaSiapeRecognizer",
+        patterns=[Pattern(name="matricula_siape", regex=r"(?i)\b(matr[íi]cula|siape)\b", score=0.95)],
+        supported_language="pt"
+    ))
+
+    # Compila as regexes agora, para que o pacote salvo já saia pronto para uso
+    for reconhecedor in lista_reconhecedores:
+        reconhecedor.analyze("", entities=reconhecedor.supported_entities)
+    return lista_reconhecedores
+
+
+def versoes_bibliotecas_pacote() -> dict:
+    """Versão instalada de cada biblioteca de BIBLIOTECAS_PACOTE (None se não for encontrada)."""
+    versoes = {}
+    for biblioteca in BIBLIOTECAS_PACOTE:
+        try:
+            versoes[biblioteca] = metadata.version(biblioteca)
+        except metadata.PackageNotFoundError:
+            versoes[biblioteca] = None
+    return versoes
+
+
+def calcular_assinatura_pacote(*listas) -> str:
+    """SHA-256 das listas de origem, da configuração, do código dos reconhecedores e das versões das bibliotecas."""
+    sha = hashlib.sha256()
+    sha.update(f"versao={VERSAO_PACOTE}".encode())
+    sha.update(json.dumps(versoes_bibliotecas_pacote(), sort_keys=True).encode("utf-8"))
+    sha.update(json.dumps(listas, ensure_ascii=False).encode("utf-8"))
+    sha.update(json.dumps(FORMATOS_IDENTIFICADORES_NUMERICOS, ensure_ascii=False).encode("utf-8"))
+    for modulo in (reconhecedores.__file__, __file__):
+        with open(modulo, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def _remover_pacotes_antigos(dir_cache: str, caminho_atual: str) -> None:
+    """Apaga os pacotes de outras assinaturas/versões, que nunca mais serão lidos."""
+    nome_atual = os.path.basename(caminho_atual)
+    for nome in os.listdir(dir_cache):
+        if nome.startswith("pacote_reconhecedores_v") and nome.endswith(".pkl") and nome != nome_atual:
+            try:
+                os.remove(os.path.join(dir_cache, nome))
+            except OSError as e:
+                logger.warning("Não foi possível apagar o pacote antigo '%s': %s", nome, e)
+
+
+def carregar_pacote_reconhecedores(termos_safe_location,
+                                   termos_legal_header,
+                                   lista_sobrenomes,
+                                   termos_estado_civil,
+                                   termos_organizacoes_conhecidas,
+                                   dir_cache: str = None) -> dict:
+    """
+    Carrega o pacote de reconhecedores do disco ou o reconstrói (e salva) se não existir.
+
+    Retorna um dicionário com as chaves "reconhecedores", "assinatura",
+    "origem" ("cache" ou "construido") e "tempo_s".
+    """
+    inicio = time.perf_counter()
+    listas = (termos_safe_location, termos_legal_header, lista_sobrenomes,
+              termos_estado_civil, termos_organizacoes_conhecidas)
+    assinatura = calcular_assinatura_pacote(*listas)
+    dir_cache = dir_cache or DIR_CACHE_PADRAO
+    caminho = os.path.join(dir_cache, f"pacote_reconhecedores_v{VERSAO_PACOTE}_{assinatura[:16]}.pkl")
+
+    try:
+        with open(caminho, "rb") as f:
+            conteudo = pickle.load(f)
+        if conteudo.get("assinatura") == assinatura:
+            return {"reconhecedores": conteudo["reconhecedores"], "assinatura": assinatura,
+                    "origem": "cache", "tempo_s": time.perf_counter() - inicio}
+        logger.warning("Pacote de reconhecedores '%s' com assinatura divergente; reconstruindo.", caminho)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Não foi possível ler o pacote de reconhecedores '%s' (%s); reconstruindo.", caminho, e)
+
+    lista_reconhecedores = construir_reconhecedores(*listas)
+    caminho_temporario = None
+    try:
+        os.makedirs(dir_cache, exist_ok=True)
+        # Grava em arquivo temporário e renomeia, para nunca deixar um pacote pela metade
+        descritor, caminho_temporario = tempfile.mkstemp(dir=dir_cache, suffix=".tmp")
+        with os.fdopen(descritor, "wb") as f:
+            pickle.dump({"assinatura": assinatura, "reconhecedores": lista_reconhecedores}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(caminho_temporario, caminho)
+    except Exception as e:
+        # Sem permissão de escrita (ex.: sistema de arquivos somente leitura): segue sem cache
+        logger.warning("Não foi possível salvar o pacote de reconhecedores em '%s': %s", dir_cache, e)
+        if caminho_temporario is not None:
+            try:
+                os.remove(caminho_temporario)
+            except OSError:
+                pass
+    else:
+        _remover_pacotes_antigos(dir_cache, caminho)
+    return {"reconhecedores": lista_reconhecedores, "assinatura": assinatura,
+            "origem": "construido", "tempo_s": time.perf_counter() - inicio}
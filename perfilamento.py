@@ -0,0 +1,136 @@
+# Nome do arquivo: perfilamento.py
+"""
+Perfilamento opcional do AnalyzerEngine: tempo, número de chamadas, candidatos
+produzidos e resultados finais (após o limiar de score) por reconhecedor e para
+a etapa de NLP (spaCy).
+
+Ativado pela variável de ambiente ANONIMIZADOR_PERFILAMENTO=1 ou chamando
+analisar_com_perfil diretamente. Os reconhecedores são envolvidos uma única vez;
+fora de analisar_com_perfil o invólucro apenas repassa a chamada, então o
+custo com o perfilamento desativado é desprezível.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+from presidio_analyzer import RecognizerResult
+
+PERFILAMENTO_ATIVO = os.environ.get("ANONIMIZADOR_PERFILAMENTO", "").strip().lower() in ("1", "true", "sim", "on")
+NOME_ETAPA_NLP = "NLP (spaCy)"
+NOME_ETAPA_OUTROS = "Outros (contexto, deduplicação, limiar)"
+
+# Perfil em coleta na chamada atual (isolado por thread/sessão do Streamlit)
+_perfil_atual = contextvars.ContextVar("perfil_analise_atual", default=None)
+
+
+class PerfilAnalise:
+    """Métricas coletadas durante uma chamada de analyzer.analyze."""
+
+    def __init__(self):
+        self.etapas: Dict[str, Dict] = {}
+        self.tempo_total_s = 0.0
+
+    def _etapa(self, nome: str) -> Dict:
+        return self.etapas.setdefault(nome, {"tempo_s": 0.0, "chamadas": 0, "candidatos": 0, "resultados_finais": 0})
+
+    def registrar(self, nome: str, tempo_s: float, candidatos: int):
+        etapa = self._etapa(nome)
+        etapa["tempo_s"] += tempo_s
+        etapa["chamadas"] += 1
+        etapa["candidatos"] += candidatos
+
+    def atribuir_resultados_finais(self, resultados: List[RecognizerResult]):
+        """Conta quantos resultados de cada reconhecedor sobreviveram ao limiar e à deduplicação."""
+        for resultado in resultados:
+            metadados = resultado.recognition_metadata or {}
+            nome = metadados.get(RecognizerResult.RECOGNIZER_NAME_KEY)
+            if nome:
+                self._etapa(nome)["resultados_finais"] += 1
+
+    def metricas(self) -> List[Dict]:
+        """Métricas por etapa, da mais lenta para a mais rápida (inclui o tempo fora das etapas)."""
+        metricas = [{"etapa": nome, "tempo_ms": round(etapa["tempo_s"] * 1000, 2), "chamadas": etapa["chamadas"],
+                     "candidatos": etapa["candidatos"], "resultados_finais": etapa["resultados_finais"]}
+                    for nome, etapa in self.etapas.items()]
+        tempo_etapas = sum(etapa["tempo_s"] for etapa in self.etapas.values())
+        metricas.append({"etapa": NOME_ETAPA_OUTROS, "tempo_ms": round(max(self.tempo_total_s - tempo_etapas, 0.0) * 1000, 2),
+                         "chamadas": 1, "candidatos": 0, "resultados_finais": 0})
+        return sorted(metricas, key=lambda metrica: metrica["tempo_ms"], reverse=True)
+
+    def como_linhas(self) -> List[Dict]:
+        """Linhas com rótulos de exibição, prontas para um DataFrame."""
+        return [{"Etapa": m["etapa"], "Tempo (ms)": m["tempo_ms"], "Chamadas": m["chamadas"],
+                 "Candidatos": m["candidatos"], "Resultados finais": m["resultados_finais"]}
+                for m in self.metricas()]
+
+    def como_dict(self, **contexto) -> Dict:
+        return {**contexto, "tempo_total_ms": round(self.tempo_total_s * 1000, 2), "etapas": self.metricas()}
+
+
+def _envolver(nome: str, funcao, contar_candidatos):
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        perfil = _perfil_atual.get()
+        if perfil is None:
+            return funcao(*args, **kwargs)
+        inicio = time.perf_counter()
+        retorno = funcao(*args, **kwargs)
+        perfil.registrar(nome, time.perf_counter() - inicio, contar_candidatos(retorno))
+        return retorno
+    return envolvida
+
+
+def instrumentar_analyzer(analyzer):
+    """Envolve (uma única vez) cada reconhecedor registrado e o motor de NLP do analyzer."""
+    if getattr(analyzer, "_perfilamento_instrumentado", False):
+        return analyzer
+    for reconhecedor in analyzer.registry.recognizers:
+        reconhecedor.analyze = _envolver(reconhecedor.name, reconhecedor.analyze,
+                                         lambda resultados: len(resultados or []))
+    analyzer.nlp_engine.process_text = _envolver(NOME_ETAPA_NLP, analyzer.nlp_engine.process_text,
+                                                 lambda artefatos: len(artefatos.entities))
+    analyzer._perfilamento_instrumentado = True
+    return analyzer
+
+
+def analisar_com_perfil(analyzer, analisar=None, **kwargs):
+    """
+    Executa analyzer.analyze(**kwargs) coletando o perfil. Retorna (resultados, PerfilAnalise).
+
+    `analisar` permite trocar a chamada por outra que use o mesmo analyzer
+    (ex.: analise_blocos.analisar_em_blocos); recebe (analyzer, **kwargs).
+    """
+    instrumentar_analyzer(analyzer)
+    perfil = PerfilAnalise()
+    token = _perfil_atual.set(perfil)
+    inicio = time.perf_counter()
+    try:
+        resultados = analisar(analyzer, **kwargs) if analisar else analyzer.analyze(**kwargs)
+    finally:
+        perfil.tempo_total_s = time.perf_counter() - inicio
+        _perfil_atual.reset(token)
+    perfil.atribuir_resultados_finais(resultados)
+    return resultados, perfil
+
+
+def _logger_perfil() -> logging.Logger:
+    logger = logging.getLogger("anonimizador.perfilamento")
+    if not logger.handlers:
+        # Uma linha JSON por análise, independente da configuração de logging do Streamlit/Gradio
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def registrar_perfil_json(perfil: PerfilAnalise, **contexto):
+    """Escreve o perfil como uma linha de log JSON estruturado."""
+    _logger_perfil().info(json.dumps({"evento": "perfil_analise", **perfil.como_dict(**contexto)}, ensure_ascii=False))
@@ -0,0 +1,205 @@
+# Nome do arquivo: pos_analise.py
+"""
+Etapas aplicadas aos resultados do AnalyzerEngine antes do AnonymizerEngine.
+
+Assim como reconhecedores.py, este módulo não depende do Streamlit e é usado
+tanto pelo anonimizador.py quanto pela versão Gradio.
+"""
+
+import heapq
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+# Entidades que podem ser descartadas quando o texto detectado é um termo comum
+ENTIDADES_FILTRADAS_POR_TERMOS_COMUNS = ("PERSON", "LOCATION")
+
+# Listas que existem para proteger o texto de PERSON/LOCATION (ver resolver_conflitos)
+ENTIDADES_PROTETORAS = ("SAFE_LOCATION", "LEGAL_HEADER", "ORGANIZACAO_CONHECIDA")
+ENTIDADES_PROTEGIDAS = ENTIDADES_FILTRADAS_POR_TERMOS_COMUNS
+# Desempate entre entidades diferentes com o mesmo score (a primeira vence);
+# as não listadas vêm depois, em ordem alfabética
+PRIORIDADE_ENTIDADES = (
+    "SAFE_LOCATION", "LEGAL_HEADER", "ORGANIZACAO_CONHECIDA",
+    "CPF", "CNH", "CIN", "CI", "RG", "SIAPE", "MATRICULA_SIAPE", "OAB_NUMBER",
+    "EMAIL_ADDRESS", "PHONE_NUMBER", "CEP_NUMBER", "PERSON", "LOCATION",
+    "ID_DOCUMENTO", "DATE_TIME", "ESTADO_CIVIL", "LEGAL_OR_COMMON_TERM",
+)
+_POSICAO_PRIORIDADE = {entidade: posicao for posicao, entidade in enumerate(PRIORIDADE_ENTIDADES)}
+# Separação que une duas ocorrências da mesma entidade (a mesma do AnonymizerEngine)
+_SO_ESPACOS = re.compile(r"^( )+$")
+
+
+def normalizar_para_comparacao(texto: str) -> str:
+    """Casefold, remoção de acentos e espaços colapsados: 'JUSTIÇA  Federal' -> 'justica federal'."""
+    decomposto = unicodedata.normalize("NFD", texto.casefold())
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.split())
+
+
+def construir_conjunto_termos_comuns(termos: Iterable[str]) -> frozenset:
+    """Pré-calcula o conjunto (frozenset) de termos comuns já normalizados."""
+    return frozenset(t for t in (normalizar_para_comparacao(termo) for termo in termos) if t)
+
+
+def filtrar_termos_comuns(
+    texto: str,
+    resultados: List[RecognizerResult],
+    termos_comuns: frozenset,
+    entidades: Iterable[str] = ENTIDADES_FILTRADAS_POR_TERMOS_COMUNS,
+) -> List[RecognizerResult]:
+    """
+    Remove resultados PERSON/LOCATION cujo texto normalizado está em `termos_comuns`.
+
+    Custa uma consulta em hash por resultado candidato, em vez de compilar a
+    lista de termos comuns em mais regexes.
+    """
+    if not termos_comuns:
+        return resultados
+    entidades = frozenset(entidades)
+    return [
+        r for r in resultados
+        if r.entity_type not in entidades
+        or normalizar_para_comparacao(texto[r.start:r.end]) not in termos_comuns
+    ]
+
+
+def _recortar(texto: str, resultado: RecognizerResult, inicio: int, fim: int) -> Optional[RecognizerResult]:
+    """Cópia de `resultado` em [inicio, fim) sem espaços nas pontas, ou None se não sobrar letra nem dígito."""
+    while inicio < fim and texto[inicio].isspace():
+        inicio += 1
+    while fim > inicio and texto[fim - 1].isspace():
+        fim -= 1
+    if not any(caractere.isalnum() for caractere in texto[inicio:fim]):
+        return None
+    return RecognizerResult(resultado.entity_type, inicio, fim, resultado.score,
+                            resultado.analysis_explanation, resultado.recognition_metadata)
+
+
+def _protege(a: RecognizerResult, b: RecognizerResult) -> bool:
+    return a.entity_type in ENTIDADES_PROTETORAS and b.entity_type in ENTIDADES_PROTEGIDAS
+
+
+def _chave_prioridade(resultado: RecognizerResult) -> tuple:
+    return (-resultado.score, _POSICAO_PRIORIDADE.get(resultado.entity_type, len(PRIORIDADE_ENTIDADES)),
+            resultado.entity_type)
+
+
+def _contem(a: RecognizerResult, b: RecognizerResult) -> bool:
+    return a.start <= b.start and a.end >= b.end
+
+
+def _vence(a: RecognizerResult, b: RecognizerResult, contencao: bool) -> bool:
+    """True se `a` tem precedência sobre `b` (entidades diferentes, intervalos sobrepostos)."""
+    if _protege(a, b) or _protege(b, a):
+        termo, protegido = (a, b) if _protege(a, b) else (b, a)
+        # O termo protetor perde só quando está dentro de um PERSON/LOCATION maior
+        # (ex.: "Bahia" em "Rua Bahia 45"), que fica inteiro
+        termo_vence = not (_contem(protegido, termo) and (protegido.start, protegido.end) != (termo.start, termo.end))
+        return termo_vence == (termo is a)
+    if contencao:
+        # O intervalo que contém o outro vence; nos mesmos índices decide a prioridade
+        if (a.start, a.end) != (b.start, b.end):
+            return a.start <= b.start and a.end >= b.end
+        return _chave_prioridade(a) < _chave_prioridade(b)
+    chave_a, chave_b = _chave_prioridade(a), _chave_prioridade(b)
+    if chave_a[0] != chave_b[0]:
+        return chave_a[0] < chave_b[0]
+    if a.end - a.start != b.end - b.start:
+        return a.end - a.start > b.end - b.start
+    return chave_a < chave_b
+
+
+def resolver_conflitos(texto: str,
+                       resultados: List[RecognizerResult]) -> Tuple[List[RecognizerResult], Dict[str, int]]:
+    """
+    Resolve as sobreposições entre resultados, deixando intervalos disjuntos para a anonimização.
+
+    Regras, nesta ordem de precedência:
+
+    1. SAFE_LOCATION, LEGAL_HEADER e ORGANIZACAO_CONHECIDA vencem PERSON e LOCATION
+       quando têm os mesmos índices ou os contêm (o PERSON/LOCATION é removido) e
+       na sobreposição parcial (o PERSON/LOCATION fica com a parte fora do termo).
+       Um PERSON/LOCATION que contém o termo protetor fica inteiro e o termo é
+       descartado: "Rua Bahia 45" continua um endereço, sem "Bahia" exposto.
+    2. Ocorrências da mesma entidade sobrepostas ou separadas só por espaços são
+       unidas em um intervalo, com o maior score.
+    3. Entre entidades diferentes, o intervalo que contém o outro vence; com os
+       mesmos índices, vence o maior score e, no empate, a primeira entidade de
+       PRIORIDADE_ENTIDADES (ex.: CI e CIN no mesmo número).
+    4. Em sobreposição parcial vence o maior score, depois o intervalo mais
+       longo, depois PRIORIDADE_ENTIDADES; o perdedor fica com a parte fora do
+       vencedor.
+
+    Um resultado recortado sem letra nem dígito é removido. Os resultados são
+    percorridos uma vez em ordem de início (O(n log n)); cópias recebem os
+    intervalos recortados ou unidos, sem alterar os objetos de `resultados`.
+
+    Retorna (resultados em ordem de início, contagem com "removidos",
+    "unidos" e "recortados").
+    """
+    contagem = {"removidos": 0, "unidos": 0, "recortados": 0}
+    fila = []
+    for sequencia, resultado in enumerate(resultados):
+        if resultado.end > resultado.start:
+            fila.append((resultado.start, -resultado.end, sequencia, resultado))
+        else:
+            contagem["removidos"] += 1
+    heapq.heapify(fila)
+    sequencia = len(resultados)
+
+    def reenfileirar(resultado: Optional[RecognizerResult]) -> bool:
+        nonlocal sequencia
+        if resultado is None:
+            return False
+        heapq.heappush(fila, (resultado.start, -resultado.end, sequencia, resultado))
+        sequencia += 1
+        return True
+
+    # Intervalos mantidos são disjuntos e crescentes: o atual só pode sobrepor o último
+    mantidos: List[RecognizerResult] = []
+    while fila:
+        atual = heapq.heappop(fila)[3]
+        if not mantidos:
+            mantidos.append(atual)
+            continue
+        ultimo = mantidos[-1]
+        if ultimo.entity_type == atual.entity_type and (
+                atual.start < ultimo.end or _SO_ESPACOS.search(texto[ultimo.end:atual.start])):
+            mantidos[-1] = RecognizerResult(ultimo.entity_type, ultimo.start, max(ultimo.end, atual.end),
+                                            max(ultimo.score, atual.score), ultimo.analysis_explanation,
+                                            ultimo.recognition_metadata)
+            contagem["unidos"] += 1
+            continue
+        if atual.start >= ultimo.end:
+            mantidos.append(atual)
+            continue
+
+        contencao = atual.end <= ultimo.end or (atual.start == ultimo.start)
+        if _vence(ultimo, atual, contencao):
+            # O atual fica com o que passa do fim do último (nada, se estiver contido)
+            if reenfileirar(_recortar(texto, atual, ultimo.end, atual.end)):
+                contagem["recortados"] += 1
+            else:
+                contagem["removidos"] += 1
+            continue
+        # O atual vence: o último fica com o que está antes e depois dele
+        mantidos.pop()
+        antes = _recortar(texto, ultimo, ultimo.start, atual.start)
+        depois = reenfileirar(_recortar(texto, ultimo, atual.end, ultimo.end))
+        if antes is not None:
+            mantidos.append(antes)
+        if antes is not None or depois:
+            contagem["recortados"] += 1
+        else:
+            contagem["removidos"] += 1
+        reenfileirar(atual)  # volta a ser comparado, agora com o novo último
+    return mantidos, contagem
+
+
+def resumo_conflitos(contagem: Dict[str, int]) -> str:
+    """Texto curto com a contagem de resolver_conflitos, para a interface."""
+    return (f"Conflitos entre reconhecedores: {contagem['removidos']} intervalos removidos, "
+            f"{contagem['unidos']} unidos e {contagem['recortados']} recortados.")
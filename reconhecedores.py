@@ -0,0 +1,395 @@
+# Nome do arquivo: reconhecedores.py
+"""
+Reconhecedores Presidio customizados do Anonimizador.
+
+Este módulo não depende do Streamlit, para que possa ser importado tanto pelo
+anonimizador.py quanto por scripts auxiliares (benchmarks, versão Gradio).
+"""
+
+from typing import Dict, List, Tuple
+
+# O PatternRecognizer do Presidio usa o módulo `regex` (e não o `re`); usamos o
+# mesmo motor para que \w e \b tenham exatamente a mesma semântica Unicode.
+import regex
+
+from presidio_analyzer import LocalRecognizer, RecognizerResult
+
+# Divide o texto em sequências alternadas de caracteres de palavra e de não-palavra.
+_PADRAO_TOKENS = regex.compile(r"\w+|\W+")
+_PADRAO_PALAVRA = regex.compile(r"\w+")
+
+# Chave que marca, dentro da trie, o fim de um termo completo.
+_FIM_TERMO = ""
+
+
+def normalizar_termo(termo: str) -> str:
+    """Normaliza um termo de lista: remove espaços nas pontas e colapsa espaços internos."""
+    return " ".join(termo.split())
+
+
+def remover_resultados_contidos(resultados: List[RecognizerResult]) -> List[RecognizerResult]:
+    """
+    Equivalente ao EntityRecognizer.remove_duplicates, mas em O(n log n).
+
+    Descarta duplicados exatos e resultados contidos em outro resultado da mesma
+    entidade com score maior ou igual. A ordem de retorno é a mesma do Presidio
+    (score decrescente, início crescente, maior comprimento primeiro).
+    """
+    unicos = sorted(
+        (r for r in set(resultados) if r.score != 0),
+        key=lambda r: (r.entity_type, r.start, -r.end, -r.score),
+    )
+    mantidos = []
+    # Por entidade: score -> maior fim já visto entre resultados que começam antes
+    maior_fim_por_score = {}
+    entidade_atual = None
+    for resultado in unicos:
+        if resultado.entity_type != entidade_atual:
+            entidade_atual = resultado.entity_type
+            maior_fim_por_score = {}
+        contido = any(
+            score >= resultado.score and fim >= resultado.end
+            for score, fim in maior_fim_por_score.items()
+        )
+        if not contido:
+            mantidos.append(resultado)
+        if resultado.end > maior_fim_por_score.get(resultado.score, -1):
+            maior_fim_por_score[resultado.score] = resultado.end
+    return sorted(mantidos, key=lambda r: (-r.score, r.start, -(r.end - r.start)))
+
+
+def _tokenizar_termo(termo: str) -> tuple:
+    """Quebra um termo em tokens normalizados (minúsculos) de palavra e separador."""
+    return tuple(token.lower() for token in _PADRAO_TOKENS.findall(termo))
+
+
+class ReconhecedorSobrenomes(LocalRecognizer):
+    """
+    Reconhece sobrenomes frequentes em uma única passada pelo texto.
+
+    Substitui o antigo PatternRecognizer com um Pattern por sobrenome
+    (rf"(?i)\\b{re.escape(s)}\\b"), que obrigava o Presidio a percorrer o
+    documento inteiro uma vez para cada linha de sobrenomes_comuns.txt.
+    Aqui a lista é carregada uma única vez em uma trie de tokens (palavras e
+    separadores, em minúsculas) e o texto é percorrido token a token.
+
+    A semântica é a mesma do reconhecedor anterior: comparação sem diferenciar
+    maiúsculas/minúsculas, limites de palavra nas duas pontas e remoção de
+    ocorrências contidas em outra ocorrência maior.
+    """
+
+    def __init__(
+        self,
+        sobrenomes: List[str],
+        supported_entity: str = "PERSON",
+        name: str = "BrazilianCommonSurnamesRecognizer",
+        supported_language: str = "pt",
+        score: float = 0.97,
+    ):
+        self.score = score
+        self.trie = {}
+        # Termos que começam ou terminam com caractere de não-palavra não podem
+        # ser alinhados aos tokens; ficam em uma única regex de apoio.
+        termos_fora_da_trie = []
+        for sobrenome in sobrenomes:
+            tokens = _tokenizar_termo(sobrenome)
+            if not tokens:
+                continue
+            if not _PADRAO_PALAVRA.fullmatch(tokens[0]) or not _PADRAO_PALAVRA.fullmatch(tokens[-1]):
+                termos_fora_da_trie.append(sobrenome)
+                continue
+            no = self.trie
+            for token in tokens:
+                no = no.setdefault(token, {})
+            no[_FIM_TERMO] = True
+
+        self.regex_apoio = None
+        if termos_fora_da_trie:
+            alternativas = "|".join(regex.escape(t) for t in sorted(set(termos_fora_da_trie), key=len, reverse=True))
+            self.regex_apoio = regex.compile(rf"\b(?:{alternativas})\b", flags=regex.IGNORECASE)
+
+        super().__init__(
+            supported_entities=[supported_entity],
+            name=name,
+            supported_language=supported_language,
+        )
+
+    def load(self):
+        pass
+
+    def _encontrar_ocorrencias(self, text: str) -> List[tuple]:
+        """Percorre o texto uma única vez e devolve todos os (início, fim) encontrados."""
+        ocorrencias = []
+        tokens = [(m.start(), m.end(), m.group().lower()) for m in _PADRAO_TOKENS.finditer(text)]
+        trie = self.trie
+        for i, (inicio, _, token) in enumerate(tokens):
+            no = trie.get(token)
+            if no is None:
+                continue
+            j = i
+            while True:
+                if _FIM_TERMO in no:
+                    ocorrencias.append((inicio, tokens[j][1]))
+                j += 1
+                if j >= len(tokens):
+                    break
+                no = no.get(tokens[j][2])
+                if no is None:
+                    break
+        if self.regex_apoio is not None:
+            ocorrencias.extend(m.span() for m in self.regex_apoio.finditer(text))
+        return ocorrencias
+
+    def analyze(self, text: str, entities: List[str], nlp_artifacts=None) -> List[RecognizerResult]:
+        entidade = self.supported_entities[0]
+        if entities and entidade not in entities:
+            return []
+
+        # Mesma regra do EntityRecognizer.remove_duplicates para resultados de
+        # mesmo tipo e score: descarta ocorrências contidas em outra maior.
+        resultados = []
+        maior_fim = -1
+        for inicio, fim in sorted(set(self._encontrar_ocorrencias(text)), key=lambda x: (x[0], -x[1])):
+            if fim <= maior_fim:
+                continue
+            maior_fim = fim
+            resultados.append(
+                RecognizerResult(
+                    entity_type=entidade,
+                    start=inicio,
+                    end=fim,
+                    score=self.score,
+                    recognition_metadata={
+                        RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                        RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                    },
+                )
+            )
+        return resultados
+
+
+class ReconhecedorListaTermos(LocalRecognizer):
+    """
+    Reconhecedor de listas de termos (deny-lists) de uma ou mais entidades.
+
+    Os termos de todas as listas são normalizados, deduplicados (sem diferenciar
+    maiúsculas/minúsculas) e compilados em uma única alternação ordenada do termo
+    mais longo para o mais curto, delimitada por \\b. O texto é percorrido uma
+    só vez e cada ocorrência é reportada com a entidade e o score da lista de
+    origem do termo.
+
+    :param listas: dicionário {entidade: (termos, score)}
+    """
+
+    def __init__(
+        self,
+        listas: Dict[str, Tuple[List[str], float]],
+        name: str = "ListaTermosRecognizer",
+        supported_language: str = "pt",
+    ):
+        # termo normalizado (casefold) -> [(entidade, score), ...]
+        self.origem_termos = {}
+        termos_unicos = {}
+        for entidade, (termos, score) in listas.items():
+            for termo in termos:
+                termo_normalizado = normalizar_termo(termo)
+                if not termo_normalizado:
+                    continue
+                chave = termo_normalizado.casefold()
+                termos_unicos.setdefault(chave, termo_normalizado)
+                origens = self.origem_termos.setdefault(chave, [])
+                if all(e != entidade for e, _ in origens):
+                    origens.append((entidade, score))
+
+        alternativas = "|".join(regex.escape(t) for t in sorted(termos_unicos.values(), key=len, reverse=True))
+        self.regex_termos = regex.compile(rf"\b(?:{alternativas})\b", flags=regex.IGNORECASE) if alternativas else None
+
+        super().__init__(
+            supported_entities=list(listas.keys()),
+            name=name,
+            supported_language=supported_language,
+        )
+
+    def load(self):
+        pass
+
+    def analyze(self, text: str, entities: List[str], nlp_artifacts=None) -> List[RecognizerResult]:
+        resultados = []
+        if self.regex_termos is None:
+            return resultados
+        for match in self.regex_termos.finditer(text):
+            for entidade, score in self.origem_termos.get(match.group().casefold(), []):
+                if entities and entidade not in entities:
+                    continue
+                resultados.append(
+                    RecognizerResult(
+                        entity_type=entidade,
+                        start=match.start(),
+                        end=match.end(),
+                        score=score,
+                        recognition_metadata={
+                            RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                            RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                        },
+                    )
+                )
+        return resultados
+
+
+# Formatos de identificadores numéricos. São os mesmos padrões que antes ficavam
+# espalhados em CustomCpfRecognizer, CustomOabRecognizer, CustomCepRecognizer,
+# CNHRecognizer, SIAPERecognizer, CIRecognizer, CINRecognizer e
+# IdDocumentoRecognizer. Colunas:
+#   (nome do padrão, entidade, regex, score, prefixo, mínimo de dígitos)
+# `prefixo` é a palavra que abre o formato (ex.: "CNH") e `mínimo de dígitos` é
+# o menor número de dígitos de uma ocorrência que começa por um dígito. Um dos
+# dois precisa estar preenchido; o scanner só testa o formato nesses pontos.
+FORMATOS_IDENTIFICADORES_NUMERICOS = [
+    ("CpfRegexPattern", "CPF", r"\b\d{3}\.\d{3}\.\d{3}-\d{2}\b", 0.85, None, 11),
+    ("OabRegexPattern", "OAB_NUMBER", r"\b(?:OAB\s+)?\d{1,6}(?:\.\d{3})?\s*\/\s*[A-Z]{2}\b", 0.85, "OAB", 1),
+    ("CepPattern", "CEP_NUMBER", r"\b(\d{5}-?\d{3}|\d{2}\.\d{3}-?\d{3})\b", 0.80, None, 8),
+    ("cnh_formatado", "CNH", r"\bCNH\s*(?:nº|n\.)?\s*\d{11}\b", 0.98, "CNH", None),
+    ("cnh_apenas_numeros", "CNH", r"\b(?<![\w])\d{11}(?![\w])\b", 0.85, None, 11),
+    ("siape_formatado", "SIAPE", r"\bSIAPE\s*(?:nº|n\.)?\s*\d{7}\b", 0.98, "SIAPE", None),
+    ("siape_apenas_numeros", "SIAPE", r"\b(?<![\w])\d{7}(?![\w])\b", 0.85, None, 7),
+    ("ci_formatado", "CI", r"\bCI\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", 0.98, "CI", None),
+    ("ci_padrao", "CI", r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", 0.90, None, 8),
+    ("cin_formatado", "CIN", r"\bCIN\s*(?:nº|n\.)?\s*[\d.]{7,11}-?\d\b", 0.98, "CIN", None),
+    ("cin_padrao", "CIN", r"\b\d{1,2}\.?\d{3}\.?\d{3}-?\d\b", 0.90, None, 8),
+    ("numero_beneficio_nb_formatado", "ID_DOCUMENTO", r"\bNB\s*\d{1,3}(\.?\d{3}){2}-[\dX]\b", 0.98, "NB", None),
+    ("id_numerico_longo_pje", "ID_DOCUMENTO", r"\b\d{10,25}\b", 0.97, None, 10),
+    ("id_prefixo_numerico", "ID_DOCUMENTO", r"\bID\s*\d{8,12}\b", 0.97, "ID", None),
+    ("numero_rg_completo", "ID_DOCUMENTO", r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+(?:-\dª\s*VIA)?\s*-\s*[A-Z]{2,3}\/[A-Z]{2}\b", 0.98, "RG", None),
+    ("numero_rg_simples", "ID_DOCUMENTO", r"\bRG\s*(?:nº|n\.)?\s*[\d.X-]+\b", 0.97, "RG", None),
+    ("numero_processo_cnj", "ID_DOCUMENTO", r"\b\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}\b", 0.95, None, 20),
+    ("numero_rnm", "ID_DOCUMENTO", r"\bRNM\s*(?:nº|n\.)?\s*[A-Z0-9]{7,15}\b", 0.98, "RNM", None),
+    ("numero_crm", "ID_DOCUMENTO", r"\bCRM\s*[A-Z]{2}\s*-\s*\d{1,6}\b", 0.98, "CRM", None),
+]
+
+# Mesmas flags globais do PatternRecognizer do Presidio
+_FLAGS_PADROES = regex.DOTALL | regex.MULTILINE | regex.IGNORECASE
+_PADRAO_DIGITOS = regex.compile(r"\d+")
+
+
+class ReconhecedorIdentificadoresNumericos(LocalRecognizer):
+    """
+    Reconhece CPF, OAB, CEP, CNH, SIAPE, CI, CIN e ID_DOCUMENTO em uma única passada.
+
+    Uma só regex percorre o texto e encontra os pontos em que um identificador
+    pode começar: sequências de dígitos (com . e -) em início de palavra e os
+    prefixos dos formatos (CNH, SIAPE, RG...). Cada sequência é classificada
+    pela quantidade de dígitos e só os formatos compatíveis são testados naquela
+    posição, de modo que o custo cresce com o número de sequências numéricas do
+    texto, e não com o número de padrões. Padrões idênticos (ci_padrao e
+    cin_padrao) são executados uma única vez e geram as duas entidades.
+
+    Cada padrão mantém a semântica do finditer do PatternRecognizer (sem
+    sobreposição entre ocorrências do mesmo padrão) e, por entidade, a mesma
+    remoção de duplicados e de ocorrências contidas em outras.
+    """
+
+    def __init__(
+        self,
+        formatos: List[tuple] = None,
+        name: str = "IdentificadoresNumericosRecognizer",
+        supported_language: str = "pt",
+    ):
+        formatos = formatos if formatos is not None else FORMATOS_IDENTIFICADORES_NUMERICOS
+
+        # Um padrão compilado por regex distinta: [(regex compilada, [(entidade, score), ...])]
+        self.padroes = []
+        indice_por_regex = {}
+        self.padroes_por_prefixo = {}
+        # [(mínimo de dígitos, índice do padrão)], do menor para o maior mínimo
+        self.padroes_numericos = []
+        entidades = []
+        for _, entidade, regex_formato, score, prefixo, minimo_digitos in formatos:
+            if entidade not in entidades:
+                entidades.append(entidade)
+            if regex_formato not in indice_por_regex:
+                indice_por_regex[regex_formato] = len(self.padroes)
+                self.padroes.append((regex.compile(regex_formato, flags=_FLAGS_PADROES), []))
+                indice = indice_por_regex[regex_formato]
+                if prefixo:
+                    self.padroes_por_prefixo.setdefault(prefixo.casefold(), []).append(indice)
+                if minimo_digitos:
+                    self.padroes_numericos.append((minimo_digitos, indice))
+            self.padroes[indice_por_regex[regex_formato]][1].append((entidade, score))
+        self.padroes_numericos.sort()
+        self._cache_padroes_por_digitos = {}
+
+        prefixos = sorted(self.padroes_por_prefixo, key=len, reverse=True)
+        self.regex_candidatos = regex.compile(
+            r"\b(?:(?P<numero>\d[\d.\-]*)|(?P<prefixo>" + "|".join(regex.escape(p) for p in prefixos) + "))",
+            flags=_FLAGS_PADROES,
+        )
+
+        super().__init__(
+            supported_entities=entidades,
+            name=name,
+            supported_language=supported_language,
+        )
+
+    def load(self):
+        pass
+
+    def _padroes_para_digitos(self, quantidade_digitos: int) -> List[int]:
+        """Índices dos padrões numéricos que cabem em uma sequência com essa quantidade de dígitos."""
+        indices = self._cache_padroes_por_digitos.get(quantidade_digitos)
+        if indices is None:
+            indices = [indice for minimo, indice in self.padroes_numericos if minimo <= quantidade_digitos]
+            self._cache_padroes_por_digitos[quantidade_digitos] = indices
+        return indices
+
+    def _candidatos(self, text: str):
+        """Gera, em ordem de posição, (posição, índices dos padrões a testar nela)."""
+        for match in self.regex_candidatos.finditer(text):
+            sequencia = match.group("numero")
+            if sequencia is None:
+                yield match.start(), self.padroes_por_prefixo.get(match.group("prefixo").casefold(), [])
+                continue
+            separadores = sequencia.count(".") + sequencia.count("-")
+            if not separadores:
+                indices = self._padroes_para_digitos(len(sequencia))
+                if indices:
+                    yield match.start(), indices
+                continue
+            # Um identificador também pode começar logo depois de um "." ou "-" da sequência
+            digitos_restantes = len(sequencia) - separadores
+            for grupo_digitos in _PADRAO_DIGITOS.finditer(sequencia):
+                indices = self._padroes_para_digitos(digitos_restantes)
+                if not indices:
+                    break
+                yield match.start() + grupo_digitos.start(), indices
+                digitos_restantes -= len(grupo_digitos.group())
+
+    def analyze(self, text: str, entities: List[str], nlp_artifacts=None) -> List[RecognizerResult]:
+        fim_anterior = [0] * len(self.padroes)
+        resultados = []
+        for posicao, indices in self._candidatos(text):
+            for indice in indices:
+                # Emula o finditer: ignora ocorrências que sobrepõem a anterior do mesmo padrão
+                if posicao < fim_anterior[indice]:
+                    continue
+                padrao, origens = self.padroes[indice]
+                match = padrao.match(text, posicao)
+                if match is None or match.end() == posicao:
+                    continue
+                fim_anterior[indice] = match.end()
+                for entidade, score in origens:
+                    if entities and entidade not in entities:
+                        continue
+                    resultados.append(
+                        RecognizerResult(
+                            entity_type=entidade,
+                            start=posicao,
+                            end=match.end(),
+                            score=score,
+                            recognition_metadata={
+                                RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                                RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id,
+                            },
+                        )
+                    )
+
+        return remover_resultados_contidos(resultados)
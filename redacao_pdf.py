@@ -0,0 +1,384 @@
+# Nome do arquivo: redacao_pdf.py
+"""
+Geração de um PDF anonimizado com tarjas aplicadas no próprio documento,
+preservando o layout (o .docx gerado por criar_docx_bytes tem só o texto).
+
+Os resultados da análise (offsets no texto extraído de cada página com
+page.get_text()) são convertidos em coordenadas pelas caixas dos caracteres
+(page.get_text("rawdict")), que seguem a mesma ordem do texto. Cada intervalo
+vira uma anotação de redação por linha, e apply_redactions remove de fato o
+texto coberto (não é só um retângulo desenhado por cima); depois a tarja é
+desenhada com o rótulo do operador (ex.: <NOME>, <CPF>) na primeira linha.
+As redações do documento ficam em colunas NumPy (TabelaRedacoes) até a geração.
+Entidades com operador "keep" não são tarjadas. Nas páginas digitalizadas, as
+caixas vêm do OCR feito na extração (guardadas em ocr_pdf.CacheOcr; o OCR só é
+refeito se elas já saíram do cache) e os pixels da imagem sob a tarja são
+apagados. Anotações, formulários, links, metadados, sumário e arquivos
+embutidos (que não passam pela análise) não vão para o PDF de saída.
+
+Em PDFs grandes as páginas são divididas em faixas processadas por um pool de
+processos (mesmas variáveis de ambiente de extracao_pdf.py): cada processo
+grava a sua faixa já tarjada em um PDF parcial, e os parciais são anexados a um
+documento novo na ordem das páginas, à medida que ficam prontos. Em PDFs
+pequenos a faixa única é tarjada no próprio processo e anexada do mesmo jeito,
+para que a saída não dependa do número de páginas.
+"""
+
+import contextlib
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import fitz  # PyMuPDF
+import numpy as np
+from presidio_analyzer import RecognizerResult
+
+from extracao_pdf import NUM_TRABALHADORES_EXTRACAO_PADRAO, PAGINAS_MINIMAS_PARALELO_PADRAO
+from ocr_pdf import (DPI_OCR_PADRAO, IDIOMA_OCR_PADRAO, OCR_ATIVO_PADRAO, CacheOcr, CaixasPagina, caixas_caracteres,
+                     hash_pagina, obter_cache_ocr, precisa_ocr, tesseract_disponivel, textpage_ocr)
+from tabela_intervalos import TabelaIntervalos
+
+# Redação de uma página: (início, fim, rótulo) em offsets do texto de page.get_text()
+Redacao = Tuple[int, int, str]
+
+COR_TARJA = (0, 0, 0)
+COR_ROTULO = (1, 1, 1)
+# Fração da largura de cada caractere deixada fora da tarja, de cada lado
+MARGEM_HORIZONTAL = 0.15
+# Fração da altura da tarja, em cima e embaixo, fora da área de remoção do texto
+MARGEM_VERTICAL = 0.35
+# Faixas por processo: mais de uma equilibra páginas de custo desigual
+FAIXAS_POR_TRABALHADOR = 2
+# As caixas dos caracteres vêm de ocr_pdf.caixas_caracteres, com a altura do corpo da fonte, para a
+# tarja cobrir só a própria linha
+
+
+def rotulo_substituicao(operador, entidade: str, texto_original: str) -> Optional[str]:
+    """Texto exibido sobre a tarja, a partir do OperatorConfig; None para entidades mantidas ("keep")."""
+    nome = operador.operator_name if operador is not None else "keep"
+    parametros = operador.params if operador is not None else {}
+    if nome == "keep":
+        return None
+    if nome == "replace":
+        return parametros.get("new_value", f"<{entidade}>")
+    if nome == "mask":
+        quantidade = min(parametros.get("chars_to_mask", len(texto_original)), len(texto_original))
+        mascara = parametros.get("masking_char", "*") * quantidade
+        if parametros.get("from_end", False):
+            return texto_original[:len(texto_original) - quantidade] + mascara
+        return mascara + texto_original[quantidade:]
+    if nome == "redact":
+        return ""
+    return f"<{entidade}>"
+
+
+class TabelaRedacoes:
+    """
+    Redações do documento em colunas NumPy, ordenadas por página: página, início e fim
+    (offsets no texto da página, int32) e o código do rótulo, com os rótulos distintos em
+    `rotulos` (o código 0 é o rótulo vazio dos trechos de continuação). Em um PDF grande
+    são centenas de milhares de intervalos guardados na sessão até o PDF tarjado ser
+    gerado; a lista de Redacao de uma página só é montada na hora de tarjá-la.
+    """
+
+    __slots__ = ("pagina", "inicio", "fim", "codigo", "rotulos")
+
+    def __init__(self, pagina: np.ndarray, inicio: np.ndarray, fim: np.ndarray, codigo: np.ndarray,
+                 rotulos: Sequence[str]):
+        self.pagina = np.asarray(pagina, dtype=np.int32)
+        self.inicio = np.asarray(inicio, dtype=np.int32)
+        self.fim = np.asarray(fim, dtype=np.int32)
+        self.codigo = np.asarray(codigo, dtype=np.int32)
+        self.rotulos = tuple(rotulos)
+
+    @classmethod
+    def vazia(cls) -> "TabelaRedacoes":
+        vazio = np.empty(0, dtype=np.int32)
+        return cls(vazio, vazio, vazio, vazio, ("",))
+
+    @classmethod
+    def concatenar(cls, partes: Sequence["TabelaRedacoes"]) -> "TabelaRedacoes":
+        """Une as tabelas dos lotes (rótulos recodificados em uma tupla só), em ordem de página."""
+        if not partes:
+            return cls.vazia()
+        rotulos: Dict[str, int] = {"": 0}
+        codigos = []
+        for parte in partes:
+            recodificacao = np.array([rotulos.setdefault(rotulo, len(rotulos)) for rotulo in parte.rotulos], dtype=np.int32)
+            codigos.append(recodificacao[parte.codigo])
+        pagina = np.concatenate([parte.pagina for parte in partes])
+        # Estável: dentro da página fica a ordem dos resultados
+        ordem = np.argsort(pagina, kind="stable")
+        return cls(pagina[ordem], np.concatenate([parte.inicio for parte in partes])[ordem],
+                   np.concatenate([parte.fim for parte in partes])[ordem], np.concatenate(codigos)[ordem], tuple(rotulos))
+
+    def __len__(self) -> int:
+        return len(self.pagina)
+
+    @property
+    def nbytes(self) -> int:
+        return self.pagina.nbytes + self.inicio.nbytes + self.fim.nbytes + self.codigo.nbytes
+
+    def paginas(self) -> List[int]:
+        """Números das páginas com alguma redação."""
+        return np.unique(self.pagina).tolist()
+
+    def _limites(self, inicio: int, fim: int) -> Tuple[int, int]:
+        return tuple(np.searchsorted(self.pagina, [inicio, fim]).tolist())
+
+    def da_pagina(self, numero: int) -> List[Redacao]:
+        primeira, ultima = self._limites(numero, numero + 1)
+        return [(inicio, fim, self.rotulos[codigo]) for inicio, fim, codigo in
+                zip(self.inicio[primeira:ultima].tolist(), self.fim[primeira:ultima].tolist(),
+                    self.codigo[primeira:ultima].tolist())]
+
+    def faixa(self, inicio: int, fim: int) -> "TabelaRedacoes":
+        """Só as páginas [inicio, fim), para enviar a um processo trabalhador."""
+        primeira, ultima = self._limites(inicio, fim)
+        return TabelaRedacoes(self.pagina[primeira:ultima], self.inicio[primeira:ultima], self.fim[primeira:ultima],
+                              self.codigo[primeira:ultima], self.rotulos)
+
+
+def distribuir_resultados_por_pagina(paginas: List[str],
+                                     resultados: Union[Sequence[RecognizerResult], TabelaIntervalos],
+                                     operadores: Dict,
+                                     pagina_inicial: int = 0) -> TabelaRedacoes:
+    """
+    Converte resultados com offsets em "".join(paginas) em redações por página
+    (numeradas a partir de `pagina_inicial`). Um resultado que atravessa a quebra
+    de página é dividido entre as duas; o rótulo fica só no primeiro trecho.
+    """
+    tabela = resultados if isinstance(resultados, TabelaIntervalos) else TabelaIntervalos.de_resultados(resultados)
+    texto = "".join(paginas)
+
+    # Rótulo por entidade; só o operador mask depende do texto de cada intervalo
+    rotulos: Dict[str, int] = {"": 0}
+    codigo = np.full(len(tabela), -1, dtype=np.int32)
+    for codigo_entidade, entidade in enumerate(tabela.entidades):
+        operador = operadores.get(entidade, operadores.get("DEFAULT"))
+        linhas = np.flatnonzero(tabela.codigo == codigo_entidade)
+        if operador is not None and operador.operator_name == "mask":
+            codigo[linhas] = [rotulos.setdefault(rotulo_substituicao(operador, entidade, texto[inicio:fim]), len(rotulos))
+                              for inicio, fim in zip(tabela.inicio[linhas].tolist(), tabela.fim[linhas].tolist())]
+        else:
+            rotulo = rotulo_substituicao(operador, entidade, "")
+            if rotulo is not None:
+                codigo[linhas] = rotulos.setdefault(rotulo, len(rotulos))
+
+    manter = (codigo >= 0) & (tabela.inicio < tabela.fim) & (tabela.inicio < len(texto))
+    inicio, fim, codigo = tabela.inicio[manter].astype(np.int64), tabela.fim[manter].astype(np.int64), codigo[manter]
+    limites = np.concatenate(([0], np.cumsum([len(pagina) for pagina in paginas], dtype=np.int64)))
+    # Primeira e última página de cada intervalo; um trecho por página coberta
+    primeira = np.searchsorted(limites, inicio, side="right") - 1
+    ultima = np.minimum(np.searchsorted(limites, fim - 1, side="right") - 1, len(paginas) - 1)
+    trechos = ultima - primeira + 1
+    origem = np.repeat(np.arange(len(inicio)), trechos)
+    posicao = np.arange(len(origem)) - np.repeat(np.cumsum(trechos) - trechos, trechos)
+    pagina = primeira[origem] + posicao
+    inicio_trecho = np.maximum(inicio[origem], limites[pagina]) - limites[pagina]
+    fim_trecho = np.minimum(fim[origem], limites[pagina + 1]) - limites[pagina]
+    codigo_trecho = np.where(posicao == 0, codigo[origem], 0)
+    validos = inicio_trecho < fim_trecho  # páginas vazias no meio do intervalo
+    # Estável: dentro da página fica a ordem dos resultados
+    ordem = np.argsort(pagina[validos], kind="stable")
+    return TabelaRedacoes((pagina[validos] + pagina_inicial)[ordem], inicio_trecho[validos][ordem],
+                          fim_trecho[validos][ordem], codigo_trecho[validos][ordem], tuple(rotulos))
+
+
+def _caixas_caracteres(caixas: CaixasPagina) -> List[Optional[Tuple[fitz.Rect, Tuple[int, int]]]]:
+    """
+    (caixa, (bloco, linha)) de cada caractere de ocr_pdf.caixas_caracteres, na mesma
+    posição do texto da página; None nas quebras de linha.
+    """
+    coordenadas, linhas = caixas
+    return [None if math.isnan(coordenada[0]) else (fitz.Rect(coordenada), tuple(linha))
+            for coordenada, linha in zip(coordenadas.tolist(), linhas.tolist())]
+
+
+def _retangulos_intervalo(caixas_pagina, inicio: int, fim: int) -> List[fitz.Rect]:
+    """Retângulos (um por linha) que cobrem os caracteres [inicio, fim) da página."""
+    por_linha: Dict[Tuple[int, int], fitz.Rect] = {}
+    for caixa_linha in caixas_pagina[inicio:fim]:
+        if caixa_linha is None or caixa_linha[0].is_empty:
+            continue
+        caixa, linha = caixa_linha
+        # Sem a borda lateral, a tarja não encosta no caractere vizinho (ex.: a vírgula após o nome)
+        margem = caixa.width * MARGEM_HORIZONTAL
+        retangulo = fitz.Rect(caixa.x0 + margem, caixa.y0, caixa.x1 - margem, caixa.y1)
+        por_linha[linha] = por_linha[linha] | retangulo if linha in por_linha else retangulo
+    return list(por_linha.values())
+
+
+def _faixa_central(retangulo: fitz.Rect) -> fitz.Rect:
+    """
+    Faixa central do retângulo usada como área de remoção: apply_redactions apaga todo
+    caractere cuja caixa (com ascendente/descendente) toca a área, e essas caixas
+    invadem as linhas de cima e de baixo.
+    """
+    margem = retangulo.height * MARGEM_VERTICAL
+    return fitz.Rect(retangulo.x0, retangulo.y0 + margem, retangulo.x1, retangulo.y1 - margem)
+
+
+def redigir_pagina(pagina, redacoes: List[Redacao], caixas_ocr: Optional[CaixasPagina] = None) -> int:
+    """
+    Aplica as redações em uma página aberta. Retorna o número de tarjas aplicadas.
+
+    `caixas_ocr` são as caixas do OCR feito na extração, se a página é digitalizada (ver
+    _caixas_ocr_guardadas); sem elas, o OCR da página digitalizada é refeito aqui.
+    """
+    if not redacoes:
+        return 0
+    # Página digitalizada: os offsets vêm do texto do OCR (ver ocr_pdf.py); como não há camada
+    # de texto a preservar, a tarja inteira é apagada (os pixels da imagem sob ela são removidos
+    # por apply_redactions)
+    digitalizada = OCR_ATIVO_PADRAO and tesseract_disponivel() and precisa_ocr(pagina.get_text())
+    if digitalizada and caixas_ocr is None:
+        caixas_ocr = caixas_caracteres(pagina, textpage_ocr(pagina))
+    caixas_pagina = _caixas_caracteres(caixas_ocr if digitalizada else caixas_caracteres(pagina))
+
+    tarjas = []
+    for inicio, fim, rotulo in redacoes:
+        for indice, retangulo in enumerate(_retangulos_intervalo(caixas_pagina, inicio, fim)):
+            pagina.add_redact_annot(retangulo if digitalizada else _faixa_central(retangulo), fill=False, cross_out=False)
+            tarjas.append((retangulo, rotulo if indice == 0 else ""))
+    if not tarjas:
+        return 0
+    pagina.apply_redactions()
+
+    # Tarjas e rótulos desenhados depois da remoção, na altura inteira da linha, em um único Shape por página
+    desenho = pagina.new_shape()
+    for retangulo, _ in tarjas:
+        desenho.draw_rect(retangulo)
+    desenho.finish(color=None, fill=COR_TARJA)
+    for retangulo, rotulo in tarjas:
+        if rotulo:
+            tamanho_fonte = retangulo.height * 0.8
+            tamanho_fonte = max(3.0, min(tamanho_fonte, tamanho_fonte * retangulo.width / fitz.get_text_length(rotulo, fontsize=tamanho_fonte)))
+            desenho.insert_text((retangulo.x0, retangulo.y1 - retangulo.height * 0.2), rotulo,
+                                fontsize=tamanho_fonte, color=COR_ROTULO)
+    desenho.commit(overlay=True)
+    return len(tarjas)
+
+
+def limpar_pagina(pagina) -> None:
+    """
+    Remove as anotações (comentários, carimbos, anexos), os campos de formulário e os links
+    da página: o texto deles não passa pela análise e pode conter os dados tarjados.
+    """
+    widget = pagina.first_widget
+    while widget:
+        widget = pagina.delete_widget(widget)
+    anotacao = pagina.first_annot
+    while anotacao:
+        anotacao = pagina.delete_annot(anotacao)
+    for link in pagina.get_links():
+        pagina.delete_link(link)
+
+
+def limpar_documento(documento_pdf) -> None:
+    """Remove os metadados (Info e XMP), o sumário (outline) e os arquivos embutidos do documento."""
+    documento_pdf.set_metadata({})
+    documento_pdf.del_xml_metadata()
+    documento_pdf.set_toc([])
+    for nome in documento_pdf.embfile_names():
+        documento_pdf.embfile_del(nome)
+
+
+def _redigir_faixa(argumentos) -> Tuple[str, int]:
+    """Tarja as páginas [inicio, fim) e grava-as em um PDF parcial; executado no processo trabalhador."""
+    caminho_origem, inicio, fim, redacoes_faixa, caixas_ocr_faixa, caminho_parcial = argumentos
+    tarjas = 0
+    with fitz.open(caminho_origem) as documento_pdf:
+        documento_pdf.select(list(range(inicio, fim)))
+        for numero, pagina in enumerate(documento_pdf, start=inicio):
+            tarjas += redigir_pagina(pagina, redacoes_faixa.da_pagina(numero), caixas_ocr_faixa.get(numero))
+            limpar_pagina(pagina)
+        documento_pdf.save(caminho_parcial, garbage=4, deflate=True)
+    return caminho_parcial, tarjas
+
+
+def _caixas_ocr_guardadas(documento_pdf, paginas) -> Dict[int, CaixasPagina]:
+    """Caixas do OCR da extração (ocr_pdf.CacheOcr) das `paginas` que foram reconhecidas neste processo."""
+    cache = obter_cache_ocr()
+    if not (OCR_ATIVO_PADRAO and cache.tem_caixas()):  # nenhuma página digitalizada: não calcula os hashes
+        return {}
+    caixas_ocr = {}
+    for numero in paginas:
+        caixas = cache.obter_caixas(CacheOcr.chave(hash_pagina(documento_pdf, numero), IDIOMA_OCR_PADRAO, DPI_OCR_PADRAO))
+        if caixas is not None:
+            caixas_ocr[numero] = caixas
+    return caixas_ocr
+
+
+def gerar_pdf_redigido(origem: Union[str, bytes],
+                       redacoes: TabelaRedacoes,
+                       caminho_saida: str,
+                       num_trabalhadores: int = NUM_TRABALHADORES_EXTRACAO_PADRAO,
+                       paginas_minimas_paralelo: int = PAGINAS_MINIMAS_PARALELO_PADRAO) -> Dict:
+    """
+    Grava em `caminho_saida` o PDF `origem` (caminho ou bytes) com as `redacoes` aplicadas
+    (ver distribuir_resultados_por_pagina).
+
+    Com um processo ou muitos, a saída é montada do mesmo jeito: as faixas de páginas
+    tarjadas são anexadas a um documento novo, sem anotações, formulários, links (ver
+    limpar_pagina), metadados, sumário nem arquivos embutidos (ver limpar_documento).
+
+    Retorna um dicionário com "paginas", "tarjas", "tempo_s", "tamanho_bytes" e "trabalhadores".
+    """
+    inicio_geral = time.perf_counter()
+    with tempfile.TemporaryDirectory() as dir_temporario:
+        if not isinstance(origem, str):
+            caminho_origem = os.path.join(dir_temporario, "original.pdf")
+            with open(caminho_origem, "wb") as arquivo_origem:
+                arquivo_origem.write(origem)
+        else:
+            caminho_origem = origem
+        with fitz.open(caminho_origem) as documento_pdf:
+            total_paginas = documento_pdf.page_count
+            caixas_ocr = _caixas_ocr_guardadas(documento_pdf, [numero for numero in redacoes.paginas()
+                                                               if 0 <= numero < total_paginas])
+        num_trabalhadores = min(num_trabalhadores or os.cpu_count() or 1, max(total_paginas, 1))
+
+        if num_trabalhadores <= 1 or total_paginas < paginas_minimas_paralelo:
+            num_trabalhadores = 1
+            num_faixas = 1
+        else:
+            num_faixas = num_trabalhadores * FAIXAS_POR_TRABALHADOR
+        tamanho_faixa = max(-(-total_paginas // num_faixas), 1)
+        tarefas = []
+        for indice, inicio in enumerate(range(0, total_paginas, tamanho_faixa)):
+            fim = min(inicio + tamanho_faixa, total_paginas)
+            redacoes_faixa = redacoes.faixa(inicio, fim)
+            caixas_ocr_faixa = {numero: caixas_ocr[numero] for numero in range(inicio, fim) if numero in caixas_ocr}
+            tarefas.append((caminho_origem, inicio, fim, redacoes_faixa, caixas_ocr_faixa,
+                            os.path.join(dir_temporario, f"parcial_{indice:05d}.pdf")))
+        tarjas = 0
+        with contextlib.ExitStack() as pilha:
+            if num_trabalhadores == 1:
+                faixas = map(_redigir_faixa, tarefas)
+            else:
+                executor = pilha.enter_context(ProcessPoolExecutor(max_workers=num_trabalhadores,
+                                                                   mp_context=multiprocessing.get_context("spawn")))
+                faixas = executor.map(_redigir_faixa, tarefas)
+            documento_saida = pilha.enter_context(fitz.open())
+            # As faixas chegam na ordem das páginas; cada uma é anexada assim que fica pronta
+            for caminho_parcial, tarjas_faixa in faixas:
+                with fitz.open(caminho_parcial) as parcial:
+                    documento_saida.insert_pdf(parcial)
+                os.remove(caminho_parcial)
+                tarjas += tarjas_faixa
+            limpar_documento(documento_saida)
+            # garbage=4 junta os objetos repetidos (fontes, imagens) que cada parcial carrega
+            documento_saida.save(caminho_saida, garbage=4, deflate=True)
+
+    return {
+        "paginas": total_paginas,
+        "tarjas": tarjas,
+        "tempo_s": time.perf_counter() - inicio_geral,
+        "tamanho_bytes": os.path.getsize(caminho_saida),
+        "trabalhadores": num_trabalhadores,
+    }
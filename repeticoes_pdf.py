@@ -0,0 +1,169 @@
+# Nome do arquivo: repeticoes_pdf.py
+"""
+Cabeçalhos, rodapés e blocos de assinatura repetidos nas páginas de um PDF.
+
+Peças do PJe repetem em todas as páginas o mesmo rodapé (assinatura
+eletrônica, URL de consulta, número do documento) e, muitas vezes, o mesmo
+cabeçalho do tribunal. DetectorRepeticoes conta, página a página, as linhas
+das bordas (as primeiras e as últimas ANONIMIZADOR_LINHAS_BORDA) pela posição
+e pelo hash do conteúdo; a sequência de linhas da borda já vista em pelo menos
+ANONIMIZADOR_REPETICOES_MINIMAS páginas forma um bloco repetido.
+
+anonimizar_paginas analisa o corpo das páginas de um lote de uma vez, com cada
+bloco repetido trocado por uma linha sentinela, e cada bloco distinto uma única
+vez por documento: o texto anonimizado e os intervalos do bloco são
+reaproveitados em todas as ocorrências. Como os operadores do Presidio só
+alteram o texto dentro dos intervalos, a saída é a mesma de anonimizar o lote
+inteiro com todos os intervalos. Se a sentinela não sobreviver à anonimização,
+o lote é analisado inteiro, como antes.
+"""
+
+import hashlib
+import os
+from bisect import bisect_right
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from presidio_analyzer import RecognizerResult
+
+REAPROVEITAR_REPETICOES_PADRAO = os.environ.get("ANONIMIZADOR_REPETICOES", "1") == "1"
+REPETICOES_MINIMAS_PADRAO = int(os.environ.get("ANONIMIZADOR_REPETICOES_MINIMAS", "3"))
+LINHAS_BORDA_PADRAO = int(os.environ.get("ANONIMIZADOR_LINHAS_BORDA", "8"))
+# Linha que substitui cada bloco no corpo analisado; NUL não é espaço em branco para \s nem letra
+SENTINELA = "\x00\n"
+
+AnonimizarTrecho = Callable[[str], Tuple[str, List[RecognizerResult]]]
+
+
+def _deslocar(resultado: RecognizerResult, deslocamento: int, limite: int = None) -> RecognizerResult:
+    fim = resultado.end + deslocamento
+    return RecognizerResult(resultado.entity_type, resultado.start + deslocamento, fim if limite is None else min(fim, limite),
+                            resultado.score, resultado.analysis_explanation, resultado.recognition_metadata)
+
+
+class DetectorRepeticoes:
+    """Contagem das linhas de borda já vistas no documento e cache dos blocos repetidos anonimizados."""
+
+    def __init__(self,
+                 repeticoes_minimas: int = REPETICOES_MINIMAS_PADRAO,
+                 linhas_borda: int = LINHAS_BORDA_PADRAO):
+        self.repeticoes_minimas = repeticoes_minimas
+        self.linhas_borda = linhas_borda
+        self._contagem: Counter = Counter()  # (borda, posição, hash da linha) -> páginas
+        self._blocos: Dict[str, Tuple[str, List[RecognizerResult]]] = {}
+        self.blocos_analisados = 0
+        self.blocos_reaproveitados = 0
+        self.caracteres_reaproveitados = 0
+
+    @staticmethod
+    def _linhas(texto: str) -> List[Tuple[int, int]]:
+        """(início, fim) de cada linha, com a quebra de linha incluída no fim."""
+        linhas, inicio = [], 0
+        while inicio < len(texto):
+            fim = texto.find("\n", inicio)
+            fim = len(texto) if fim == -1 else fim + 1
+            linhas.append((inicio, fim))
+            inicio = fim
+        return linhas
+
+    def _chaves(self, texto: str, linhas: List[Tuple[int, int]]):
+        """Chaves de posição e conteúdo das linhas do topo e da base, na ordem de leitura a partir da borda."""
+        def chave(borda, posicao, inicio, fim):
+            return borda, posicao, hashlib.blake2b(texto[inicio:fim].encode("utf-8"), digest_size=8).digest()
+        topo = [chave("topo", posicao, *linha) for posicao, linha in enumerate(linhas[:self.linhas_borda])]
+        base = [chave("base", posicao, *linha) for posicao, linha in enumerate(reversed(linhas[-self.linhas_borda:]))]
+        return topo, base
+
+    def registrar(self, paginas: List[str]):
+        """Conta as linhas de borda das páginas (cada página conta uma vez por chave)."""
+        for texto in paginas:
+            topo, base = self._chaves(texto, self._linhas(texto))
+            self._contagem.update(set(topo + base))
+
+    def segmentar(self, texto: str) -> Tuple[int, int]:
+        """(início, fim) do corpo da página; antes e depois ficam o cabeçalho e o rodapé repetidos."""
+        linhas = self._linhas(texto)
+        topo, base = self._chaves(texto, linhas)
+        linhas_topo = next((i for i, chave in enumerate(topo) if self._contagem[chave] < self.repeticoes_minimas), len(topo))
+        linhas_base = next((i for i, chave in enumerate(base) if self._contagem[chave] < self.repeticoes_minimas), len(base))
+        linhas_base = min(linhas_base, len(linhas) - linhas_topo)  # página curta: o topo tem precedência
+        inicio = linhas[linhas_topo - 1][1] if linhas_topo else 0
+        fim = linhas[len(linhas) - linhas_base][0] if linhas_base else len(texto)
+        # Bordas só com linhas em branco não valem uma chamada separada da análise
+        if not texto[:inicio].strip():
+            inicio = 0
+        if not texto[fim:].strip():
+            fim = len(texto)
+        return inicio, fim
+
+    def anonimizar_bloco(self, bloco: str, anonimizar_trecho: AnonimizarTrecho) -> Tuple[str, List[RecognizerResult]]:
+        """Anonimiza o bloco na primeira ocorrência; nas seguintes, devolve o resultado guardado."""
+        anonimizado = self._blocos.get(bloco)
+        if anonimizado is None:
+            anonimizado = self._blocos[bloco] = anonimizar_trecho(bloco)
+            self.blocos_analisados += 1
+        else:
+            self.blocos_reaproveitados += 1
+            self.caracteres_reaproveitados += len(bloco)
+        return anonimizado
+
+
+def anonimizar_paginas(paginas: List[str],
+                       anonimizar_trecho: AnonimizarTrecho,
+                       detector: DetectorRepeticoes) -> Tuple[str, List[RecognizerResult]]:
+    """
+    Anonimiza "".join(paginas), analisando os blocos repetidos uma vez por documento.
+
+    Retorna (texto anonimizado, resultados com offsets no texto das páginas unidas).
+    """
+    texto_lote = "".join(paginas)
+    if not texto_lote.strip():
+        return texto_lote, []
+    if SENTINELA[0] in texto_lote:
+        return anonimizar_trecho(texto_lote)
+    detector.registrar(paginas)
+
+    # Corpo com uma sentinela no lugar de cada bloco; mapa: (início no corpo, início no lote, tamanho)
+    partes_corpo, mapa, blocos = [], [], []
+    posicao_lote = posicao_corpo = 0
+    for texto in paginas:
+        inicio, fim = detector.segmentar(texto)
+        for trecho, eh_bloco in ((texto[:inicio], True), (texto[inicio:fim], False), (texto[fim:], True)):
+            if not trecho:
+                continue
+            if eh_bloco:
+                blocos.append((posicao_lote, trecho))
+                partes_corpo.append(SENTINELA)
+                posicao_corpo += len(SENTINELA)
+            else:
+                mapa.append((posicao_corpo, posicao_lote, len(trecho)))
+                partes_corpo.append(trecho)
+                posicao_corpo += len(trecho)
+            posicao_lote += len(trecho)
+    if not blocos:
+        return anonimizar_trecho(texto_lote)
+
+    corpo = "".join(partes_corpo)
+    corpo_anonimizado, resultados_corpo = (anonimizar_trecho(corpo) if corpo.replace(SENTINELA, "").strip()
+                                           else (corpo, []))
+    pedacos = corpo_anonimizado.split(SENTINELA)
+    if len(pedacos) != len(blocos) + 1:
+        # Algum intervalo cobriu uma sentinela: analisa o lote inteiro
+        return anonimizar_trecho(texto_lote)
+
+    saida, resultados = [pedacos[0]], []
+    inicios_corpo = [inicio_corpo for inicio_corpo, _, _ in mapa]
+    for resultado in resultados_corpo:
+        indice = bisect_right(inicios_corpo, resultado.start) - 1
+        if indice < 0:
+            continue
+        inicio_corpo, inicio_lote, tamanho = mapa[indice]
+        if resultado.start < inicio_corpo + tamanho:
+            resultados.append(_deslocar(resultado, inicio_lote - inicio_corpo, inicio_lote + tamanho))
+    for (posicao_bloco, bloco), pedaco in zip(blocos, pedacos[1:]):
+        bloco_anonimizado, resultados_bloco = (detector.anonimizar_bloco(bloco, anonimizar_trecho) if bloco.strip()
+                                               else (bloco, []))
+        saida.extend((bloco_anonimizado, pedaco))
+        resultados.extend(_deslocar(resultado, posicao_bloco) for resultado in resultados_bloco)
+    resultados.sort(key=lambda resultado: resultado.start)
+    return "".join(saida), resultados
@@ -0,0 +1,120 @@
+# Nome do arquivo: tabela_intervalos.py
+"""
+Intervalos detectados pela análise guardados em colunas NumPy.
+
+Cada RecognizerResult é um objeto Python com dicionários de metadados; em um
+PDF grande são centenas de milhares deles, e a tabela de entidades da
+interface ainda os copiava para dicionários e para um DataFrame com o score
+formatado como texto. TabelaIntervalos guarda só início e fim (int32), o
+código da entidade (int16, com os nomes em uma tupla) e o score (float32):
+filtrar, ordenar e converter para pandas ou Arrow são operações vetorizadas,
+sem um objeto Python por linha. O texto detectado só é recortado do
+documento na conversão para exibição.
+
+Os offsets precisam caber em int32 (textos com menos de 2**31 caracteres).
+"""
+
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from presidio_analyzer import RecognizerResult
+
+
+class TabelaIntervalos:
+    """Colunas inicio, fim, codigo e score, com os nomes das entidades em `entidades`."""
+
+    __slots__ = ("inicio", "fim", "codigo", "score", "entidades")
+
+    def __init__(self, inicio: np.ndarray, fim: np.ndarray, codigo: np.ndarray, score: np.ndarray,
+                 entidades: Tuple[str, ...]):
+        self.inicio = np.asarray(inicio, dtype=np.int32)
+        self.fim = np.asarray(fim, dtype=np.int32)
+        self.codigo = np.asarray(codigo, dtype=np.int16)
+        self.score = np.asarray(score, dtype=np.float32)
+        self.entidades = tuple(entidades)
+
+    @classmethod
+    def de_resultados(cls, resultados: Sequence[RecognizerResult]) -> "TabelaIntervalos":
+        """Converte uma lista de RecognizerResult (uma passada por coluna, sem objetos intermediários)."""
+        codigos = {}
+        quantidade = len(resultados)
+        inicio = np.fromiter((r.start for r in resultados), dtype=np.int32, count=quantidade)
+        fim = np.fromiter((r.end for r in resultados), dtype=np.int32, count=quantidade)
+        codigo = np.fromiter((codigos.setdefault(r.entity_type, len(codigos)) for r in resultados),
+                             dtype=np.int16, count=quantidade)
+        score = np.fromiter((r.score for r in resultados), dtype=np.float32, count=quantidade)
+        return cls(inicio, fim, codigo, score, tuple(codigos))
+
+    def __len__(self) -> int:
+        return len(self.inicio)
+
+    @property
+    def nbytes(self) -> int:
+        return self.inicio.nbytes + self.fim.nbytes + self.codigo.nbytes + self.score.nbytes
+
+    def codigos_de(self, entidades: Iterable[str]) -> np.ndarray:
+        """Códigos das entidades pedidas que existem na tabela."""
+        entidades = set(entidades)
+        return np.array([codigo for codigo, nome in enumerate(self.entidades) if nome in entidades], dtype=np.int16)
+
+    def filtrar(self, mascara: np.ndarray) -> "TabelaIntervalos":
+        """Linhas em que `mascara` (booleana ou de índices) é verdadeira; ex.: tabela.filtrar(tabela.score >= 0.5)."""
+        return TabelaIntervalos(self.inicio[mascara], self.fim[mascara], self.codigo[mascara], self.score[mascara],
+                                self.entidades)
+
+    def da_entidade(self, *entidades: str) -> "TabelaIntervalos":
+        return self.filtrar(np.isin(self.codigo, self.codigos_de(entidades)))
+
+    def ordenar(self) -> "TabelaIntervalos":
+        """Ordem de início crescente e, no mesmo início, do intervalo mais longo para o mais curto."""
+        return self.filtrar(np.lexsort((-self.fim.astype(np.int64), self.inicio)))
+
+    def para_resultados(self) -> List[RecognizerResult]:
+        """De volta a RecognizerResult (sem metadados), para o AnonymizerEngine."""
+        # 6 casas: a precisão do float32 (0.85 volta como 0.85, não 0.8500000238)
+        scores = np.round(self.score.astype(np.float64), 6).tolist()
+        return [RecognizerResult(self.entidades[codigo], inicio, fim, score)
+                for inicio, fim, codigo, score in zip(self.inicio.tolist(), self.fim.tolist(),
+                                                       self.codigo.tolist(), scores)]
+
+    def para_bytes(self) -> bytes:
+        """Colunas em binário (little-endian) com os nomes das entidades, para cache_resultados."""
+        nomes = "\n".join(self.entidades).encode("utf-8")
+        return b"".join((struct.pack("<II", len(self), len(nomes)), nomes, self.inicio.astype("<i4").tobytes(),
+                         self.fim.astype("<i4").tobytes(), self.codigo.astype("<i2").tobytes(),
+                         self.score.astype("<f4").tobytes()))
+
+    @classmethod
+    def de_bytes(cls, dados: bytes) -> "TabelaIntervalos":
+        quantidade, tamanho_nomes = struct.unpack_from("<II", dados)
+        posicao = struct.calcsize("<II")
+        nomes = dados[posicao:posicao + tamanho_nomes].decode("utf-8")
+        posicao += tamanho_nomes
+        colunas = []
+        for tipo in ("<i4", "<i4", "<i2", "<f4"):
+            colunas.append(np.frombuffer(dados, dtype=tipo, count=quantidade, offset=posicao))
+            posicao += quantidade * np.dtype(tipo).itemsize
+        return cls(*colunas, tuple(nomes.split("\n")) if nomes else ())
+
+    def _categorias(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.codigo, categories=pd.Index(self.entidades, dtype=object))
+
+    def para_pandas(self, texto: Optional[str] = None) -> pd.DataFrame:
+        """
+        DataFrame com "Entidade" (categórica), "Início", "Fim" e "Score" (float32), sem cópia
+        linha a linha. Com `texto`, inclui "Texto Detectado" (o único campo recortado por linha).
+        """
+        colunas = {"Entidade": self._categorias()}
+        if texto is not None:
+            colunas["Texto Detectado"] = [texto[inicio:fim] for inicio, fim in zip(self.inicio.tolist(), self.fim.tolist())]
+        colunas.update({"Início": self.inicio, "Fim": self.fim, "Score": self.score})
+        return pd.DataFrame(colunas)
+
+    def para_arrow(self):
+        """Tabela Arrow (pyarrow, instalado com o Streamlit) com a entidade em dicionário."""
+        import pyarrow as pa
+
+        entidade = pa.DictionaryArray.from_arrays(pa.array(self.codigo), pa.array(self.entidades, type=pa.string()))
+        return pa.table({"Entidade": entidade, "Início": self.inicio, "Fim": self.fim, "Score": self.score})
@@ -0,0 +1,27 @@
+# Nome do arquivo: tests/conftest.py
+"""
+Os módulos do anonimizador ficam na raiz do repositório (como em benchmarks/, que usa PYTHONPATH=..);
+os testes de equivalência reaproveitam as listas e os PDFs de exemplo de benchmarks/comum.py.
+"""
+
+import os
+import sys
+
+import pytest
+
+RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPOSITORIO)
+sys.path.insert(0, os.path.join(RAIZ_REPOSITORIO, "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def modelo_spacy_vazio(tmp_path_factory):
+    """
+    Caminho de um pipeline "pt" vazio (só o tokenizador), aceito por spacy.load e por criar_motor_nlp.
+    Sem NER, os resultados vêm só dos reconhecedores de padrões e são determinísticos.
+    """
+    import spacy
+
+    caminho = str(tmp_path_factory.mktemp("modelo_spacy") / "pt_vazio")
+    spacy.blank("pt").to_disk(caminho)
+    return caminho
@@ -0,0 +1,99 @@
+# Nome do arquivo: tests/test_analise_blocos.py
+"""Análise em blocos (analise_blocos.py) e em paralelo (analise_paralela.py) igual à do documento inteiro, com um pipeline spaCy vazio."""
+
+import pytest
+from presidio_analyzer import AnalyzerEngine
+
+from analise_blocos import analisar_em_blocos, dividir_em_blocos
+from analise_paralela import AnalisadorParalelo
+from comum import entidades_para_analise, listas_reconhecedores, operadores_anonimizador, textos_pdfs_exemplo
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+
+TAMANHO_BLOCO = 6000
+SOBREPOSICAO = 600
+
+
+def _intervalos(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+@pytest.fixture(scope="module")
+def analyzer(modelo_spacy_vazio):
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(modelo_spacy_vazio, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    return analyzer
+
+
+@pytest.fixture(scope="module")
+def entidades():
+    return entidades_para_analise(operadores_anonimizador())
+
+
+@pytest.fixture(scope="module")
+def texto_longo():
+    # Os PDFs de exemplo, páginas separadas por \f, algumas vezes: dezenas de blocos
+    return "\f".join(texto for _, texto in textos_pdfs_exemplo()) * 3
+
+
+def test_blocos_cobrem_o_texto_com_sobreposicao(texto_longo):
+    blocos = dividir_em_blocos(texto_longo, TAMANHO_BLOCO, SOBREPOSICAO)
+    assert len(blocos) > 10
+    assert blocos[0][0] == 0 and blocos[-1][1] == len(texto_longo)
+    for (inicio, fim), (proximo_inicio, _) in zip(blocos, blocos[1:]):
+        assert fim - inicio <= TAMANHO_BLOCO
+        assert fim - SOBREPOSICAO <= proximo_inicio < fim
+
+
+def test_analise_em_blocos_igual_ao_texto_inteiro(analyzer, entidades, texto_longo):
+    inteiro = analyzer.analyze(text=texto_longo, language="pt", entities=entidades)
+    em_blocos = analisar_em_blocos(analyzer, text=texto_longo, tamanho_bloco=TAMANHO_BLOCO, sobreposicao=SOBREPOSICAO,
+                                   language="pt", entities=entidades)
+    assert len(inteiro) > 1000
+    assert _intervalos(em_blocos) == _intervalos(inteiro)
+
+
+def test_analise_em_blocos_respeita_max_length(analyzer, entidades, texto_longo):
+    # O Doc de cada bloco fica abaixo do nlp.max_length que o documento inteiro ultrapassa
+    nlp = analyzer.nlp_engine.nlp["pt"]
+    max_length = nlp.max_length
+    nlp.max_length = TAMANHO_BLOCO
+    try:
+        with pytest.raises(ValueError):
+            analyzer.analyze(text=texto_longo, language="pt", entities=entidades)
+        assert analisar_em_blocos(analyzer, text=texto_longo, tamanho_bloco=TAMANHO_BLOCO, sobreposicao=SOBREPOSICAO,
+                                  language="pt", entities=entidades)
+    finally:
+        nlp.max_length = max_length
+
+
+def test_bloco_que_comeca_no_meio_de_uma_palavra(analyzer, entidades):
+    # Sem espaço nem quebra de linha, os blocos são cortados em qualquer posição: o vizinho vê "4567890-"
+    # (SIAPE, CI...) onde o texto inteiro tem "x1234567890-", sem limite de palavra; a posse da sobreposição
+    # descarta esses resultados truncados
+    texto = "CPF 123.456.789-09 " + "Ax1234567890-" * 2000 + " CEP 70040-010"
+    em_blocos = analisar_em_blocos(analyzer, text=texto, tamanho_bloco=TAMANHO_BLOCO, sobreposicao=SOBREPOSICAO,
+                                   language="pt", entities=entidades)
+    assert _intervalos(em_blocos) == _intervalos(analyzer.analyze(text=texto, language="pt", entities=entidades))
+
+
+def test_analise_paralela_igual_ao_texto_inteiro(analyzer, entidades, texto_longo, modelo_spacy_vazio, tmp_path, monkeypatch):
+    # Os processos (spawn) leem o diretório do pacote de reconhecedores do ambiente ao importar pacote_reconhecedores
+    monkeypatch.setenv("ANONIMIZADOR_DIR_CACHE", str(tmp_path))
+    inteiro = analyzer.analyze(text=texto_longo, language="pt", entities=entidades)
+    analisador = AnalisadorParalelo(listas_reconhecedores(), num_trabalhadores=2, modelo=modelo_spacy_vazio)
+    try:
+        for tamanho_bloco in (TAMANHO_BLOCO, len(texto_longo)):  # blocos dados / um bloco por processo
+            paralelo = analisador.analisar(texto_longo, tamanho_bloco=tamanho_bloco, sobreposicao=SOBREPOSICAO,
+                                           language="pt", entities=entidades)
+            assert _intervalos(paralelo) == _intervalos(inteiro)
+    finally:
+        analisador.encerrar()
+    assert list(tmp_path.glob("*.pkl"))
+
+
+def test_analise_paralela_exige_um_trabalhador():
+    with pytest.raises(ValueError):
+        AnalisadorParalelo(listas_reconhecedores(), num_trabalhadores=0)
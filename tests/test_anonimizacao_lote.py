@@ -0,0 +1,106 @@
+# Nome do arquivo: tests/test_anonimizacao_lote.py
+"""Anonimização em lote (anonimizacao_lote.py, nlp.pipe) igual ao laço de um documento por vez, com um pipeline spaCy vazio."""
+
+import pytest
+from presidio_analyzer import AnalyzerEngine
+from presidio_anonymizer import AnonymizerEngine
+
+import anonimizacao_lote
+from anonimizacao_lote import anonimizar_em_lote
+from anonimizacao_rapida import anonimizar_texto
+from comum import (carregar_lista, entidades_para_analise, listas_reconhecedores, operadores_anonimizador,
+                   paginas_pdfs_exemplo)
+from motor_nlp import criar_motor_nlp
+from pacote_reconhecedores import construir_reconhecedores
+from pos_analise import construir_conjunto_termos_comuns, filtrar_termos_comuns, resolver_conflitos
+
+TAMANHO_BLOCO = 20000
+
+
+@pytest.fixture(scope="module")
+def motores(modelo_spacy_vazio):
+    analyzer = AnalyzerEngine(nlp_engine=criar_motor_nlp(modelo_spacy_vazio, cache=None), supported_languages=["pt"],
+                              default_score_threshold=0.4)
+    for reconhecedor in construir_reconhecedores(*listas_reconhecedores()):
+        analyzer.registry.add_recognizer(reconhecedor)
+    operadores = operadores_anonimizador()
+    return {"analyzer": analyzer, "anonymizer": AnonymizerEngine(), "operadores": operadores,
+            "entidades": entidades_para_analise(operadores),
+            "termos_comuns": construir_conjunto_termos_comuns(carregar_lista("termos_comuns.txt"))}
+
+
+@pytest.fixture(scope="module")
+def documentos():
+    # As páginas dos PDFs de exemplo, um documento vazio e um maior que o bloco (analisado em blocos)
+    paginas = [texto for _, _, texto in paginas_pdfs_exemplo()]
+    return paginas + ["", "   \n", "".join(paginas) * 2]
+
+
+def _um_por_vez(motores, texto):
+    """O laço das interfaces: analyze + filtro de termos comuns + conflitos + anonimização."""
+    resultados = motores["analyzer"].analyze(text=texto, language="pt", entities=motores["entidades"])
+    resultados = filtrar_termos_comuns(texto, resultados, motores["termos_comuns"])
+    resultados, _ = resolver_conflitos(texto, resultados)
+    return anonimizar_texto(motores["anonymizer"], texto, resultados, motores["operadores"]), resultados
+
+
+def _intervalos(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+@pytest.mark.parametrize("batch_size, n_process", [(1, 1), (8, 1), (8, 2)])
+def test_lote_igual_a_um_documento_por_vez(motores, documentos, batch_size, n_process):
+    saidas = list(anonimizar_em_lote(documentos, motores["analyzer"], motores["anonymizer"], motores["operadores"],
+                                     motores["entidades"], motores["termos_comuns"], batch_size=batch_size,
+                                     n_process=n_process, tamanho_bloco=TAMANHO_BLOCO))
+    assert [saida["indice"] for saida in saidas] == list(range(len(documentos)))
+    assert len(documentos[-1]) > TAMANHO_BLOCO
+    for saida, texto in zip(saidas, documentos):
+        assert saida["erro"] is None
+        if not texto.strip():
+            assert saida["texto_anonimizado"] == texto and saida["resultados"] == []
+            continue
+        texto_anonimizado, resultados = _um_por_vez(motores, texto)
+        assert saida["texto_anonimizado"] == texto_anonimizado
+        assert _intervalos(saida["resultados"]) == _intervalos(resultados)
+
+
+def test_lote_gera_resultados_sob_demanda(motores, documentos):
+    consumidos = []
+
+    def fonte():
+        for texto in documentos * 5:
+            consumidos.append(texto)
+            yield texto
+
+    saidas = anonimizar_em_lote(fonte(), motores["analyzer"], motores["anonymizer"], motores["operadores"],
+                                motores["entidades"], batch_size=2, tamanho_bloco=TAMANHO_BLOCO)
+    assert next(saidas)["indice"] == 0
+    assert len(consumidos) < len(documentos)
+
+
+def test_erro_em_um_documento_nao_interrompe_o_lote(motores, monkeypatch):
+    def resolver_ou_falhar(texto, resultados):
+        if "falha" in texto:
+            raise RuntimeError("documento inválido")
+        return resolver_conflitos(texto, resultados)
+
+    monkeypatch.setattr(anonimizacao_lote, "resolver_conflitos", resolver_ou_falhar)
+    documentos = ["CPF 123.456.789-09", "falha no CPF 111.222.333-44", "CEP 70040-010"]
+    saidas = list(anonimizar_em_lote(documentos, motores["analyzer"], motores["anonymizer"], motores["operadores"],
+                                     motores["entidades"], batch_size=2))
+    assert [saida["erro"] for saida in saidas] == [None, "documento inválido", None]
+    assert saidas[1]["texto_anonimizado"] is None
+    assert [saida["texto_anonimizado"] for saida in saidas[::2]] == ["CPF <CPF>", "CEP <CEP>"]
+
+
+def test_lote_usa_os_artefatos_do_nlp_pipe(motores, documentos, monkeypatch):
+    # Documentos até o tamanho do bloco não passam pelo process_text (um Doc por chamada do analyze)
+    def process_text(texto, idioma):
+        raise AssertionError("process_text chamado para um documento do lote")
+
+    monkeypatch.setattr(motores["analyzer"].nlp_engine, "process_text", process_text)
+    curtos = [texto for texto in documentos if len(texto) <= TAMANHO_BLOCO]
+    saidas = list(anonimizar_em_lote(curtos, motores["analyzer"], motores["anonymizer"], motores["operadores"],
+                                     motores["entidades"], batch_size=4, tamanho_bloco=TAMANHO_BLOCO))
+    assert [saida["erro"] for saida in saidas] == [None] * len(curtos)
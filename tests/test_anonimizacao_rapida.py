@@ -0,0 +1,89 @@
+# Nome do arquivo: tests/test_anonimizacao_rapida.py
+"""
+A anonimização direta (anonimizacao_rapida.py) precisa dar exatamente o texto do
+AnonymizerEngine. Comparação com casos aleatórios (sem modelo do spaCy): textos
+curtos com muitos espaços, resultados sobrepostos, contidos, com os mesmos
+índices e scores empatados, e operadores keep/replace/mask variados.
+"""
+
+import copy
+import random
+
+import pytest
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer import AnonymizerEngine
+from presidio_anonymizer.entities import OperatorConfig
+
+from anonimizacao_rapida import anonimizar_rapido, anonimizar_texto, operadores_suportados
+
+ENTIDADES = ("NOME", "CPF", "ENDERECO")
+CASOS_POR_SEMENTE = 2000
+
+
+@pytest.fixture(scope="module")
+def anonymizer():
+    return AnonymizerEngine()
+
+
+def _operador_aleatorio(sorteio: random.Random) -> OperatorConfig:
+    nome = sorteio.choice(("keep", "replace", "replace", "mask"))
+    if nome == "keep":
+        return OperatorConfig("keep")
+    if nome == "replace":
+        return OperatorConfig("replace", {"new_value": f"<{sorteio.choice(ENTIDADES)}>"} if sorteio.random() < 0.7 else {})
+    return OperatorConfig("mask", {"masking_char": sorteio.choice("*#"), "chars_to_mask": sorteio.randint(0, 8),
+                                   "from_end": sorteio.random() < 0.5})
+
+
+def _caso_aleatorio(sorteio: random.Random):
+    texto = "".join(sorteio.choice("ab  c\n") for _ in range(sorteio.randint(0, 40)))
+    resultados = []
+    for _ in range(sorteio.randint(0, 8)):
+        inicio = sorteio.randint(0, len(texto))
+        fim = sorteio.randint(inicio, min(len(texto), inicio + 12))
+        if resultados and sorteio.random() < 0.15:  # mesmos índices de um resultado anterior
+            anterior = sorteio.choice(resultados)
+            inicio, fim = anterior.start, anterior.end
+        resultados.append(RecognizerResult(sorteio.choice(ENTIDADES), inicio, fim, sorteio.choice((0.5, 0.85, 1.0))))
+    operadores = {entidade: _operador_aleatorio(sorteio) for entidade in ENTIDADES if sorteio.random() < 0.8}
+    if sorteio.random() < 0.5:
+        operadores["DEFAULT"] = _operador_aleatorio(sorteio)
+    return texto, resultados, operadores
+
+
+@pytest.mark.parametrize("semente", range(8))
+def test_igual_ao_anonymizer_engine(anonymizer, semente):
+    sorteio = random.Random(semente)
+    caminho_rapido = 0
+    for _ in range(CASOS_POR_SEMENTE):
+        texto, resultados, operadores = _caso_aleatorio(sorteio)
+        assert operadores_suportados(operadores)
+        resultados_presidio, resultados_rapidos = copy.deepcopy(resultados), copy.deepcopy(resultados)
+        esperado = anonymizer.anonymize(text=texto, analyzer_results=resultados_presidio, operators=operadores).text
+        obtido = anonimizar_rapido(texto, resultados_rapidos, operadores)
+        if obtido is None:  # mesmo tipo sobreposto: o AnonymizerEngine é usado
+            continue
+        caminho_rapido += 1
+        contexto = (texto, resultados, operadores)
+        assert obtido == esperado, contexto
+        # Os dois ajustam o início dos resultados unidos no próprio objeto
+        assert [(r.start, r.end) for r in resultados_rapidos] == [(r.start, r.end) for r in resultados_presidio], contexto
+    # A maioria dos casos precisa passar pelo caminho direto, senão o teste não compara nada
+    assert caminho_rapido > CASOS_POR_SEMENTE // 2
+
+
+def test_anonimizar_texto_usa_o_anonymizer_engine_quando_necessario(anonymizer):
+    texto = "João Silva mora aqui"
+    # NOME sobreposto a NOME: o caminho direto recusa
+    resultados = [RecognizerResult("NOME", 0, 10, 0.85), RecognizerResult("NOME", 5, 15, 0.85)]
+    operadores = {"NOME": OperatorConfig("replace", {"new_value": "<NOME>"})}
+    assert anonimizar_rapido(texto, copy.deepcopy(resultados), operadores) is None
+    esperado = anonymizer.anonymize(text=texto, analyzer_results=copy.deepcopy(resultados), operators=operadores).text
+    assert anonimizar_texto(anonymizer, texto, copy.deepcopy(resultados), operadores) == esperado
+
+
+def test_operador_nao_suportado_usa_o_anonymizer_engine(anonymizer):
+    operadores = {"NOME": OperatorConfig("redact")}
+    assert not operadores_suportados(operadores)
+    resultados = [RecognizerResult("NOME", 0, 4, 0.85)]
+    assert anonimizar_texto(anonymizer, "João mora aqui", resultados, operadores) == " mora aqui"
@@ -0,0 +1,25 @@
+# Nome do arquivo: tests/test_pacote_reconhecedores.py
+"""Pacote de reconhecedores em disco (pacote_reconhecedores.py): reaproveitado só com a mesma assinatura."""
+
+import pacote_reconhecedores
+from pacote_reconhecedores import calcular_assinatura_pacote, carregar_pacote_reconhecedores
+
+LISTAS = (["Brasília"], ["Poder Judiciário"], ["Silva", "Souza"], ["casado"], ["INSS"])
+
+
+def test_outra_versao_de_biblioteca_reconstroi_o_pacote(tmp_path, monkeypatch):
+    assert carregar_pacote_reconhecedores(*LISTAS, dir_cache=str(tmp_path))["origem"] == "construido"
+    assert carregar_pacote_reconhecedores(*LISTAS, dir_cache=str(tmp_path))["origem"] == "cache"
+    assinatura = calcular_assinatura_pacote(*LISTAS)
+
+    versao_instalada = pacote_reconhecedores.metadata.version
+    for biblioteca in pacote_reconhecedores.BIBLIOTECAS_PACOTE:
+        monkeypatch.setattr(pacote_reconhecedores.metadata, "version",
+                            lambda nome, biblioteca=biblioteca: "0.0.0" if nome == biblioteca else versao_instalada(nome))
+        assert calcular_assinatura_pacote(*LISTAS) != assinatura
+        pacote = carregar_pacote_reconhecedores(*LISTAS, dir_cache=str(tmp_path))
+        assert pacote["origem"] == "construido"
+        monkeypatch.undo()
+    # O pacote da versão instalada foi substituído (ver _remover_pacotes_antigos) e é reconstruído
+    assert carregar_pacote_reconhecedores(*LISTAS, dir_cache=str(tmp_path))["origem"] == "construido"
+    assert len(list(tmp_path.glob("pacote_reconhecedores_v*.pkl"))) == 1
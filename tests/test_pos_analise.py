@@ -0,0 +1,129 @@
+# Nome do arquivo: tests/test_pos_analise.py
+"""Regras de precedência de pos_analise.resolver_conflitos (sem modelo do spaCy)."""
+
+import copy
+
+import pytest
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer import AnonymizerEngine
+from presidio_anonymizer.entities import OperatorConfig
+
+from anonimizacao_rapida import anonimizar_texto
+from pos_analise import resolver_conflitos
+
+# Os operadores do anonimizador.py que importam aqui (os termos protetores ficam com o DEFAULT, keep)
+OPERADORES = {
+    "DEFAULT": OperatorConfig("keep"),
+    "PERSON": OperatorConfig("replace", {"new_value": "<NOME>"}),
+    "LOCATION": OperatorConfig("replace", {"new_value": "<ENDERECO>"}),
+    "CPF": OperatorConfig("replace", {"new_value": "<CPF>"}),
+    "CI": OperatorConfig("replace", {"new_value": "***"}),
+    "CIN": OperatorConfig("replace", {"new_value": "***"}),
+}
+
+
+def _resultado(texto: str, trecho: str, entidade: str, score: float = 0.85, ocorrencia: int = 0) -> RecognizerResult:
+    inicio = -1
+    for _ in range(ocorrencia + 1):
+        inicio = texto.index(trecho, inicio + 1)
+    return RecognizerResult(entidade, inicio, inicio + len(trecho), score)
+
+
+def _intervalos(texto: str, resultados):
+    return [(r.entity_type, texto[r.start:r.end]) for r in resultados]
+
+
+@pytest.fixture(scope="module")
+def anonymizer():
+    return AnonymizerEngine()
+
+
+@pytest.mark.parametrize("texto, protegido, entidade, termo, esperado", [
+    ("Residente na Rua Bahia 45", "Rua Bahia 45", "LOCATION", "Bahia", "Residente na <ENDERECO>"),
+    ("Autor: João Paraná da Silva", "João Paraná da Silva", "PERSON", "Paraná", "Autor: <NOME>"),
+])
+def test_person_location_que_contem_termo_protetor_fica_inteiro(anonymizer, texto, protegido, entidade, termo, esperado):
+    resultados = [_resultado(texto, protegido, entidade), _resultado(texto, termo, "SAFE_LOCATION", 1.0)]
+    resolvidos, contagem = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [(entidade, protegido)]
+    assert contagem == {"removidos": 1, "unidos": 0, "recortados": 0}
+    assert anonimizar_texto(anonymizer, texto, resolvidos, OPERADORES) == esperado
+    # O mesmo texto que o AnonymizerEngine daria sem a etapa
+    assert anonymizer.anonymize(text=texto, analyzer_results=copy.deepcopy(resultados), operators=OPERADORES).text == esperado
+
+
+@pytest.mark.parametrize("entidade_termo", ["SAFE_LOCATION", "LEGAL_HEADER", "ORGANIZACAO_CONHECIDA"])
+def test_termo_protetor_com_os_mesmos_indices_vence(entidade_termo):
+    texto = "Justiça Federal do Paraná"
+    resultados = [_resultado(texto, "Paraná", "LOCATION", 1.0), _resultado(texto, "Paraná", entidade_termo, 0.5)]
+    resolvidos, _ = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [(entidade_termo, "Paraná")]
+
+
+def test_termo_protetor_que_contem_o_resultado_vence():
+    texto = "Tribunal Regional Federal da 4ª Região"
+    resultados = [_resultado(texto, "Tribunal Regional Federal", "LEGAL_HEADER"), _resultado(texto, "Regional", "PERSON", 1.0)]
+    resolvidos, _ = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [("LEGAL_HEADER", "Tribunal Regional Federal")]
+
+
+def test_sobreposicao_parcial_recorta_o_resultado_protegido(anonymizer):
+    texto = "Comarca de Curitiba Centro"
+    resultados = [_resultado(texto, "Curitiba Centro", "LOCATION", 1.0), _resultado(texto, "Comarca de Curitiba", "SAFE_LOCATION", 0.5)]
+    resolvidos, contagem = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [("SAFE_LOCATION", "Comarca de Curitiba"), ("LOCATION", "Centro")]
+    assert contagem["recortados"] == 1
+    assert anonimizar_texto(anonymizer, texto, resolvidos, OPERADORES) == "Comarca de Curitiba <ENDERECO>"
+
+
+def test_mesma_entidade_sobreposta_ou_separada_por_espacos_e_unida():
+    texto = "Maria  Souza Lima"
+    resultados = [_resultado(texto, "Maria", "PERSON", 0.6), _resultado(texto, "Souza", "PERSON", 0.9),
+                  _resultado(texto, "Souza Lima", "PERSON", 0.7)]
+    resolvidos, contagem = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [("PERSON", "Maria  Souza Lima")]
+    assert resolvidos[0].score == 0.9
+    assert contagem["unidos"] == 2
+
+
+def test_entidade_que_contem_outra_vence():
+    texto = "CPF 123.456.789-09"
+    resultados = [_resultado(texto, "123.456.789-09", "CPF", 0.5), _resultado(texto, "456", "PERSON", 1.0)]
+    resolvidos, _ = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [("CPF", "123.456.789-09")]
+
+
+def test_mesmos_indices_maior_score_e_depois_prioridade():
+    texto = "documento 1234567"
+    resolvidos, _ = resolver_conflitos(texto, [_resultado(texto, "1234567", "CI", 0.9), _resultado(texto, "1234567", "CIN", 0.6)])
+    assert _intervalos(texto, resolvidos) == [("CI", "1234567")]
+    # Empate no score: CIN vem antes de CI em PRIORIDADE_ENTIDADES
+    resolvidos, _ = resolver_conflitos(texto, [_resultado(texto, "1234567", "CI", 0.6), _resultado(texto, "1234567", "CIN", 0.6)])
+    assert _intervalos(texto, resolvidos) == [("CIN", "1234567")]
+
+
+def test_sobreposicao_parcial_maior_score_e_depois_mais_longo():
+    texto = "Ana Beatriz Rua Augusta"
+    maior_score = [_resultado(texto, "Ana Beatriz Rua", "PERSON", 0.6), _resultado(texto, "Rua Augusta", "LOCATION", 0.9)]
+    resolvidos, _ = resolver_conflitos(texto, maior_score)
+    assert _intervalos(texto, resolvidos) == [("PERSON", "Ana Beatriz"), ("LOCATION", "Rua Augusta")]
+    mais_longo = [_resultado(texto, "Ana Beatriz Rua", "PERSON", 0.9), _resultado(texto, "Rua Augusta", "LOCATION", 0.9)]
+    resolvidos, _ = resolver_conflitos(texto, mais_longo)
+    assert _intervalos(texto, resolvidos) == [("PERSON", "Ana Beatriz Rua"), ("LOCATION", "Augusta")]
+
+
+def test_recorte_sem_letra_nem_digito_e_removido():
+    texto = "CPF 123.456.789-09 -"
+    resultados = [_resultado(texto, "123.456.789-09", "CPF", 1.0), _resultado(texto, "09 -", "PERSON", 0.5)]
+    resolvidos, contagem = resolver_conflitos(texto, resultados)
+    assert _intervalos(texto, resolvidos) == [("CPF", "123.456.789-09")]
+    assert contagem["removidos"] == 1
+
+
+def test_resultados_de_entrada_nao_sao_alterados():
+    texto = "Rua Bahia 45 e Maria Souza"
+    resultados = [_resultado(texto, "Rua Bahia", "LOCATION"), _resultado(texto, "Bahia 45", "SAFE_LOCATION"),
+                  _resultado(texto, "Maria", "PERSON"), _resultado(texto, "Souza", "PERSON")]
+    originais = [(r.entity_type, r.start, r.end, r.score) for r in resultados]
+    resolver_conflitos(texto, resultados)
+    assert [(r.entity_type, r.start, r.end, r.score) for r in resultados] == originais
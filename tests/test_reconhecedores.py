@@ -0,0 +1,130 @@
+# Nome do arquivo: tests/test_reconhecedores.py
+"""Reconhecedores de passada única (reconhecedores.py) contra os reconhecedores do Presidio que eles substituíram."""
+
+import re
+
+import pytest
+from presidio_analyzer import PatternRecognizer
+from presidio_analyzer.pattern import Pattern
+
+from comum import carregar_lista, listas_estaticas_anonimizador, textos_pdfs_exemplo
+from reconhecedores import (FORMATOS_IDENTIFICADORES_NUMERICOS, ReconhecedorIdentificadoresNumericos, ReconhecedorListaTermos,
+                             ReconhecedorSobrenomes)
+
+
+def _intervalos(resultados):
+    return sorted((r.entity_type, r.start, r.end, r.score) for r in resultados)
+
+
+@pytest.fixture(scope="module")
+def textos_exemplo():
+    return textos_pdfs_exemplo()
+
+
+@pytest.fixture(scope="module")
+def lista_sobrenomes():
+    return carregar_lista("sobrenomes_comuns.txt")
+
+
+def _sobrenomes_antigo(lista_sobrenomes):
+    """O reconhecedor de carregar_analyzer_engine antes da trie: um Pattern por sobrenome."""
+    padroes = [Pattern(name=f"surname_{s.lower().replace(' ', '_')}", regex=rf"(?i)\b{re.escape(s)}\b", score=0.97)
+               for s in lista_sobrenomes]
+    return PatternRecognizer(supported_entity="PERSON", name="BrazilianCommonSurnamesRecognizer",
+                             patterns=padroes, supported_language="pt")
+
+
+TEXTO_SOBRENOMES = (
+    "Autor: JOÃO DO NASCIMENTO souza, filho de Maria de souza e de Pedro Castelo Branco.\n"
+    "Testemunhas: d’ávila, Corte Real, Corte-Real, Corte  Real, Vilas Boas Santos e Silvana Silva2.\n"
+    "Silva_Santos; (Oliveira); Conceição/Rodrigues; DE OLIVEIRA-SOUZA; santa rosa.\n"
+)
+
+
+@pytest.mark.parametrize("fator", [1, 3])
+def test_sobrenomes_igual_ao_reconhecedor_antigo(lista_sobrenomes, textos_exemplo, fator):
+    antigo, novo = _sobrenomes_antigo(lista_sobrenomes), ReconhecedorSobrenomes(lista_sobrenomes)
+    for texto in [TEXTO_SOBRENOMES] + [texto for _, texto in textos_exemplo]:
+        texto = texto * fator
+        assert _intervalos(novo.analyze(texto, ["PERSON"])) == _intervalos(antigo.analyze(texto, ["PERSON"]))
+
+
+def test_sobrenomes_termos_com_pontuacao_nas_pontas():
+    # Termos que não começam ou terminam em letra ficam na regex de apoio, com a mesma semântica de \b
+    lista = ["Silva", "D’", "Mc.", "De Souza"]
+    antigo, novo = _sobrenomes_antigo(lista), ReconhecedorSobrenomes(lista)
+    texto = "D’Ávila, Mc. Silva, de souza, xMc. e De  Souza"
+    assert _intervalos(novo.analyze(texto, ["PERSON"])) == _intervalos(antigo.analyze(texto, ["PERSON"]))
+    assert novo.analyze(texto, ["LOCATION"]) == []
+
+
+def _lista_termos_antigo(entidade, nome, termos):
+    """EstadoCivilRecognizer e OrganizacaoConhecidaRecognizer antes da alternação única: um Pattern por termo."""
+    prefixo = "estado_civil" if entidade == "ESTADO_CIVIL" else "org"
+    padroes = [Pattern(name=f"{prefixo}_{t.lower()}", regex=rf"(?i)\b{re.escape(t)}\b", score=0.99) for t in termos]
+    return PatternRecognizer(supported_entity=entidade, name=nome, patterns=padroes, supported_language="pt")
+
+
+TEXTO_LISTA_TERMOS = (
+    "Requerente CASADA, em união estável, Divorciado; separada judicialmente e EM UNIÃO ESTÁVEL.\n"
+    "Justiça Federal da 1ª Região - SJDF / sjgo; Vara Federal de Juizado Especial Cível; Turma Recursal.\n"
+    "PJe - Processo Judicial Eletrônico; INSS/IBAMA; federalismo, Especialmente, Turmas e Justica  Federal.\n"
+)
+
+
+def test_lista_termos_igual_aos_reconhecedores_antigos(textos_exemplo):
+    listas = listas_estaticas_anonimizador()
+    estado_civil, organizacoes = listas["LISTA_ESTADO_CIVIL"], listas["LISTA_ORGANIZACOES_CONHECIDAS"]
+    antigos = [_lista_termos_antigo("ESTADO_CIVIL", "EstadoCivilRecognizer", estado_civil),
+               _lista_termos_antigo("ORGANIZACAO_CONHECIDA", "OrganizacaoConhecidaRecognizer", organizacoes)]
+    novo = ReconhecedorListaTermos({"ESTADO_CIVIL": (estado_civil, 0.99), "ORGANIZACAO_CONHECIDA": (organizacoes, 0.99)})
+    entidades = ["ESTADO_CIVIL", "ORGANIZACAO_CONHECIDA"]
+    # A lista de organizações tem termos repetidos ("Federal", "SJDF"...): o novo reconhecedor compila cada um uma vez
+    assert len(organizacoes) > len({termo.casefold() for termo in organizacoes})
+    for texto in [TEXTO_LISTA_TERMOS] + [texto for _, texto in textos_exemplo]:
+        esperado = [r for antigo in antigos for r in antigo.analyze(texto, entidades)]
+        assert _intervalos(novo.analyze(texto, entidades)) == _intervalos(esperado)
+        assert _intervalos(novo.analyze(texto, ["ESTADO_CIVIL"])) == _intervalos(antigos[0].analyze(texto, entidades))
+
+
+def test_lista_termos_mesmo_termo_em_duas_listas():
+    # Cada ocorrência sai com a entidade e o score de cada lista de origem do termo
+    novo = ReconhecedorListaTermos({"ESTADO_CIVIL": (["Unida", " unida "], 0.99), "ORGANIZACAO_CONHECIDA": (["UNIDA", "Vara"], 0.5)})
+    assert novo.regex_termos.pattern.count("|") == 1
+    assert _intervalos(novo.analyze("unida à Vara", [])) == [("ESTADO_CIVIL", 0, 5, 0.99), ("ORGANIZACAO_CONHECIDA", 0, 5, 0.5),
+                                                               ("ORGANIZACAO_CONHECIDA", 8, 12, 0.5)]
+
+
+def _identificadores_antigos():
+    """CustomCpfRecognizer, CNHRecognizer, SIAPERecognizer... antes do scanner: um PatternRecognizer por entidade."""
+    padroes_por_entidade = {}
+    for nome, entidade, regex_formato, score, _, _ in FORMATOS_IDENTIFICADORES_NUMERICOS:
+        padroes_por_entidade.setdefault(entidade, []).append(Pattern(name=nome, regex=regex_formato, score=score))
+    return [PatternRecognizer(supported_entity=entidade, patterns=padroes, supported_language="pt")
+            for entidade, padroes in padroes_por_entidade.items()]
+
+
+TEXTO_IDENTIFICADORES = (
+    "CPF 123.456.789-09 e 12345678909; cnh nº 98765432100, CNH 98765432100x; SIAPE n. 1234567, matrícula 7654321.\n"
+    "CI 12.345.678-9, CIN 1.234.567-8, 12.345.678-9 e 123456789; CEP 70.040-010, 70040-010 e 70040010.\n"
+    "OAB 12.345/DF, 9876 / sp; NB 123.456.789-X; ID 12345678901; RG nº 1.234.567 - SSP/DF e rg 9.876.543-2.\n"
+    "Processo 1234567-89.2023.4.01.3400, id PJe 12345678901234567890, RNM V1234567, CRM DF - 12345.\n"
+    "A1234567, 1234567B, x.1234567, 123-4567890, 1.2.3.4.5.6.7.8, 2023-01-02, R$ 1.234.567,89 e 00000000000000000000000000.\n"
+)
+
+
+def test_identificadores_igual_aos_reconhecedores_antigos(textos_exemplo):
+    antigos, novo = _identificadores_antigos(), ReconhecedorIdentificadoresNumericos()
+    entidades = novo.supported_entities
+    for texto in [TEXTO_IDENTIFICADORES] + [texto for _, texto in textos_exemplo]:
+        esperado = [r for antigo in antigos for r in antigo.analyze(texto, entidades)]
+        assert _intervalos(novo.analyze(texto, entidades)) == _intervalos(esperado)
+
+
+def test_identificadores_regex_identica_executada_uma_vez():
+    novo = ReconhecedorIdentificadoresNumericos()
+    # ci_padrao e cin_padrao: uma regex, duas entidades
+    assert len(novo.padroes) == len({regex_formato for _, _, regex_formato, _, _, _ in FORMATOS_IDENTIFICADORES_NUMERICOS})
+    texto = "documento 12.345.678-9"
+    assert _intervalos(novo.analyze(texto, ["CI", "CIN"])) == [("CI", 10, 22, 0.9), ("CIN", 10, 22, 0.9)]
+    assert _intervalos(novo.analyze(texto, ["CIN"])) == [("CIN", 10, 22, 0.9)]
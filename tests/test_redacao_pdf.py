@@ -0,0 +1,151 @@
+# Nome do arquivo: tests/test_redacao_pdf.py
+"""Redações por página em colunas (redacao_pdf.TabelaRedacoes), PDF tarjado sem dados fora do texto, caixas dos caracteres e o cache de resultados em binário."""
+
+import fitz
+import pytest
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
+from cache_resultados import CacheResultados
+from ocr_pdf import caixas_caracteres
+from redacao_pdf import TabelaRedacoes, distribuir_resultados_por_pagina, gerar_pdf_redigido, limpar_documento, limpar_pagina
+from tabela_intervalos import TabelaIntervalos
+
+OPERADORES = {
+    "DEFAULT": OperatorConfig("keep"),
+    "PERSON": OperatorConfig("replace", {"new_value": "<NOME>"}),
+    "CPF": OperatorConfig("mask", {"masking_char": "*", "chars_to_mask": 11, "from_end": False}),
+}
+NOME = "Joao da Silva"
+
+
+def _por_pagina(redacoes: TabelaRedacoes):
+    return {numero: redacoes.da_pagina(numero) for numero in redacoes.paginas()}
+
+
+def test_distribuir_resultados_por_pagina():
+    paginas = ["Autor: João\n", "", "Silva CPF 123.456.789-09\n", "Ré: Maria\n"]
+    texto = "".join(paginas)
+    resultados = [
+        RecognizerResult("PERSON", texto.index("João"), texto.index(" CPF"), 0.85),  # atravessa a página vazia
+        RecognizerResult("CPF", texto.index("123"), texto.index("-09") + 3, 1.0),
+        RecognizerResult("LEGAL_HEADER", 0, 5, 0.99),  # operador keep: sem tarja
+        RecognizerResult("PERSON", texto.index("Maria"), len(texto) + 10, 0.85),  # além do fim do texto
+    ]
+    redacoes = distribuir_resultados_por_pagina(paginas, resultados, OPERADORES, pagina_inicial=10)
+    assert _por_pagina(redacoes) == {
+        10: [(7, 12, "<NOME>")],
+        12: [(0, 5, ""), (10, 24, "***********-09")],
+        13: [(4, 10, "<NOME>")],
+    }
+    # A entrada também pode ser uma TabelaIntervalos
+    tabela = TabelaIntervalos.de_resultados(resultados)
+    assert _por_pagina(distribuir_resultados_por_pagina(paginas, tabela, OPERADORES, 10)) == _por_pagina(redacoes)
+
+
+def test_concatenar_e_faixa():
+    lote_1 = distribuir_resultados_por_pagina(["CPF 111.222.333-44\n"], [RecognizerResult("CPF", 4, 18, 1.0)], OPERADORES, 0)
+    lote_2 = distribuir_resultados_por_pagina(["Ana\n", "Bia\n"], [RecognizerResult("PERSON", 0, 3, 0.85),
+                                                                 RecognizerResult("PERSON", 4, 7, 0.85)], OPERADORES, 1)
+    redacoes = TabelaRedacoes.concatenar([lote_2, TabelaRedacoes.vazia(), lote_1])
+    assert _por_pagina(redacoes) == {0: [(4, 18, "***********-44")], 1: [(0, 3, "<NOME>")], 2: [(0, 3, "<NOME>")]}
+    assert _por_pagina(redacoes.faixa(1, 2)) == {1: [(0, 3, "<NOME>")]}
+    assert redacoes.da_pagina(5) == []
+    assert len(TabelaRedacoes.concatenar([])) == 0
+
+
+def test_cache_resultados_guarda_colunas_binarias(tmp_path):
+    resultados = [RecognizerResult("PERSON", 0, 4, 0.85), RecognizerResult("CPF", 10, 24, 1.0),
+                  RecognizerResult("PERSON", 30, 35, 0.6)]
+    cache = CacheResultados(dir_cache=str(tmp_path), limite_itens_disco=10)
+    cache.guardar("texto", "impressao", "<NOME> mora aqui", resultados)
+    # Nível em disco: uma instância nova não tem nada em memória
+    for instancia in (cache, CacheResultados(dir_cache=str(tmp_path), limite_itens_disco=10)):
+        texto_anonimizado, obtidos = instancia.obter("texto", "impressao")
+        assert texto_anonimizado == "<NOME> mora aqui"
+        assert [(r.entity_type, r.start, r.end, r.score) for r in obtidos] == \
+               [(r.entity_type, r.start, r.end, r.score) for r in resultados]
+    assert cache.obter("texto", "outra configuracao") is None
+    vazio = TabelaIntervalos.de_bytes(TabelaIntervalos.de_resultados([]).para_bytes())
+    assert len(vazio) == 0 and vazio.entidades == ()
+
+
+def _pdf_com_dados_fora_do_texto(caminho):
+    """Duas páginas com o nome no texto e também nos metadados, sumário, anotação, formulário, link e anexo."""
+    with fitz.open() as documento_pdf:
+        for numero in range(2):
+            pagina = documento_pdf.new_page()
+            pagina.insert_text((72, 72), f"Autor: {NOME} (folha {numero + 1})", fontsize=11)
+            pagina.add_text_annot((72, 120), f"{NOME}, CPF 123.456.789-00")
+            widget = fitz.Widget()
+            widget.field_name, widget.field_value = f"parte_{numero}", NOME
+            widget.field_type, widget.rect = fitz.PDF_WIDGET_TYPE_TEXT, fitz.Rect(72, 150, 300, 170)
+            pagina.add_widget(widget)
+            pagina.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(72, 200, 200, 220), "uri": "mailto:joao.silva@exemplo.com"})
+        documento_pdf.set_metadata({"author": NOME, "title": f"Processo de {NOME}", "subject": NOME})
+        documento_pdf.set_xml_metadata(f"<x:xmpmeta xmlns:x='adobe:ns:meta/'><dc>{NOME}</dc></x:xmpmeta>")
+        documento_pdf.set_toc([[1, NOME, 1]])
+        documento_pdf.embfile_add("peticao.txt", f"Petição de {NOME}".encode("utf-8"))
+        documento_pdf.save(caminho)
+
+
+@pytest.mark.parametrize("num_trabalhadores", [1, 2])
+def test_pdf_redigido_sem_dados_fora_do_texto(tmp_path, num_trabalhadores):
+    caminho = str(tmp_path / "original.pdf")
+    _pdf_com_dados_fora_do_texto(caminho)
+    with fitz.open(caminho) as documento_pdf:
+        paginas = [pagina.get_text() for pagina in documento_pdf]
+    texto = "".join(paginas)
+    resultados = [RecognizerResult("PERSON", inicio, inicio + len(NOME), 0.85)
+                  for inicio in range(len(texto)) if texto.startswith(NOME, inicio)]
+    redacoes = distribuir_resultados_por_pagina(paginas, resultados, OPERADORES)
+    caminho_saida = str(tmp_path / "redigido.pdf")
+    redacao = gerar_pdf_redigido(caminho, redacoes, caminho_saida, num_trabalhadores=num_trabalhadores,
+                                 paginas_minimas_paralelo=0)
+    assert redacao["trabalhadores"] == num_trabalhadores and redacao["tarjas"] == len(resultados)
+
+    with fitz.open(caminho_saida) as documento_pdf:
+        assert documento_pdf.page_count == 2
+        assert all(not valor for valor in documento_pdf.metadata.values() if valor != documento_pdf.metadata["format"])
+        assert documento_pdf.get_toc() == []
+        assert documento_pdf.embfile_count() == 0
+        for pagina in documento_pdf:
+            assert "<NOME>" in pagina.get_text() and "Joao" not in pagina.get_text()
+            assert list(pagina.annots()) == [] and list(pagina.widgets()) == [] and pagina.get_links() == []
+        # Nenhum objeto nem stream do arquivo (descomprimido) contém o nome
+        for xref in range(1, documento_pdf.xref_length()):
+            assert "Joao" not in documento_pdf.xref_object(xref, compressed=False)
+            if documento_pdf.xref_is_stream(xref):
+                assert b"Joao" not in documento_pdf.xref_stream(xref)
+
+
+def test_limpar_documento_e_pagina(tmp_path):
+    # O documento de saída já nasce sem a estrutura do original; a limpeza também vale para o próprio original
+    caminho = str(tmp_path / "original.pdf")
+    _pdf_com_dados_fora_do_texto(caminho)
+    with fitz.open(caminho) as documento_pdf:
+        limpar_documento(documento_pdf)
+        for pagina in documento_pdf:
+            limpar_pagina(pagina)
+        documento_pdf.save(str(tmp_path / "limpo.pdf"), garbage=4)
+    with fitz.open(str(tmp_path / "limpo.pdf")) as documento_pdf:
+        assert NOME not in str(documento_pdf.metadata) and not documento_pdf.get_xml_metadata()
+        assert documento_pdf.get_toc() == [] and documento_pdf.embfile_count() == 0
+        assert all(list(pagina.annots()) == [] and list(pagina.widgets()) == [] and pagina.get_links() == []
+                   for pagina in documento_pdf)
+
+
+def test_caixas_com_altura_do_corpo_da_fonte_sem_mudar_a_opcao_global():
+    anterior = fitz.TOOLS.set_small_glyph_heights()
+    fitz.TOOLS.set_small_glyph_heights(False)
+    try:
+        with fitz.open() as documento_pdf:
+            pagina = documento_pdf.new_page()
+            pagina.insert_text((72, 72), NOME, fontsize=20)
+            coordenadas, _ = caixas_caracteres(pagina)
+            assert fitz.TOOLS.set_small_glyph_heights() is False
+            x0, y0, x1, y1 = pagina.get_text("rawdict")["blocks"][0]["lines"][0]["spans"][0]["chars"][0]["bbox"]
+            assert tuple(coordenadas[0, [0, 2]]) == (x0, x1)
+            assert y0 < coordenadas[0, 1] and coordenadas[0, 3] < y1
+    finally:
+        fitz.TOOLS.set_small_glyph_heights(anterior)